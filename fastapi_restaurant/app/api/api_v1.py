@@ -1,10 +1,18 @@
 import json
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Form
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Form, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+import asyncio
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.db.menu_json import product_list_json
+from app.core.events import restaurant_changed
 from app.core.config import settings
 from app.core.deps import require_admin, require_restaurant
+from app.core.uploads import UploadRoute, max_files
 import shutil, os
+import mimetypes
+import stat
 from pydantic import EmailStr  # Add this\
 from app.crud.crud import (
     create_restaurant,
@@ -20,7 +28,22 @@ from app.crud.crud import (
     update_product,
     update_product_availability,
     get_restaurant_by_id,
-    update_restaurant
+    update_restaurant,
+    search_products,
+    count_restaurants_by_location,
+    get_restaurant_by_identifier,
+    list_orders,
+    publish_menu,
+    list_menu_versions,
+    activate_menu_version,
+    get_public_menu_by_identifier,
+    get_menu_analytics,
+    adjust_prices,
+    get_dashboard,
+    PRODUCT_RELATIONS,
+    get_products_by_ids,
+    get_product_delta,
+    get_public_menu_delta,
 )
 
 from app.schemas.schemas import (
@@ -35,18 +58,54 @@ from app.schemas.schemas import (
     ProductImageRead,
     ProductAvailabilityUpdate,
     RestaurantUpdate,
+    ProductSearchResults,
+    OrderCreate,
+    OrderRead,
+    RestaurantSuggestion,
+    DirectoryCountry,
+    MenuVersionRead,
+    MenuViewsCreate,
+    MenuAnalyticsRead,
+    RestaurantPurgeRead,
+    PriceAdjustment,
+    PriceAdjustmentResult,
+    DashboardRead,
+    dump_sparse_list,
+    ProductBatch,
+    ProductBatchRequest,
+    ProductDelta,
+    PublicMenuDelta,
+    OnboardingReport,
 )
 from app.models.models import Product, ProductImage
 
 from typing import List
-from app.core.s3 import delete_file_from_s3, upload_file_to_s3
-from app.crud.crud import add_product_images
+from app.core.s3 import upload_file_to_s3
+from app.core.storage import InvalidKey, backend_for_url, local_storage
+from app.core.images import MEDIA_TYPES as IMAGE_MEDIA_TYPES, UnsupportedImage, can_decode, image_variants
+from app.core.typeahead import restaurant_suggest_index
+from app.core.directory import location_directory, location_key
+from app.core.publisher import identifier_for, local_menu_path, menu_publisher, public_menu_url
+from app.core.qr import public_menu_link, qr_file, qr_sheet_file
+from app.core.cache import CachedBody, cached_response, if_none_match, response_cache
+from app.core.sync import parse_token
+from app.core.orders import menu_snapshots, order_feed, order_ingestor, validate_order
+from app.core.analytics import menu_analytics
+from app.core.purge import restaurant_purger
+from app.core.onboarding import onboard_restaurants, parse_rows
+from pydantic import TypeAdapter
+from app.crud.crud import (
+    add_product_image_files,
+    delete_product_image,
+    inspect_image_files,
+    upload_new_image_blobs,
+)
 from app.models import models
 from passlib.context import CryptContext
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-router = APIRouter()
+router = APIRouter(route_class=UploadRoute)   # streams multipart bodies, see app.core.uploads
 
 
 # =========================================================
@@ -119,21 +178,81 @@ def create_restaurant_api(
     db.add(restaurant)
     db.commit()
     db.refresh(restaurant)
+    restaurant_changed(restaurant.id)
+    restaurant_suggest_index.upsert(restaurant)
+    location_directory.apply(None, location_key(restaurant))
     return restaurant
 
 
 
-@router.delete("/restaurants/{restaurant_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)], tags=["Restaurant"]
+@router.post(
+    "/restaurants/bulk",
+    response_model=OnboardingReport,
+    dependencies=[Depends(require_admin)],
+    tags=["Restaurant"]
+)
+@max_files(settings.ONBOARDING_MAX_ROWS)   # a logo per row; the whole body stays under request_limit()
+def bulk_create_restaurants_api(
+    file: UploadFile = File(...),              # .csv or .json, see app.core.onboarding
+    logos: list[UploadFile] = File(None),      # referenced by file name in the logo column
+    db: Session = Depends(get_db),
+):
+    rows = parse_rows(file.filename or "", file.file.read())
+    results = onboard_restaurants(db, rows, {logo.filename: logo for logo in logos or []})
+
+    # 🔹 Same in-process bookkeeping as create_restaurant_api, one query for all
+    ids = [r["id"] for r in results if r["status"] == "created"]
+    if ids:
+        for restaurant in db.query(models.Restaurant).filter(models.Restaurant.id.in_(ids)):
+            restaurant_changed(restaurant.id)
+            restaurant_suggest_index.upsert(restaurant)
+            location_directory.apply(None, location_key(restaurant))
+    return {"created": len(ids), "failed": len(results) - len(ids), "rows": results}
+
+
+
+@router.delete(
+    "/restaurants/{restaurant_id}",
+    response_model=RestaurantPurgeRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_admin)],
+    tags=["Restaurant"]
 )
 def delete_restaurant_api(
     restaurant_id: int,
     db: Session = Depends(get_db),
     
 ):
-    restaurant = delete_restaurant(db, restaurant_id)
+    restaurant = get_restaurant_by_id(db, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    return
+    old_location = location_key(restaurant)
+    old_identifier = identifier_for(restaurant)
+
+    # 🔥 Hidden immediately; products, images, orders, S3 objects go in the background
+    purge = delete_restaurant(db, restaurant_id)
+    restaurant_changed(restaurant_id)
+    restaurant_suggest_index.remove(restaurant_id)
+    location_directory.apply(old_location, None)
+    menu_publisher.unpublish(old_identifier)
+    restaurant_purger.enqueue(restaurant_id)
+    return purge
+
+
+@router.get(
+    "/restaurants/{restaurant_id}/purge",
+    response_model=RestaurantPurgeRead,
+    dependencies=[Depends(require_admin)],
+    tags=["Restaurant"]
+)
+def get_restaurant_purge_api(
+    restaurant_id: int,
+    db: Session = Depends(get_db),
+):
+    purge = db.get(models.RestaurantPurge, restaurant_id)
+    if not purge:
+        raise HTTPException(status_code=404, detail="No deletion recorded for this restaurant")
+    return purge
 
 
 # @router.patch("/restaurants/{restaurant_id}", response_model=RestaurantRead, tags=["Restaurant"])
@@ -177,6 +296,8 @@ def update_restaurant_api(
     restaurant = get_restaurant_by_id(db, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    old_location = location_key(restaurant)
+    old_identifier = identifier_for(restaurant)
 
     # ----- Update normal fields -----
     if name is not None:
@@ -202,22 +323,80 @@ def update_restaurant_api(
 
     db.commit()
     db.refresh(restaurant)
+    restaurant_changed(restaurant_id)
+    restaurant_suggest_index.upsert(restaurant)
+    location_directory.apply(old_location, location_key(restaurant))
+    if identifier_for(restaurant) != old_identifier:
+        menu_publisher.unpublish(old_identifier)
     return restaurant
 
 
+def _sparse_fields(model, fields: str | None, include: str | None = None, relations=()):
+    """
+    Names to return for ?fields=a,b&include=rel, or None for the full object.
+    `fields` picks columns (and may name relations too); `include` adds
+    relations. `id` is always returned.
+    """
+    if fields is None and include is None:
+        return None
+
+    def names(value: str | None) -> set[str]:
+        return {n.strip() for n in (value or "").split(",") if n.strip()}
+
+    wanted = names(include)
+    unknown = wanted - set(relations)
+    if fields is None:
+        wanted |= set(model.model_fields) - set(relations)
+    else:
+        wanted |= names(fields)
+        unknown |= wanted - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return tuple(n for n in model.model_fields if n in wanted or n == "id")
+
+
 @router.get("/restaurants/", response_model=list[RestaurantRead],  tags=["Restaurant"])
 def list_restaurants_api(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    fields: str | None = Query(None, description="Comma-separated, e.g. id,name"),
+    db: Session = Depends(get_read_db),
 ):
-    return get_restaurants(db, skip, limit)
+    selected = _sparse_fields(RestaurantRead, fields)
+    if selected is None:
+        return get_restaurants(db, skip, limit)
+
+    # 🔹 Only the requested columns are selected and serialized
+    restaurants = get_restaurants(db, skip, limit, columns=selected)
+    return Response(
+        dump_sparse_list(RestaurantRead, selected, restaurants),
+        media_type="application/json",
+    )
+
+
+# ⚠️ must be registered before /restaurants/{restaurant_id}
+@router.get("/restaurants/directory", response_model=list[DirectoryCountry], tags=["Restaurant"])
+def restaurant_directory_api(db: Session = Depends(get_read_db)):
+    if location_directory.is_stale():
+        location_directory.load(count_restaurants_by_location(db))
+    return location_directory.tree()
+
+
+@router.get("/restaurants/suggest", response_model=list[RestaurantSuggestion], tags=["Restaurant"])
+def suggest_restaurants_api(
+    q: str = Query(..., min_length=1, max_length=100),
+    city_code: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    # served entirely from the in-memory prefix index, no DB session
+    return restaurant_suggest_index.suggest(q, city_code, limit)
 
 
 @router.get("/restaurants/{restaurant_id}", response_model=RestaurantRead,  tags=["Category"])
 def get_restaurant_api(
     restaurant_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     restaurant = get_restaurant_by_id(db, restaurant_id)
     
@@ -241,12 +420,24 @@ def create_category_api(
     category: CategoryBase,
     db: Session = Depends(get_db),
 ):
-    return create_category(db, category)
+    category = create_category(db, category)
+    response_cache.invalidate(CATEGORIES_CACHE_KEY)
+    return category
+
+
+CATEGORIES_CACHE_KEY = ("categories",)
+_category_list = TypeAdapter(list[CategoryRead])
 
 
 @router.get("/categories/", response_model=list[CategoryRead],   tags=["Category"])
-def list_categories_api(db: Session = Depends(get_db)):
-    return list_categories(db)
+def list_categories_api(request: Request, db: Session = Depends(get_read_db)):
+    entry = response_cache.get(CATEGORIES_CACHE_KEY)
+    if entry is None:
+        body = _category_list.dump_json(
+            _category_list.validate_python(list_categories(db), from_attributes=True)
+        )
+        entry = response_cache.put(CATEGORIES_CACHE_KEY, body)
+    return cached_response(request, entry)
 
 
 
@@ -290,27 +481,20 @@ def create_product_api(
     if user["restaurant_id"] != rest_id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    if not get_restaurant(db, rest_id):
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-
-    # 🔹 Parse JSON
+    # 🔹 Parse JSON + validate images (no DB, no network)
     product_in = ProductCreate(**json.loads(product))
+    uploads = inspect_image_files(images)
 
-    # 🔹 Create product
-    product_obj = create_product(db, rest_id, product_in)
+    if not get_restaurant(db, rest_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    # 🔹 Upload images & store URLs
-    if images:
-        for image in images:
-            url = upload_file_to_s3(image, folder="products")
-            db.add(ProductImage(
-                product_id=product_obj.id,
-                image_url=url
-            ))
+    # 🔹 Upload new image content with the connection released
+    uploaded = upload_new_image_blobs(db, uploads)
 
-        db.commit()
-        db.refresh(product_obj)
+    # 🔹 Product, sizes and image rows in one short transaction
+    product_obj = create_product(db, rest_id, product_in, uploads, uploaded)
 
+    restaurant_changed(rest_id)
     return product_obj
 
 
@@ -322,9 +506,108 @@ def create_product_api(
 )
 def list_products_api(
     rest_id: int,
-    db: Session = Depends(get_db),
+    fields: str | None = Query(None, description="Comma-separated, e.g. id,name,available"),
+    include: str | None = Query(None, description="Relations: sizes,images,categories"),
+    since: str | None = Query(None, max_length=32, description="`version` of the last sync, 0 for all"),
+    db: Session = Depends(get_read_db),
 ):
-    return get_products_by_restaurant(db, rest_id)
+    if since is not None:
+        if fields is not None or include is not None:
+            raise HTTPException(status_code=400, detail="since can't be combined with fields / include")
+        # 🔹 Delta: changed products + tombstones, shaped as ProductDelta
+        delta = ProductDelta.model_validate(get_product_delta(db, rest_id, since), from_attributes=True)
+        return Response(delta.model_dump_json(), media_type="application/json")
+
+    selected = _sparse_fields(ProductRead, fields, include, PRODUCT_RELATIONS)
+    if selected is None:
+        # 🔹 Built by one json_agg query on Postgres (see app.db.menu_json)
+        return Response(product_list_json(db, rest_id), media_type="application/json")
+
+    # 🔹 Unrequested columns aren't selected, unrequested relations aren't queried
+    products = get_products_by_restaurant(
+        db,
+        rest_id,
+        columns=[n for n in selected if n not in PRODUCT_RELATIONS],
+        relations=[n for n in selected if n in PRODUCT_RELATIONS],
+    )
+    return Response(
+        dump_sparse_list(ProductRead, selected, products),
+        media_type="application/json",
+    )
+
+
+@router.get(
+    "/products/search",
+    response_model=ProductSearchResults,
+    tags=["Product"]
+)
+def search_products_api(
+    q: str = Query(..., min_length=1, max_length=200),
+    city_code: str | None = None,
+    veg: bool | None = None,
+    available: bool | None = True,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    hits = search_products(db, q, city_code, veg, available, skip, limit)
+    return {
+        "q": q,
+        "skip": skip,
+        "limit": limit,
+        "items": [
+            {
+                "product": product,
+                "restaurant_id": product.restaurant_id,
+                "restaurant_name": product.restaurant.name,
+                "city_code": product.restaurant.city_code,
+                "rank": rank,
+            }
+            for product, rank in hits
+        ],
+    }
+
+
+def _product_batch(db: Session, ids: list[int]) -> dict:
+    ids = list(dict.fromkeys(ids))   # drop repeats, keep the order
+    if len(ids) > settings.PRODUCT_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX} ids per request",
+        )
+    items, missing = get_products_by_ids(db, ids)
+    return {"items": items, "missing": missing}
+
+
+@router.get(
+    "/products",
+    response_model=ProductBatch,
+    tags=["Product"]
+)
+def read_products_api(
+    ids: str = Query(..., description="Comma-separated product ids, e.g. 4,8,15"),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        id_list = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not id_list:
+        raise HTTPException(status_code=400, detail="ids is empty")
+    return _product_batch(db, id_list)
+
+
+# 🔹 Same as GET /products?ids= for lists too long for a URL
+@router.post(
+    "/products/batch",
+    response_model=ProductBatch,
+    tags=["Product"]
+)
+def read_products_batch_api(
+    batch: ProductBatchRequest,
+    db: Session = Depends(get_read_db),
+):
+    return _product_batch(db, batch.ids)
 
 
 @router.get(
@@ -334,7 +617,7 @@ def list_products_api(
 )
 def read_product_api(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     product = get_product(db, product_id)
     if not product:
@@ -376,6 +659,10 @@ def update_product_api(
     db: Session = Depends(get_db),
     user=Depends(require_restaurant),
 ):
+    # 🔹 Parse JSON + validate images (no DB, no network)
+    product_in = ProductUpdate(**json.loads(product))
+    uploads = inspect_image_files(images)
+
     product_obj = get_product(db, product_id)
     if not product_obj:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -383,24 +670,19 @@ def update_product_api(
     if product_obj.restaurant_id != user["restaurant_id"]:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    # 🔹 Parse JSON
-    product_in = ProductUpdate(**json.loads(product))
-
-    # 🔹 Update product fields
-    updated_product = update_product(db, product_obj, product_in)
-
-    # 🔹 Upload & append images
-    if images:
-        for image in images:
-            url = upload_file_to_s3(image, folder="products")
-            db.add(ProductImage(
-                product_id=product_id,
-                image_url=url
-            ))
+    # 🔹 Upload new image content with the connection released
+    if uploads:
+        uploaded = upload_new_image_blobs(db, uploads)
+        product_obj = get_product(db, product_id)   # detached by the release; reload
+        if not product_obj:
+            raise HTTPException(status_code=404, detail="Product not found")
+    else:
+        uploaded = set()
 
-        db.commit()
-        db.refresh(updated_product)
+    # 🔹 Fields, sizes and image rows in one short transaction
+    updated_product = update_product(db, product_obj, product_in, uploads, uploaded)
 
+    restaurant_changed(updated_product.restaurant_id)
     return updated_product
 
 
@@ -429,17 +711,46 @@ def delete_product_image_api(
     if product.restaurant_id != user["restaurant_id"]:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    # 🔥 delete from S3
-    delete_file_from_s3(image.image_url)
-
-    # 🔥 delete from DB
-    db.delete(image)
-    db.commit()
+    # 🔥 delete from DB; the S3 object goes with the last reference
+    rest_id = product.restaurant_id
+    delete_product_image(db, image)
+    image_variants.invalidate(image_id)
+    restaurant_changed(rest_id)
 
     return
 
 
 
+# =========================================================
+# BULK REPRICING (RESTAURANT ONLY)
+# =========================================================
+
+@router.post(
+    "/restaurants/{rest_id}/prices/adjust",
+    response_model=PriceAdjustmentResult,
+    tags=["Product"]
+)
+def adjust_prices_api(
+    rest_id: int,
+    adjustment: PriceAdjustment,
+    db: Session = Depends(get_db),
+    user=Depends(require_restaurant),
+):
+    """
+    e.g. {"category_id": 3, "mode": "percent", "amount": 5, "round_to": 0.5, "rounding": "up"}.
+    Runs as a preview unless "dry_run": false; changes the draft menu only.
+    """
+    if user["restaurant_id"] != rest_id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    changes = adjust_prices(db, rest_id, adjustment)
+    applied = bool(changes) and not adjustment.dry_run
+    if applied:
+        restaurant_changed(rest_id)   # one invalidation for the whole batch
+
+    return {"applied": applied, "count": len(changes), "changes": changes}
+
+
 # =========================================================
 # PRODUCT AVAILABILITY (RESTAURANT ONLY)
 # =========================================================
@@ -464,7 +775,9 @@ def update_availability_api(
     if product.restaurant_id != user["restaurant_id"]:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    return update_product_availability(db, product_id, payload.available)
+    product = update_product_availability(db, product_id, payload.available)
+    restaurant_changed(product.restaurant_id)
+    return product
 
 
 # =========================================================
@@ -494,12 +807,10 @@ def upload_product_images_api(
     if product.restaurant_id != user["restaurant_id"]:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    image_urls = []
-    for file in files:
-        url = upload_file_to_s3(file, f"products/{product_id}")
-        image_urls.append(url)
-
-    return add_product_images(db, product_id, image_urls)
+    # 🔹 Releases the connection while uploading, then one short write
+    images = add_product_image_files(db, product_id, files)
+    restaurant_changed(product.restaurant_id)
+    return images
 
 
 
@@ -518,16 +829,381 @@ def upload_product_images_temp(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    image_urls = []
-    for file in files:
-        url = upload_file_to_s3(file, f"products/{product_id}")
-        image_urls.append(url)
+    images = add_product_image_files(db, product_id, files)
+    restaurant_changed(product.restaurant_id)
+    return images
 
-    return add_product_images(db, product_id, image_urls)
 
 
 
 
+# =========================================================
+# ORDERS (PUBLIC CREATE, RESTAURANT READ)
+# =========================================================
+
+@router.post(
+    "/restaurants/{rest_id}/orders",
+    response_model=OrderRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Order"]
+)
+def create_order_api(
+    rest_id: int,
+    order_in: OrderCreate,
+    db: Session = Depends(get_db),
+):
+    # priced against the cached menu; stored by the write-behind ingestor
+    order = validate_order(db, rest_id, order_in)
+    db.close()  # nothing else to read; don't hold the session while queueing
+    order_ingestor.submit(order)
+    return order
+
+
+@router.get(
+    "/restaurants/{rest_id}/orders",
+    response_model=list[OrderRead],
+    tags=["Order"]
+)
+def list_orders_api(
+    rest_id: int,
+    status: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    user=Depends(require_restaurant),
+):
+    if user["restaurant_id"] != rest_id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+    return list_orders(db, rest_id, status, limit)
+
+
+@router.get("/restaurants/{rest_id}/orders/stream", tags=["Order"])
+async def stream_orders_api(
+    rest_id: int,
+    request: Request,
+    user=Depends(require_restaurant),
+):
+    """Server-sent events: one `order` event per newly stored order."""
+    if user["restaurant_id"] != rest_id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    async def events():
+        sub = order_feed.subscribe(rest_id)
+        _, q = sub
+        try:
+            while not await request.is_disconnected():
+                try:
+                    order = await asyncio.wait_for(q.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                # same shape (prices as numbers) as GET .../orders
+                yield f"event: order\ndata: {OrderRead.model_validate(order).model_dump_json()}\n\n"
+        finally:
+            order_feed.unsubscribe(rest_id, sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# =========================================================
+# QR CODES (RESTAURANT ONLY)
+# =========================================================
+
+QR_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+QR_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def _own_restaurant(db: Session, rest_id: int, user: dict):
+    if user["restaurant_id"] != rest_id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    restaurant = get_restaurant(db, rest_id)
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return restaurant
+
+
+@router.get("/restaurants/{rest_id}/qr", tags=["QR"])
+def get_restaurant_qr_api(
+    rest_id: int,
+    format: str = Query("png", pattern="^(png|svg)$"),
+    table: int | None = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    user=Depends(require_restaurant),
+):
+    restaurant = _own_restaurant(db, rest_id, user)
+
+    path, key = qr_file(public_menu_link(restaurant, table), format)
+    return FileResponse(
+        path,
+        media_type=QR_MEDIA_TYPES[format],
+        headers={"ETag": f'"{key}"', "Cache-Control": QR_CACHE_CONTROL},
+    )
+
+
+@router.get("/restaurants/{rest_id}/qr/sheet.pdf", tags=["QR"])
+def get_restaurant_qr_sheet_api(
+    rest_id: int,
+    start: int = Query(1, ge=1),
+    end: int = Query(..., ge=1),
+    db: Session = Depends(get_read_db),
+    user=Depends(require_restaurant),
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be >= start")
+    if end - start + 1 > settings.QR_SHEET_MAX_TABLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QR_SHEET_MAX_TABLES} tables per sheet",
+        )
+
+    restaurant = _own_restaurant(db, rest_id, user)
+
+    path, key = qr_sheet_file(restaurant, list(range(start, end + 1)))
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"{identifier_for(restaurant)}-tables-{start}-{end}.pdf",
+        headers={"ETag": f'"{key}"', "Cache-Control": QR_CACHE_CONTROL},
+    )
+
+
+# =========================================================
+# DASHBOARD (RESTAURANT ONLY)
+# =========================================================
+
+@router.get(
+    "/restaurants/{rest_id}/dashboard",
+    response_model=DashboardRead,
+    tags=["Restaurant"]
+)
+def get_dashboard_api(
+    rest_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    user=Depends(require_restaurant),
+):
+    """One round trip for the dashboard: restaurant, products, categories, counts."""
+    restaurant = _own_restaurant(db, rest_id, user)
+    dashboard = DashboardRead.model_validate(get_dashboard(db, restaurant), from_attributes=True)
+    body = dashboard.model_dump_json().encode()
+
+    # 🔹 Not cached server side (edits must show at once); the ETag still
+    # spares the transfer when nothing changed since the last load
+    entry = CachedBody(body, "application/json", rest_id)
+    return cached_response(request, entry, "private, no-cache")
+
+
+# =========================================================
+# MENU VERSIONS (RESTAURANT ONLY)
+# =========================================================
+# Product edits only change the draft; diners see the version that was last
+# published (or activated). Restaurants that never published are served live.
+
+@router.post(
+    "/restaurants/{rest_id}/menu/publish",
+    response_model=MenuVersionRead,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Menu"]
+)
+def publish_menu_api(
+    rest_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_restaurant),
+):
+    restaurant = _own_restaurant(db, rest_id, user)
+    menu_version = publish_menu(db, restaurant)
+    restaurant_changed(rest_id)
+    return MenuVersionRead(
+        version=menu_version.version,
+        product_count=menu_version.product_count,
+        published_at=menu_version.published_at,
+        live=True,
+    )
+
+
+@router.get(
+    "/restaurants/{rest_id}/menu/versions",
+    response_model=list[MenuVersionRead],
+    tags=["Menu"]
+)
+def list_menu_versions_api(
+    rest_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    user=Depends(require_restaurant),
+):
+    restaurant = _own_restaurant(db, rest_id, user)
+    return [
+        MenuVersionRead(
+            version=v.version,
+            product_count=v.product_count,
+            published_at=v.published_at,
+            live=v.version == restaurant.published_version,
+        )
+        for v in list_menu_versions(db, rest_id, limit)
+    ]
+
+
+@router.post(
+    "/restaurants/{rest_id}/menu/versions/{version}/activate",
+    response_model=MenuVersionRead,
+    tags=["Menu"]
+)
+def activate_menu_version_api(
+    rest_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_restaurant),
+):
+    # 🔹 Rollback: just moves the pointer, nothing is re-rendered
+    restaurant = _own_restaurant(db, rest_id, user)
+    menu_version = activate_menu_version(db, restaurant, version)
+    restaurant_changed(rest_id)
+    return MenuVersionRead(
+        version=menu_version.version,
+        product_count=menu_version.product_count,
+        published_at=menu_version.published_at,
+        live=True,
+    )
+
+
+# =========================================================
+# MENU ANALYTICS
+# =========================================================
+
+@router.post(
+    "/restaurants/{rest_id}/menu/views",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Analytics"]
+)
+def record_menu_views_api(
+    rest_id: int,
+    views: MenuViewsCreate,
+    db: Session = Depends(get_read_db),
+):
+    """Beacon from the public menu page: products the diner opened."""
+    # only count products that are on the menu, so the counters stay bounded
+    menu = menu_snapshots.get(db, rest_id)
+    menu_analytics.record_views(rest_id, [pid for pid in set(views.product_ids) if pid in menu])
+
+
+@router.get(
+    "/restaurants/{rest_id}/analytics",
+    response_model=MenuAnalyticsRead,
+    tags=["Analytics"]
+)
+def get_menu_analytics_api(
+    rest_id: int,
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_read_db),
+    user=Depends(require_restaurant),
+):
+    if user["restaurant_id"] != rest_id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    daily, products = get_menu_analytics(db, rest_id, since)
+    return {
+        "days": days,
+        "total_scans": sum(d.views for d in daily),
+        "daily": [{"day": d.day, "scans": d.views} for d in daily],
+        "products": [
+            {"product_id": p.product_id, "name": p.name, "views": p.views}
+            for p in products
+        ],
+    }
+
+
+# =========================================================
+# FILES (LOCAL STORAGE BACKEND)
+# =========================================================
+
+FILE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/files/{key:path}", tags=["Files"])
+def get_stored_file_api(key: str, request: Request):
+    """
+    Serve an object written by the local storage backend. Objects are
+    immutable, so (size, mtime) makes a strong ETag; Range requests are
+    handled by FileResponse.
+    """
+    if settings.STORAGE_BACKEND != "local":
+        raise HTTPException(status_code=404, detail="File not found")
+
+    try:
+        path = local_storage.path(key)
+        st = os.stat(path)
+    except (InvalidKey, FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {
+        "ETag": f'"{st.st_size:x}-{st.st_mtime_ns:x}"',
+        "Cache-Control": FILE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if if_none_match(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if settings.LOCAL_STORAGE_ACCEL_REDIRECT:
+        # 🔹 nginx serves the bytes with sendfile (and handles Range itself)
+        headers["X-Accel-Redirect"] = f"{settings.LOCAL_STORAGE_ACCEL_REDIRECT.rstrip('/')}/{key}"
+        return Response(media_type=media_type, headers=headers)
+
+    # zero-copy on servers with the ASGI pathsend extension (e.g. Granian);
+    # uvicorn has none, so FileResponse streams the file in chunks there
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=st)
+
+
+# =========================================================
+# IMAGE VARIANTS (PUBLIC)
+# =========================================================
+
+@router.get("/images/{image_id}", tags=["Files"])
+def get_image_variant_api(
+    image_id: int,
+    request: Request,
+    w: int = Query(...),
+    format: str = Query("webp"),
+    db: Session = Depends(get_read_db),
+):
+    """Resized copy of a product image, e.g. ?w=320&format=webp (allow-listed values only)."""
+    if w not in settings.IMAGE_VARIANT_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"w must be one of {settings.IMAGE_VARIANT_WIDTHS}")
+    if format not in settings.IMAGE_VARIANT_FORMATS or format not in IMAGE_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {settings.IMAGE_VARIANT_FORMATS}")
+
+    etag = f'"{image_variants.name(image_id, w, format)}"'
+    headers = {"ETag": etag, "Cache-Control": FILE_CACHE_CONTROL}
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    def load_original() -> bytes:
+        # only runs on a cache miss
+        image_url = db.query(ProductImage.image_url).filter(ProductImage.id == image_id).scalar()
+        db.close()
+        found = backend_for_url(image_url) if image_url else None
+        if found is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+        if not can_decode(image_url):
+            raise UnsupportedImage(image_url)
+        backend, key = found
+        return backend.get_bytes(key)
+
+    try:
+        path = image_variants.get_or_create(image_id, w, format, load_original)
+    except UnsupportedImage:
+        # e.g. HEIC without a decoder plugin: only the original can be shown
+        raise HTTPException(status_code=415, detail="No resized variants for this image type")
+    return FileResponse(path, media_type=IMAGE_MEDIA_TYPES[format], headers=headers)
+
 
 # =========================================================
 # PUBLIC ENDPOINTS (NO AUTH REQUIRED)
@@ -538,25 +1214,67 @@ def upload_product_images_temp(
     tags=["Public"]
 )
 def get_public_restaurant_view(
+    request: Request,
     country: str,
     state: str,
     city: str,
     identifier: str,
-    db: Session = Depends(get_db)
+    since: str | None = Query(None, max_length=32, description="`version` of the last sync, 0 for all"),
+    db: Session = Depends(get_read_db)
 ):
-    restaurant = db.query(models.Restaurant).filter(
-        models.Restaurant.email.ilike(f"{identifier}@%.com")
-    ).first()
-
-    if not restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-
-    products = db.query(models.Product).filter(
-        models.Product.restaurant_id == restaurant.id,
-        models.Product.available.is_(True)
-    ).all()
-
-    return {
-        "restaurant": restaurant,
-        "products": products
-    }
+    if since is not None:
+        return _public_menu_delta(request, identifier, since, db)
+
+    # 🔹 Published static menu: serve / redirect (the s3 check is cached per restaurant)
+    if settings.MENU_PUBLISH_TARGET == "s3" and menu_publisher.has_published_menu(db, identifier.lower()):
+        return RedirectResponse(public_menu_url(identifier.lower()), status_code=307)
+    if settings.MENU_PUBLISH_TARGET == "local":
+        path = local_menu_path(identifier.lower())
+        if os.path.isfile(path):
+            return FileResponse(path, media_type="application/json",
+                                headers={"Cache-Control": "public, max-age=60"})
+
+    # 🔹 Serialized once per menu version, gzip/brotli variants kept alongside
+    cache_key = ("public", identifier.lower())
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        # published menus are a single row fetched by (restaurant_id, version)
+        menu = get_public_menu_by_identifier(db, identifier)
+
+        if not menu:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+
+        restaurant_id, body = menu
+        entry = response_cache.put(cache_key, body, restaurant_id=restaurant_id)
+
+    menu_analytics.record_scan(entry.restaurant_id)
+    return cached_response(request, entry)
+
+
+def _public_menu_delta(request: Request, identifier: str, since: str, db: Session):
+    """?since=: a PublicMenuDelta instead of the whole menu (returning diners)."""
+    # only the full menu and diffs from real published versions are cached:
+    # a handful of entries per restaurant. Time tokens are per client, and
+    # version tokens that match nothing just fall back to the full menu, so
+    # caching those would let any client fill (and churn) the cache.
+    token = parse_token(since)
+    cacheable = token is None or token[0] == "v"
+    cache_key = ("public-delta", identifier.lower(), token)
+    entry = response_cache.get(cache_key) if cacheable else None
+    if entry is None:
+        restaurant = get_restaurant_by_identifier(db, identifier)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+
+        delta = PublicMenuDelta.model_validate(
+            get_public_menu_delta(db, restaurant, since), from_attributes=True
+        )
+        body = delta.model_dump_json().encode()
+        if cacheable and (token is None or not delta.full):
+            # safe to share: a later sync from the returned version picks up anything newer
+            entry = response_cache.put(cache_key, body, restaurant_id=restaurant.id)
+        else:
+            entry = CachedBody(body, "application/json", restaurant.id)
+
+    menu_analytics.record_scan(entry.restaurant_id)
+    return cached_response(request, entry)
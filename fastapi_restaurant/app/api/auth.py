@@ -26,7 +26,11 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
         }
 
     # 2️⃣ Try restaurant login
-    restaurant = db.query(Restaurant).filter(Restaurant.email == payload.username).first()
+    restaurant = (
+        db.query(Restaurant)
+        .filter(Restaurant.email == payload.username, Restaurant.deleted_at.is_(None))
+        .first()
+    )
     if restaurant and verify_password(payload.password, restaurant.password_hash):
         token = create_access_token({
             "sub": restaurant.email,
@@ -0,0 +1,138 @@
+"""
+Admission control per route class.
+
+Every API request is classified (public read, dashboard read, write/upload,
+auth, live stream) and must take a slot from that class before it reaches
+the app. A live stream (the orders SSE feed) holds its slot for as long as
+the dashboard stays open, so streams are capped on their own and never eat
+into the short dashboard reads. When
+all slots are busy it waits in a bounded queue; if the queue is full or the
+wait exceeds the class timeout it is rejected right away with 503 and
+Retry-After, so slow uploads can't starve the public menu.
+"""
+import asyncio
+
+from app.core.config import settings
+
+PUBLIC_PREFIXES = (
+    "/api/v1/public/",
+    "/api/v1/categories/",
+    "/api/v1/products/search",
+    "/api/v1/restaurants/suggest",
+    "/api/v1/restaurants/directory",
+    "/api/v1/files/",
+    "/api/v1/images/",
+)
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+READ_POSTS = {"/api/v1/products/batch"}   # POST only because the body is too long for a URL
+STREAM_SUFFIXES = ("/orders/stream",)
+
+
+def classify(method: str, path: str, headers: dict[bytes, bytes]) -> str | None:
+    if path.startswith("/auth"):
+        return "auth"
+    if not path.startswith("/api/"):
+        return None   # docs, metrics, ... are never shed
+    if method in WRITE_METHODS and path not in READ_POSTS:
+        return "write"
+    if path.endswith(STREAM_SUFFIXES):
+        return "stream"
+    if path.startswith(PUBLIC_PREFIXES) or b"authorization" not in headers:
+        return "public_read"
+    return "dashboard_read"
+
+
+class RouteClassLimiter:
+    def __init__(self, name: str, concurrency: int, queue: int, timeout: float):
+        self.name = name
+        self.max_queue = int(queue)
+        self.timeout = float(timeout)
+        self._slots = asyncio.Semaphore(int(concurrency))
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+
+limiters = {
+    name: RouteClassLimiter(name, **limits)
+    for name, limits in settings.ADMISSION_LIMITS.items()
+}
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"], dict(scope["headers"]))
+        limiter = limiters.get(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await _reject(send, route_class)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def _reject(send, route_class: str):
+    body = b'{"detail":"Server busy, retry shortly"}'
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(settings.ADMISSION_RETRY_AFTER).encode()),
+            (b"x-route-class", route_class.encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def render_metrics() -> str:
+    """Prometheus text format."""
+    lines = []
+    for metric, help_text, kind, attr in (
+        ("admission_in_flight", "Requests currently running", "gauge", "in_flight"),
+        ("admission_queue_depth", "Requests waiting for a slot", "gauge", "waiting"),
+        ("admission_admitted_total", "Requests admitted", "counter", "admitted"),
+        ("admission_rejected_total", "Requests rejected with 503", "counter", "rejected"),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, limiter in limiters.items():
+            lines.append(f'{metric}{{route_class="{name}"}} {getattr(limiter, attr)}')
+    return "\n".join(lines) + "\n"
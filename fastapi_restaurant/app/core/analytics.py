@@ -0,0 +1,131 @@
+"""
+Write-behind menu analytics.
+
+Public menu hits (QR scans) and product views are counted in memory per
+worker process, keyed by (restaurant_id, day, product_id), and a background
+thread flushes them every ANALYTICS_FLUSH_INTERVAL seconds with one batched
+upsert (`views = views + excluded.views`) into `menu_daily_stats`. Workers
+add to the same rows, so nothing needs coordinating between them.
+
+Memory is bounded by ANALYTICS_MAX_KEYS distinct counters: reaching it wakes
+the flusher early, and hits for new keys are dropped (and counted in
+`dropped`) until the flush has emptied the table. Counts are best effort: a
+crash loses at most one flush interval. Menus served as static files
+(MENU_PUBLISH_TARGET) never reach the counting code; use the CDN's logs.
+"""
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import MenuDailyStat, Restaurant
+
+logger = logging.getLogger(__name__)
+
+MENU_SCAN = 0   # product_id used for whole-menu hits
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(MenuDailyStat)
+    return stmt.on_conflict_do_update(
+        index_elements=[MenuDailyStat.restaurant_id, MenuDailyStat.day, MenuDailyStat.product_id],
+        set_={"views": MenuDailyStat.views + stmt.excluded.views},
+    )
+
+
+class MenuAnalytics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[tuple, int] = {}   # (restaurant_id, day, product_id) -> hits
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    # ---------- recording (request path, no I/O) ----------
+
+    def record_scan(self, restaurant_id: int):
+        self._add(restaurant_id, [MENU_SCAN])
+
+    def record_views(self, restaurant_id: int, product_ids):
+        self._add(restaurant_id, product_ids)
+
+    def _add(self, restaurant_id: int, product_ids):
+        if not settings.ANALYTICS_ENABLED:
+            return
+        day = datetime.utcnow().date()
+        with self._lock:
+            for product_id in product_ids:
+                key = (restaurant_id, day, product_id)
+                if key in self._counts:
+                    self._counts[key] += 1
+                elif len(self._counts) < settings.ANALYTICS_MAX_KEYS:
+                    self._counts[key] = 1
+                else:
+                    self.dropped += 1
+                    self._wake.set()
+
+    # ---------- flushing ----------
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        if not counts:
+            return
+
+        rows = [
+            {"restaurant_id": rid, "day": day, "product_id": pid, "views": n}
+            for (rid, day, pid), n in counts.items()
+        ]
+        db = SessionLocal()
+        try:
+            stmt = _upsert(db.get_bind().dialect.name)
+            try:
+                db.execute(stmt, rows)
+                db.commit()
+            except IntegrityError:
+                # a restaurant was deleted since its hits were counted
+                db.rollback()
+                ids = {r["restaurant_id"] for r in rows}
+                alive = {rid for (rid,) in db.query(Restaurant.id).filter(Restaurant.id.in_(ids))}
+                rows = [r for r in rows if r["restaurant_id"] in alive]
+                if rows:
+                    db.execute(stmt, rows)
+                    db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.error("Analytics flush failed, %d counters lost: %r", len(rows), exc)
+        finally:
+            db.close()
+
+    def start(self):
+        if settings.ANALYTICS_ENABLED and self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="menu-analytics", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Flush what has been counted so far and stop the thread."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(settings.ANALYTICS_FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+
+menu_analytics = MenuAnalytics()
@@ -0,0 +1,88 @@
+"""
+Reject oversized request bodies before they are parsed or spooled to disk.
+
+A declared Content-Length over the limit is answered with 413 straight away.
+Chunked bodies are counted as they stream in; once they pass the limit the
+413 is sent from here and the app's receive sees the client go away, so the
+body is never handed over truncated (and the framework's "error parsing the
+body" 400 it raises for that goes nowhere).
+"""
+from app.core.config import settings
+
+
+def request_limit() -> int:
+    """
+    Cap on any request body. Unless set explicitly it is what the largest
+    upload form can legitimately need: UPLOAD_MAX_FILES files of
+    UPLOAD_MAX_BYTES plus the form's text fields. Upload routes apply their
+    own, tighter cap (app.core.uploads).
+    """
+    if settings.UPLOAD_MAX_REQUEST_BYTES is not None:
+        return settings.UPLOAD_MAX_REQUEST_BYTES
+    return settings.UPLOAD_MAX_FILES * settings.UPLOAD_MAX_BYTES + settings.UPLOAD_FORM_OVERHEAD
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = request_limit()
+        headers = dict(scope["headers"])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            await _too_large(send)
+            return
+
+        received = 0
+        response_started = False
+        cut_off = False      # body passed the limit
+        rejected = False     # ... and our 413 went out instead of the app's response
+
+        async def limited_receive():
+            nonlocal received, cut_off, rejected
+            if cut_off:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    cut_off = True
+                    if not response_started:
+                        rejected = True
+                        await _too_large(send)
+                    # end the body here; whatever the app makes of it is dropped below
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except Exception:
+            if not rejected:
+                raise
+
+
+async def _too_large(send):
+    body = b'{"detail":"Request body too large"}'
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
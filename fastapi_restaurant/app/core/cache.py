@@ -0,0 +1,163 @@
+"""
+Serialized response cache with precompressed variants.
+
+Cacheable payloads (public menu, category list) are serialized once per
+version and stored as bytes; the gzip / brotli encodings are produced the
+first time a client asks for them and kept next to the body. Each encoding
+is its own representation with its own strong ETag (`"<hash>"`, `"<hash>-br"`,
+`"<hash>-gzip"`), as the bytes differ. Entries are dropped when
+`restaurant_changed` fires for their restaurant (or explicitly), and expire
+after RESPONSE_CACHE_TTL so other workers' writes show up.
+"""
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.events import on_restaurant_change
+
+try:  # brotli is optional; without it clients get gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class CachedBody:
+    __slots__ = ("body", "etag", "media_type", "created_at", "encoded", "restaurant_id")
+
+    def __init__(self, body: bytes, media_type: str, restaurant_id: int | None):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:20] + '"'   # identity
+        self.media_type = media_type
+        self.created_at = time.monotonic()
+        self.encoded: dict[str, bytes] = {}
+        self.restaurant_id = restaurant_id
+
+    def encode(self, encoding: str) -> bytes:
+        data = self.encoded.get(encoding)
+        if data is None:
+            if encoding == "br":
+                data = brotli.compress(self.body, quality=settings.BROTLI_QUALITY)
+            else:
+                data = gzip.compress(self.body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+            self.encoded[encoding] = data   # benign race: both threads compute the same bytes
+        return data
+
+    def etag_for(self, encoding: str | None) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+def _parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """{coding: q} from an Accept-Encoding header; malformed q-values count as 0."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def pick_encoding(accept_encoding: str) -> str | None:
+    """Best acceptable of br / gzip by q-value (br wins ties); None = send identity."""
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def if_none_match(header: str | None, etag: str) -> bool:
+    """
+    True when If-None-Match matches `etag`: `*`, or any listed tag equal to it
+    by weak comparison (W/ prefixes ignored).
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+class ResponseCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, CachedBody] = OrderedDict()
+
+    def get(self, key: tuple) -> CachedBody | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created_at > settings.RESPONSE_CACHE_TTL:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self,
+        key: tuple,
+        body: bytes,
+        media_type: str = "application/json",
+        restaurant_id: int | None = None,
+    ) -> CachedBody:
+        entry = CachedBody(body, media_type, restaurant_id)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.RESPONSE_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, key: tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_restaurant(self, restaurant_id: int):
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.restaurant_id == restaurant_id]:
+                del self._entries[key]
+
+
+def cached_response(request: Request, entry: CachedBody, cache_control: str = "no-cache") -> Response:
+    encoding = pick_encoding(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": entry.etag_for(encoding),
+        "Vary": "Accept-Encoding",
+        "Cache-Control": cache_control,
+    }
+    if if_none_match(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+    headers["Content-Encoding"] = encoding
+    return Response(entry.encode(encoding), media_type=entry.media_type, headers=headers)
+
+
+response_cache = ResponseCache()
+
+
+@on_restaurant_change
+def _drop_restaurant_responses(restaurant_id: int):
+    response_cache.invalidate_restaurant(restaurant_id)
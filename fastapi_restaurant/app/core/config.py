@@ -5,11 +5,100 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
 
+    # Read replicas (JSON list in env, e.g. '["postgresql://.../replica1"]')
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_STICKY_SECONDS: float = 5.0       # read-your-writes window after a restaurant write
+    REPLICA_MAX_LAG_SECONDS: float = 10.0     # replicas lagging more than this are skipped
+    REPLICA_HEALTH_INTERVAL: float = 5.0      # how often a replica's health/lag is re-checked
+
     # Security
     SECRET_KEY: str
 
+    # Caches
+    DIRECTORY_CACHE_TTL: float = 300.0        # location directory reload interval (seconds)
+    RESPONSE_CACHE_TTL: float = 60.0          # serialized menu / category responses
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+
+    # Compression
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    GZIP_MIN_SIZE: int = 1024                 # dynamic responses smaller than this stay raw
+
+    # Admission control / load shedding (per route class)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_LIMITS: dict[str, dict[str, float]] = {
+        "public_read":    {"concurrency": 32, "queue": 256, "timeout": 2.0},
+        "dashboard_read": {"concurrency": 16, "queue": 64,  "timeout": 5.0},
+        "write":          {"concurrency": 8,  "queue": 32,  "timeout": 10.0},
+        "auth":           {"concurrency": 4,  "queue": 32,  "timeout": 5.0},
+        # long-lived SSE connections: a slot each for their whole life, no queueing
+        "stream":         {"concurrency": 500, "queue": 0,  "timeout": 1.0},
+    }
+    ADMISSION_RETRY_AFTER: int = 1            # seconds, sent with 503
+    THREADPOOL_SIZE: int = 64                 # worker threads for sync routes
+
+    # Orders (write-behind ingestion)
+    ORDER_WRITE_BEHIND: bool = True
+    ORDER_FLUSH_INTERVAL: float = 0.2         # max seconds an accepted order waits in memory
+    ORDER_FLUSH_BATCH: int = 500
+    ORDER_FLUSH_RETRIES: int = 5
+    ORDER_QUEUE_MAX: int = 10000              # beyond this, new orders get 503
+
+    # Menu analytics (write-behind counters)
+    ANALYTICS_ENABLED: bool = True
+    ANALYTICS_FLUSH_INTERVAL: float = 30.0    # seconds between batched upserts
+    ANALYTICS_MAX_KEYS: int = 50000           # distinct counters held in memory per worker
+
+    # Restaurant deletion
+    PURGE_BATCH_SIZE: int = 200               # products / orders removed per transaction
+    PURGE_RETRY_SECONDS: float = 30.0         # first retry of a failed purge; doubles each time
+    PURGE_RETRY_MAX_SECONDS: float = 3600.0
+
+    # Bulk restaurant onboarding (app.core.onboarding)
+    ONBOARDING_MAX_ROWS: int = 500
+    ONBOARDING_BATCH_SIZE: int = 100          # restaurants per multi-row INSERT
+    ONBOARDING_WORKERS: int = 0               # password hashing processes (0 = cpu count)
+    ONBOARDING_UPLOAD_CONCURRENCY: int = 8    # logos uploaded at once
+
+    # Batch product fetch (GET /products?ids=, POST /products/batch)
+    PRODUCT_BATCH_MAX: int = 200
+
+    # Delta sync (?since=, see app.core.sync)
+    SYNC_VERSION_LAG_SECONDS: float = 5.0     # tokens point this far back to cover in-flight commits
+    SYNC_TOMBSTONE_DAYS: int = 30             # deletions kept this long; older tokens get a full response
+
+    # Static menu publishing: "none" | "local" (IMAGE_UPLOAD_DIR) | "s3"
+    MENU_PUBLISH_TARGET: str = "none"
+    MENU_PUBLISH_HTML: bool = False
+    MENU_PUBLIC_BASE_URL: str | None = None   # CDN in front of the bucket, if any
+
+    # QR codes
+    PUBLIC_SITE_URL: str = "http://localhost:5173"   # frontend origin the codes point to
+    QR_CACHE_DIR: str = "./uploads/qr"
+    QR_WORKERS: int = 0                              # sheet render processes (0 = cpu count)
+    QR_SHEET_MAX_TABLES: int = 1000
+
     # File uploads
+    STORAGE_BACKEND: str = "s3"                       # "s3" | "local" (LOCAL_STORAGE_DIR)
     IMAGE_UPLOAD_DIR: str = "./uploads"
+    LOCAL_STORAGE_DIR: str = "./storage"              # uploaded objects only; served by /files
+    LOCAL_STORAGE_URL: str = "http://localhost:8000/api/v1/files"   # public base of local files
+    LOCAL_STORAGE_ACCEL_REDIRECT: str | None = None   # e.g. "/_files/" to let nginx sendfile
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024          # per file
+    UPLOAD_MAX_FILES: int = 10                        # per multi-file field (bulk logos: ONBOARDING_MAX_ROWS)
+    UPLOAD_FORM_OVERHEAD: int = 256 * 1024            # text fields and part headers of an upload form
+    UPLOAD_MAX_REQUEST_BYTES: int | None = None       # any body; None = UPLOAD_MAX_FILES files + overhead
+    S3_MULTIPART_THRESHOLD: int = 5 * 1024 * 1024     # larger images stream to S3 in parts while received
+    S3_MULTIPART_PART_SIZE: int = 5 * 1024 * 1024     # S3 minimum is 5 MB
+    S3_MULTIPART_CONCURRENCY: int = 4
+
+    # Resized image variants (GET /api/v1/images/{id}?w=&format=)
+    IMAGE_VARIANT_WIDTHS: list[int] = [160, 320, 640, 1280]
+    IMAGE_VARIANT_FORMATS: list[str] = ["webp", "jpeg", "png"]
+    IMAGE_CACHE_DIR: str = "./uploads/variants"
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024   # per worker process
+    IMAGE_WORKERS: int = 0                           # resize processes (0 = cpu count)
+    IMAGE_RENDER_TIMEOUT: float = 30.0
 
     # AWS
     AWS_ACCESS_KEY_ID: str
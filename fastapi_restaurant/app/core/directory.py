@@ -0,0 +1,95 @@
+"""
+Cached country -> state -> city directory with restaurant counts.
+
+Counts are loaded from one grouped query and then adjusted in place when a
+restaurant is created, moved or deleted, so the tree never has to be
+rebuilt from the restaurants table on the request path. A TTL reload picks
+up writes made by other worker processes.
+"""
+import threading
+import time
+
+from app.core.config import settings
+
+
+def location_key(restaurant) -> tuple:
+    return (
+        restaurant.country_code,
+        restaurant.state_code,
+        restaurant.city_code,
+        bool(restaurant.pure_veg),
+    )
+
+
+class LocationDirectory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[tuple, list[int]] = {}   # (country, state, city) -> [count, veg_count]
+        self._tree: list[dict] | None = None
+        self._loaded_at: float | None = None
+
+    def is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > settings.DIRECTORY_CACHE_TTL
+        )
+
+    def load(self, rows):
+        """rows: (country_code, state_code, city_code, count, veg_count)"""
+        counts = {
+            (country, state, city): [int(count), int(veg_count or 0)]
+            for country, state, city, count, veg_count in rows
+        }
+        with self._lock:
+            self._counts = counts
+            self._tree = None
+            self._loaded_at = time.monotonic()
+
+    def apply(self, old: tuple | None, new: tuple | None):
+        """Move one restaurant between location keys (None = created / deleted)."""
+        if old == new:
+            return
+        with self._lock:
+            if old is not None:
+                self._bump(old, -1)
+            if new is not None:
+                self._bump(new, +1)
+            self._tree = None
+
+    def _bump(self, key: tuple, delta: int):
+        *location, veg = key
+        entry = self._counts.setdefault(tuple(location), [0, 0])
+        entry[0] += delta
+        if veg:
+            entry[1] += delta
+        if entry[0] <= 0:
+            del self._counts[tuple(location)]
+
+    def tree(self) -> list[dict]:
+        with self._lock:
+            if self._tree is None:
+                self._tree = self._build_tree()
+            return self._tree
+
+    def _build_tree(self) -> list[dict]:
+        countries: dict = {}
+        for (country, state, city), (count, veg_count) in sorted(
+            self._counts.items(), key=lambda item: tuple(v or "" for v in item[0])
+        ):
+            c = countries.setdefault(country, {
+                "code": country, "count": 0, "veg_count": 0, "states": {},
+            })
+            s = c["states"].setdefault(state, {
+                "code": state, "count": 0, "veg_count": 0, "cities": [],
+            })
+            s["cities"].append({"code": city, "count": count, "veg_count": veg_count})
+            for node in (c, s):
+                node["count"] += count
+                node["veg_count"] += veg_count
+
+        for c in countries.values():
+            c["states"] = list(c["states"].values())
+        return list(countries.values())
+
+
+location_directory = LocationDirectory()
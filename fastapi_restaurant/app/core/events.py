@@ -0,0 +1,29 @@
+"""
+Tiny in-process hook for "this restaurant's data changed".
+
+Write routes call `restaurant_changed(restaurant_id)` after committing;
+anything that caches or derives per-restaurant data (replica stickiness,
+published menus, ...) registers a listener with `on_restaurant_change`.
+"""
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_listeners: list[Callable[[int], None]] = []
+
+
+def on_restaurant_change(fn: Callable[[int], None]):
+    _listeners.append(fn)
+    return fn
+
+
+def restaurant_changed(restaurant_id: int | None):
+    if restaurant_id is None:
+        return
+    for fn in _listeners:
+        try:
+            fn(restaurant_id)
+        except Exception:
+            # a broken listener must never fail the write that triggered it
+            logger.exception("restaurant_changed listener %s failed", fn.__name__)
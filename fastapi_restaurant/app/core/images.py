@@ -0,0 +1,189 @@
+"""
+Resized product image variants.
+
+GET /api/v1/images/{image_id}?w=320&format=webp fetches the original from
+the storage backend, resizes it on a process pool and keeps the result in
+IMAGE_CACHE_DIR. Widths and formats come from an allow-list, so the number
+of variants per image is bounded.
+
+- An image row's bytes never change, so a variant is named after
+  (image_id, width, format) and a cache hit needs no DB query.
+- Concurrent requests for the same missing variant wait for one computation.
+- The cache is an LRU bounded by IMAGE_CACHE_MAX_BYTES. Each worker process
+  keeps its own index (rebuilt from the directory at first use), so the
+  on-disk total can exceed the bound by up to one budget per worker.
+- Uploads accept HEIC (phone cameras), which Pillow only decodes with a
+  plugin. Without one those originals have no variants: the route answers
+  415 and clients use the original URL.
+"""
+import io
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+VARIANT_VERSION = 1   # bump when resize settings change so ETags change too
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+QUALITY = 80
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+# accepted by the upload sniffer, decodable only if a plugin registered them
+_NEEDS_PLUGIN = {".heic", ".heif"} - set(Image.registered_extensions())
+
+
+class UnsupportedImage(Exception):
+    """The original can't be decoded here (no plugin for its format, or corrupt)."""
+
+
+def can_decode(url: str) -> bool:
+    """Cheap check by extension, before fetching the original."""
+    return os.path.splitext(url)[1].lower() not in _NEEDS_PLUGIN
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS or None)
+        return _pool
+
+
+def render_variant(data: bytes, width: int, fmt: str) -> bytes:
+    """Resize to `width` (never upscaling) and encode. Runs in a worker process."""
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()   # open() is lazy; truncated or corrupt data fails here
+    except OSError:   # includes UnidentifiedImageError
+        raise UnsupportedImage("original can't be decoded") from None
+    img = ImageOps.exif_transpose(img)
+    if img.width > width:
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    elif fmt == "webp" and img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, format="PNG", optimize=True)
+    else:
+        img.save(buf, format=fmt.upper(), quality=QUALITY)
+    return buf.getvalue()
+
+
+class VariantCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] | None = None   # name -> size, oldest first
+        self._total = 0
+        self._inflight: dict[str, Future] = {}
+
+    @staticmethod
+    def name(image_id: int, width: int, fmt: str) -> str:
+        return f"{image_id}-{width}-v{VARIANT_VERSION}.{fmt}"
+
+    @staticmethod
+    def path(name: str) -> str:
+        # shard by image id so one directory never gets huge
+        return os.path.join(settings.IMAGE_CACHE_DIR, f"{int(name.split('-')[0]) % 256:02x}", name)
+
+    def _load_index(self):
+        # caller holds the lock
+        found = []
+        if os.path.isdir(settings.IMAGE_CACHE_DIR):
+            for shard in os.scandir(settings.IMAGE_CACHE_DIR):
+                if shard.is_dir():
+                    for entry in os.scandir(shard.path):
+                        if not entry.name.endswith(".tmp"):
+                            st = entry.stat()
+                            found.append((st.st_atime, entry.name, st.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(found))
+        self._total = sum(self._entries.values())
+
+    def get_or_create(self, image_id: int, width: int, fmt: str, load_original) -> str:
+        """
+        Path of the cached variant. On a miss `load_original()` returns the
+        original bytes (or raises); one caller renders, the others wait.
+        """
+        name = self.name(image_id, width, fmt)
+        path = self.path(name)
+
+        with self._lock:
+            if self._entries is None:
+                self._load_index()
+            if name in self._entries:
+                if os.path.isfile(path):
+                    self._entries.move_to_end(name)
+                    return path
+                self._total -= self._entries.pop(name)   # removed by another worker
+
+            future = self._inflight.get(name)
+            owner = future is None
+            if owner:
+                future = self._inflight[name] = Future()
+
+        if not owner:
+            return future.result(timeout=settings.IMAGE_RENDER_TIMEOUT)
+
+        try:
+            if not os.path.isfile(path):   # another worker may have rendered it
+                data = load_original()
+                body = _get_pool().submit(render_variant, data, width, fmt).result(
+                    timeout=settings.IMAGE_RENDER_TIMEOUT
+                )
+                self._store(path, body)
+            self._add(name, os.path.getsize(path))
+            future.set_result(path)
+            return path
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+
+    @staticmethod
+    def _store(path: str, body: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    def _add(self, name: str, size: int):
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self._total > settings.IMAGE_CACHE_MAX_BYTES and len(self._entries) > 1:
+                old, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                try:
+                    os.remove(self.path(old))
+                except FileNotFoundError:
+                    pass
+
+    def invalidate(self, image_id: int):
+        """Drop every variant of an image (it was deleted)."""
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            for fmt in settings.IMAGE_VARIANT_FORMATS:
+                name = self.name(image_id, width, fmt)
+                with self._lock:
+                    if self._entries is not None and name in self._entries:
+                        self._total -= self._entries.pop(name)
+                try:
+                    os.remove(self.path(name))
+                except FileNotFoundError:
+                    pass
+
+
+image_variants = VariantCache()
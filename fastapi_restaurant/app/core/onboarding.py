@@ -0,0 +1,261 @@
+"""
+Bulk restaurant onboarding, e.g. a chain with a few hundred branches.
+
+    POST /api/v1/restaurants/bulk        file=restaurants.csv|.json, logos=<files>
+    python -m app.core.onboarding restaurants.csv --logos ./logos
+
+Each row has the RestaurantCreate fields plus an optional `logo`: the file
+name of an uploaded logo. Rows sharing a logo share one stored object.
+
+1. every row is validated; repeated emails within the file are rejected
+2. one query finds the emails that are already registered
+3. with the DB connection released, passwords are hashed on a process pool
+   while logos upload on a thread pool
+4. rows are inserted ONBOARDING_BATCH_SIZE at a time with multi-row INSERTs;
+   a batch that violates a constraint (typically an email registered
+   meanwhile) is retried row by row, and each failing row reports why
+
+Every row gets a result, created with its id or error with the reason.
+Logos that ended up unused are deleted again.
+"""
+import csv
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.s3 import delete_file_from_s3, upload_file_to_s3
+from app.core.security import hash_password
+from app.models.models import Restaurant
+from app.schemas.schemas import BulkRestaurantRow
+
+logger = logging.getLogger(__name__)
+
+LOGO_FOLDER = "restaurants/logos"
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.ONBOARDING_WORKERS or None)
+        return _pool
+
+
+def parse_rows(filename: str, data: bytes) -> list[dict]:
+    """Rows of a .json (list of objects) or CSV (header row) file."""
+    try:
+        if filename.lower().endswith(".json"):
+            rows = json.loads(data)
+            if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+                raise ValueError("expected a list of objects")
+        else:
+            reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+            # empty cells mean "not given", not ""
+            rows = [
+                {k.strip(): v.strip() for k, v in r.items() if k and v and v.strip()}
+                for r in reader
+            ]
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Could not read {filename}: {exc}")
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="No rows")
+    if len(rows) > settings.ONBOARDING_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ONBOARDING_MAX_ROWS} restaurants per import",
+        )
+    return rows
+
+
+def _error(index: int, email, detail: str) -> dict:
+    return {"row": index + 1, "email": email, "status": "error", "detail": detail}
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    err = exc.errors()[0]
+    field = ".".join(str(part) for part in err["loc"])
+    return f"{field}: {err['msg']}" if field else err["msg"]
+
+
+def _delete_quietly(url: str):
+    try:
+        delete_file_from_s3(url)
+    except Exception as exc:
+        logger.warning("Could not delete unused logo %s: %r", url, exc)
+
+
+def _integrity_detail(db, values: dict, exc: IntegrityError) -> str:
+    taken = db.query(Restaurant.id).filter(
+        func.lower(Restaurant.email) == values["email"].lower()
+    ).first()
+    if taken:
+        return "Email already registered"   # registered since the check
+    # anything else is a real problem with the row; say what the database said
+    return f"Rejected by the database: {str(exc.orig).splitlines()[0]}"
+
+
+def _insert(db, rows: list[tuple[int, dict]]) -> tuple[dict[int, int], dict[int, str]]:
+    """
+    Insert one batch; returns ({row index: restaurant id} for the rows stored,
+    {row index: reason} for the rows that weren't).
+    """
+    try:
+        stored = db.execute(
+            insert(Restaurant).returning(Restaurant.id, Restaurant.email),
+            [values for _, values in rows],
+        ).all()
+        db.commit()
+        ids = {email: rid for rid, email in stored}
+        return {index: ids[values["email"]] for index, values in rows}, {}
+    except IntegrityError:
+        # find the offending rows one by one
+        db.rollback()
+
+    created, errors = {}, {}
+    for index, values in rows:
+        try:
+            with db.begin_nested():
+                created[index] = db.execute(
+                    insert(Restaurant).returning(Restaurant.id), [values]
+                ).scalar_one()
+        except IntegrityError as exc:
+            errors[index] = _integrity_detail(db, values, exc)
+    db.commit()
+    return created, errors
+
+
+def onboard_restaurants(db, raw_rows: list[dict], logos: dict) -> list[dict]:
+    """
+    Create restaurants from parsed rows. `logos` maps file name -> upload
+    (anything with a `.file`, like UploadFile). Returns one
+    OnboardingRowResult-shaped dict per row, in file order.
+    """
+    results: list[dict | None] = [None] * len(raw_rows)
+
+    # 🔹 1. Validate (no DB, no network)
+    valid: list[tuple[int, BulkRestaurantRow]] = []
+    seen = set()
+    for index, raw in enumerate(raw_rows):
+        email = raw.get("email")
+        try:
+            row = BulkRestaurantRow.model_validate(raw)
+        except ValidationError as exc:
+            results[index] = _error(index, email, _validation_detail(exc))
+            continue
+        if row.email.lower() in seen:
+            results[index] = _error(index, row.email, "Duplicate email in file")
+        elif row.logo and row.logo not in logos:
+            results[index] = _error(index, row.email, f"Logo {row.logo} was not uploaded")
+        else:
+            seen.add(row.email.lower())
+            valid.append((index, row))
+
+    # 🔹 2. One query for every email (public URLs match emails case-insensitively)
+    taken = {
+        email.lower()
+        for (email,) in db.query(Restaurant.email).filter(func.lower(Restaurant.email).in_(seen))
+    } if seen else set()
+    for index, row in valid:
+        if row.email.lower() in taken:
+            results[index] = _error(index, row.email, "Email already registered")
+    valid = [(index, row) for index, row in valid if row.email.lower() not in taken]
+    db.close()   # nothing below needs the connection until the inserts
+
+    # 🔹 3. Hash passwords (processes) while logos upload (threads)
+    names = sorted({row.logo for _, row in valid if row.logo})
+    with ThreadPoolExecutor(max_workers=settings.ONBOARDING_UPLOAD_CONCURRENCY) as uploads:
+        pending_logos = {
+            name: uploads.submit(upload_file_to_s3, logos[name], LOGO_FOLDER) for name in names
+        }
+        hashes = list(_get_pool().map(
+            hash_password, [row.password for _, row in valid], chunksize=4
+        ))
+
+    logo_urls, logo_errors = {}, {}
+    for name, future in pending_logos.items():
+        try:
+            logo_urls[name] = future.result()
+        except HTTPException as exc:
+            logo_errors[name] = f"Logo {name}: {exc.detail}"
+        except Exception as exc:
+            logo_errors[name] = f"Logo {name} could not be stored: {exc!r}"
+
+    rows = []
+    for (index, row), hashed in zip(valid, hashes):
+        if row.logo in logo_errors:
+            results[index] = _error(index, row.email, logo_errors[row.logo])
+            continue
+        values = row.model_dump(exclude={"password", "logo"})
+        values["password_hash"] = hashed
+        if row.logo:
+            values["logo_url"] = logo_urls[row.logo]
+        rows.append((index, values))
+
+    # 🔹 4. Batched multi-row INSERTs, one short transaction each
+    used_logos = set()
+    for start in range(0, len(rows), settings.ONBOARDING_BATCH_SIZE):
+        batch = rows[start:start + settings.ONBOARDING_BATCH_SIZE]
+        created, errors = _insert(db, batch)
+        for index, values in batch:
+            if index in created:
+                results[index] = {
+                    "row": index + 1,
+                    "email": values["email"],
+                    "status": "created",
+                    "id": created[index],
+                }
+                used_logos.add(values.get("logo_url"))
+            else:
+                results[index] = _error(index, values["email"], errors[index])
+
+    for url in set(logo_urls.values()) - used_logos:
+        _delete_quietly(url)
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from types import SimpleNamespace
+
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Create restaurants from a CSV or JSON file")
+    parser.add_argument("path")
+    parser.add_argument("--logos", help="directory holding the files named in the logo column")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as f:
+        rows = parse_rows(args.path, f.read())
+
+    logos = {}
+    if args.logos:
+        for name in os.listdir(args.logos):
+            logos[name] = SimpleNamespace(file=open(os.path.join(args.logos, name), "rb"))
+
+    db = SessionLocal()
+    try:
+        report = onboard_restaurants(db, rows, logos)
+    finally:
+        db.close()
+        for logo in logos.values():
+            logo.file.close()
+
+    for result in report:
+        detail = result.get("id") if result["status"] == "created" else result.get("detail")
+        print(f"{result['row']:>5}  {result['status']:<8} {result.get('email') or '-':<40} {detail}")
+    created = sum(r["status"] == "created" for r in report)
+    print(f"✅ {created} created, {len(report) - created} failed")
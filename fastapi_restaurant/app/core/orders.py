@@ -0,0 +1,387 @@
+"""
+Table ordering: menu-snapshot validation, write-behind ingestion and a
+per-restaurant live feed.
+
+Flow of one order:
+
+1. `validate_order` prices it against a cached snapshot of the restaurant's
+   published menu (no per-item queries).
+2. `order_ingestor.submit` appends it to an in-process queue and returns.
+3. The ingest thread drains the queue every ORDER_FLUSH_INTERVAL seconds (or
+   ORDER_FLUSH_BATCH orders) and writes the batch with one multi-row INSERT
+   into `orders` and one into `order_items`, in one transaction.
+4. After commit the orders are pushed to dashboard subscribers
+   (`order_feed`), so the feed only ever shows stored orders.
+
+Durability: with ORDER_WRITE_BEHIND enabled an accepted order (202) lives
+only in this process's memory until its batch commits, i.e. for at most
+about ORDER_FLUSH_INTERVAL. A graceful shutdown flushes the queue; a crash
+or kill -9 inside that window loses those orders. A batch that fails to
+commit is retried ORDER_FLUSH_RETRIES times, then its orders are logged at
+ERROR as JSON lines prefixed `ORDER_LOST` so they can be replayed from the logs.
+Clients may send `client_order_id` and safely retry: (restaurant_id, uid) is
+unique, so a duplicate is dropped at insert time. A batch that violates any
+constraint is redone row by row: an item whose product or size was deleted
+since validation is stored without that reference (its name and price are
+snapshotted anyway), and an order that still can't be stored, e.g. for a
+restaurant deleted meanwhile, is dead-lettered as ORDER_LOST on its own
+instead of taking the batch down. All of it is counted in /metrics. With
+ORDER_WRITE_BEHIND disabled the same insert runs inline and the order is
+durable before the response (or the request fails).
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.events import on_restaurant_change
+from app.db.session import SessionLocal
+from app.models.models import Order, OrderItem, Product, ProductSize
+
+logger = logging.getLogger(__name__)
+
+
+# ============================
+# Menu snapshot
+# ============================
+
+class MenuSnapshotCache:
+    """restaurant_id -> {product_id: (name, {size_label: (size_id, price)})}"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: dict[int, tuple[float, dict]] = {}
+
+    def get(self, db, restaurant_id: int) -> dict:
+        with self._lock:
+            cached = self._snapshots.get(restaurant_id)
+        if cached and time.monotonic() - cached[0] < settings.RESPONSE_CACHE_TTL:
+            return cached[1]
+
+        from app.crud.crud import get_public_menu_body, get_restaurant
+
+        restaurant = get_restaurant(db, restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+
+        # price against what diners see: the published menu, not the draft
+        menu = json.loads(get_public_menu_body(db, restaurant))
+        snapshot = {
+            p["id"]: (p["name"], {s["size_label"]: (s["id"], s["price"]) for s in p["sizes"]})
+            for p in menu["products"]
+        }
+        with self._lock:
+            self._snapshots[restaurant_id] = (time.monotonic(), snapshot)
+        return snapshot
+
+    def invalidate(self, restaurant_id: int):
+        with self._lock:
+            self._snapshots.pop(restaurant_id, None)
+
+
+menu_snapshots = MenuSnapshotCache()
+
+
+@on_restaurant_change
+def _drop_menu_snapshot(restaurant_id: int):
+    menu_snapshots.invalidate(restaurant_id)
+
+
+def validate_order(db, restaurant_id: int, order_in) -> dict:
+    """Price an OrderCreate against the menu snapshot; returns the order as a plain dict."""
+    menu = menu_snapshots.get(db, restaurant_id)
+
+    items, total = [], Decimal("0")
+    for item in order_in.items:
+        entry = menu.get(item.product_id)
+        if entry is None:
+            raise HTTPException(status_code=400, detail=f"Product {item.product_id} is not available")
+        name, sizes = entry
+
+        label = item.size_label
+        if label is None and len(sizes) == 1:
+            label = next(iter(sizes))
+        if label not in sizes:
+            raise HTTPException(status_code=400, detail=f"Choose a valid size for {name}")
+
+        size_id, price = sizes[label]
+        price = Decimal(str(price))   # the menu JSON carries prices as numbers
+        items.append({
+            "product_id": item.product_id,
+            "size_id": size_id,
+            "product_name": name,
+            "size_label": label,
+            "unit_price": price,
+            "quantity": item.quantity,
+        })
+        total += price * item.quantity
+
+    return {
+        "uid": order_in.client_order_id or str(uuid.uuid4()),
+        "restaurant_id": restaurant_id,
+        "table_number": order_in.table_number,
+        "note": order_in.note,
+        "status": "new",
+        "total": total.quantize(Decimal("0.01")),
+        "date_created": datetime.utcnow(),
+        "items": items,
+    }
+
+
+# ============================
+# Live feed for dashboards
+# ============================
+
+class OrderFeed:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set] = {}   # restaurant_id -> {(loop, asyncio.Queue)}
+
+    def subscribe(self, restaurant_id: int) -> tuple:
+        sub = (asyncio.get_running_loop(), asyncio.Queue(maxsize=100))
+        with self._lock:
+            self._subscribers.setdefault(restaurant_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, restaurant_id: int, sub: tuple):
+        with self._lock:
+            self._subscribers.get(restaurant_id, set()).discard(sub)
+
+    def publish(self, order: dict):
+        with self._lock:
+            subs = list(self._subscribers.get(order["restaurant_id"], ()))
+        for loop, q in subs:
+            loop.call_soon_threadsafe(_offer, q, order)
+
+
+def _offer(q: asyncio.Queue, order: dict):
+    try:
+        q.put_nowait(order)
+    except asyncio.QueueFull:
+        pass   # slow consumer; it can re-list orders on reconnect
+
+
+order_feed = OrderFeed()
+
+
+# ============================
+# Write-behind ingestion
+# ============================
+
+def insert_orders(db, orders: list[dict]) -> list[dict]:
+    """Multi-row insert of orders + items in the caller's transaction; returns the stored ones."""
+    rows = db.execute(
+        insert(Order).returning(Order.id, Order.restaurant_id, Order.uid),
+        [{k: v for k, v in o.items() if k != "items"} for o in orders],
+    ).all()
+    ids = {(rid, uid): order_id for order_id, rid, uid in rows}
+
+    db.execute(
+        insert(OrderItem),
+        [
+            {**item, "order_id": ids[o["restaurant_id"], o["uid"]]}
+            for o in orders for item in o["items"]
+        ],
+    )
+    return orders
+
+
+order_stats: Counter = Counter()   # stored / duplicate / refs_dropped / dead_lettered
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        order_stats[name] += n
+
+
+def _already_stored(db, order: dict) -> bool:
+    return db.scalar(
+        select(Order.id).where(
+            Order.restaurant_id == order["restaurant_id"], Order.uid == order["uid"]
+        )
+    ) is not None
+
+
+def _drop_missing_refs(db, order: dict) -> bool:
+    """Null item references to products/sizes deleted since validation; True if any were."""
+    product_ids = {i["product_id"] for i in order["items"] if i["product_id"] is not None}
+    size_ids = {i["size_id"] for i in order["items"] if i["size_id"] is not None}
+    live_products = set(db.scalars(select(Product.id).where(Product.id.in_(product_ids))))
+    live_sizes = set(db.scalars(select(ProductSize.id).where(ProductSize.id.in_(size_ids))))
+
+    dropped = False
+    for item in order["items"]:
+        if item["product_id"] is not None and item["product_id"] not in live_products:
+            item["product_id"], dropped = None, True
+        if item["size_id"] is not None and item["size_id"] not in live_sizes:
+            item["size_id"], dropped = None, True
+    return dropped
+
+
+def _insert_one(db, order: dict) -> bool:
+    try:
+        with db.begin_nested():
+            insert_orders(db, [order])
+        return True
+    except IntegrityError:
+        return False
+
+
+def _store_one(db, order: dict) -> str:
+    """Insert one order in a savepoint: "stored", "duplicate" or "failed"."""
+    if _insert_one(db, order):
+        return "stored"
+    if _already_stored(db, order):
+        return "duplicate"   # a retried client_order_id (or repeated within the batch)
+    if _drop_missing_refs(db, order) and _insert_one(db, order):
+        _count("refs_dropped")
+        return "stored"
+    return "failed"
+
+
+def _store(orders: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Write orders; returns (stored, failed). Duplicates are in neither."""
+    db = SessionLocal()
+    try:
+        try:
+            stored = insert_orders(db, orders)
+            db.commit()
+            _count("stored", len(stored))
+            return stored, []
+        except IntegrityError as exc:
+            # sort the batch out row by row; only the offending orders are held back
+            db.rollback()
+            logger.warning("Order batch of %d hit a constraint, storing row by row: %r", len(orders), exc.orig)
+
+        results = {"stored": [], "duplicate": [], "failed": []}
+        for order in orders:
+            results[_store_one(db, order)].append(order)
+        db.commit()
+
+        _count("stored", len(results["stored"]))
+        _count("duplicate", len(results["duplicate"]))
+        return results["stored"], results["failed"]
+    finally:
+        db.close()
+
+
+def _dead_letter(orders: list[dict], reason: str):
+    _count("dead_lettered", len(orders))
+    for order in orders:
+        logger.error("Order %s for restaurant %s not stored: %s", order["uid"], order["restaurant_id"], reason)
+        logger.error("ORDER_LOST %s", json.dumps(order, default=str))
+
+
+def render_order_metrics() -> str:
+    """Prometheus text format, appended to the admission metrics."""
+    lines = [
+        "# HELP orders_queue_depth Accepted orders waiting to be written",
+        "# TYPE orders_queue_depth gauge",
+        f"orders_queue_depth {order_ingestor.depth()}",
+        "# HELP orders_ingested_total Orders by ingest outcome",
+        "# TYPE orders_ingested_total counter",
+    ]
+    with _stats_lock:
+        for outcome in ("stored", "duplicate", "refs_dropped", "dead_lettered"):
+            lines.append(f'orders_ingested_total{{outcome="{outcome}"}} {order_stats[outcome]}')
+    return "\n".join(lines) + "\n"
+
+
+class OrderIngestor:
+    _STOP = object()
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.ORDER_QUEUE_MAX)
+        self._thread: threading.Thread | None = None
+
+    def submit(self, order: dict):
+        if not settings.ORDER_WRITE_BEHIND or self._thread is None:
+            stored, failed = _store([order])
+            if failed:
+                _count("dead_lettered")
+                raise HTTPException(status_code=409, detail="Order could not be stored, please retry")
+            for o in stored:
+                order_feed.publish(o)
+            return
+        try:
+            self._queue.put_nowait(order)
+        except queue.Full:
+            raise HTTPException(status_code=503, detail="Too many orders, retry shortly",
+                                headers={"Retry-After": "1"})
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if settings.ORDER_WRITE_BEHIND and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="order-ingestor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Flush everything accepted so far and stop the thread (graceful shutdown)."""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            stopping = first is self._STOP
+            batch = [] if stopping else [first]
+
+            # keep collecting until the flush interval ends or the batch is full
+            deadline = time.monotonic() + settings.ORDER_FLUSH_INTERVAL
+            while len(batch) < settings.ORDER_FLUSH_BATCH:
+                remaining = deadline - time.monotonic()
+                try:
+                    if stopping or remaining <= 0:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    continue
+                batch.append(item)
+
+            if batch:
+                self._flush(batch)
+            if stopping and self._queue.empty():
+                return
+
+    def _flush(self, batch: list[dict]):
+        # constraint problems are settled per order inside _store; what's left
+        # here (database down, ...) is retried for the whole batch
+        for attempt in range(settings.ORDER_FLUSH_RETRIES + 1):
+            try:
+                stored, failed = _store(batch)
+                break
+            except Exception as exc:
+                logger.warning("Order flush failed (attempt %d): %r", attempt + 1, exc)
+                time.sleep(min(2 ** attempt * 0.1, 2.0))
+        else:
+            _dead_letter(batch, "flush retries exhausted")
+            return
+
+        if failed:
+            _dead_letter(failed, "rejected by the database")
+        for order in stored:
+            order_feed.publish(order)
+
+
+order_ingestor = OrderIngestor()
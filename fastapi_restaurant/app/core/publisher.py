@@ -0,0 +1,278 @@
+"""
+Static menu publishing.
+
+Each restaurant's public menu (its published version, or the live draft if it
+has never published) is written as JSON (and optionally a minimal HTML page)
+to the bucket or IMAGE_UPLOAD_DIR:
+
+    menus/{restaurant_id}/{version}.json   immutable, version = content hash
+    menus/{identifier}.json                latest copy, short cache, what QR scans hit
+    menus/{identifier}.html                optional (MENU_PUBLISH_HTML)
+
+Incremental mode: write routes fire `restaurant_changed`, which queues the
+restaurant for a background thread that re-publishes it.
+Full rebuild:     python -m app.core.publisher --workers 8
+"""
+import hashlib
+import html
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.events import on_restaurant_change
+from app.db.session import SessionLocal
+from app.schemas.schemas import PublicRestaurantView
+
+logger = logging.getLogger(__name__)
+
+LATEST_CACHE_CONTROL = "public, max-age=60"
+VERSION_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def identifier_for(restaurant) -> str:
+    return restaurant.email.split("@")[0].lower()
+
+
+def render_menu(restaurant, products) -> tuple[str, bytes]:
+    """Return (version, json bytes) for a restaurant's public menu."""
+    view = PublicRestaurantView.model_validate(
+        {"restaurant": restaurant, "products": products}, from_attributes=True
+    )
+    body = view.model_dump_json().encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:16], body
+
+
+def render_menu_html(menu: dict) -> bytes:
+    """Minimal HTML page from a serialized PublicRestaurantView."""
+    name = html.escape(menu["restaurant"]["name"])
+    rows = []
+    for p in menu["products"]:
+        prices = ", ".join(
+            f"{html.escape(s['size_label'])} {s['price']:g}" for s in p["sizes"]
+        )
+        rows.append(
+            f"<li><strong>{html.escape(p['name'])}</strong>"
+            f"{' 🟢' if p['veg'] else ''}<br><small>{prices}</small></li>"
+        )
+    page = (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        "<meta name='viewport' content='width=device-width,initial-scale=1'>"
+        f"<title>{name}</title></head>"
+        f"<body><h1>{name}</h1><ul>{''.join(rows)}</ul></body></html>"
+    )
+    return page.encode("utf-8")
+
+
+# ============================
+# Storage targets
+# ============================
+
+def _local_path(key: str) -> str:
+    return os.path.join(settings.IMAGE_UPLOAD_DIR, key)
+
+
+def _write(key: str, body: bytes, content_type: str, cache_control: str):
+    if settings.MENU_PUBLISH_TARGET == "s3":
+        from app.core.s3 import put_bytes_to_s3
+        put_bytes_to_s3(key, body, content_type, cache_control)
+        return
+
+    path = _local_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)   # atomic: readers never see a half-written menu
+
+
+def _remove(key: str):
+    if settings.MENU_PUBLISH_TARGET == "s3":
+        from app.core.s3 import delete_file_from_s3, s3_url
+        delete_file_from_s3(s3_url(key))
+        return
+    try:
+        os.remove(_local_path(key))
+    except FileNotFoundError:
+        pass
+
+
+def latest_key(identifier: str, ext: str = "json") -> str:
+    return f"menus/{identifier}.{ext}"
+
+
+def local_menu_path(identifier: str) -> str:
+    return _local_path(latest_key(identifier))
+
+
+def public_menu_url(identifier: str) -> str:
+    key = latest_key(identifier)
+    if settings.MENU_PUBLIC_BASE_URL:
+        return f"{settings.MENU_PUBLIC_BASE_URL.rstrip('/')}/{key}"
+    from app.core.s3 import s3_url
+    return s3_url(key)
+
+
+# ============================
+# Publisher
+# ============================
+
+class MenuPublisher:
+    def __init__(self):
+        self._queue: queue.Queue[int] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._identifiers: dict[int, str] = {}   # restaurant_id -> last published identifier
+        self._redirectable: dict[str, tuple[float, int, bool]] = {}   # identifier -> (checked_at, id, ok)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.MENU_PUBLISH_TARGET in ("local", "s3")
+
+    def publish(self, db, restaurant_id: int) -> str | None:
+        """Render and write one restaurant's menu. Returns the version, or None if removed."""
+        from app.crud.crud import get_public_menu_body, get_restaurant
+
+        restaurant = get_restaurant(db, restaurant_id)
+        with self._lock:
+            previous = self._identifiers.get(restaurant_id)
+
+        if not restaurant:
+            if previous:
+                self.unpublish(previous)
+            return None
+
+        identifier = identifier_for(restaurant)
+        body = get_public_menu_body(db, restaurant)
+        version = hashlib.sha256(body).hexdigest()[:16]
+
+        _write(f"menus/{restaurant.id}/{version}.json", body, "application/json", VERSION_CACHE_CONTROL)
+        _write(latest_key(identifier), body, "application/json", LATEST_CACHE_CONTROL)
+        if settings.MENU_PUBLISH_HTML:
+            _write(
+                latest_key(identifier, "html"),
+                render_menu_html(json.loads(body)),
+                "text/html; charset=utf-8",
+                LATEST_CACHE_CONTROL,
+            )
+
+        if previous and previous != identifier:
+            self.unpublish(previous)
+        with self._lock:
+            self._identifiers[restaurant_id] = identifier
+        return version
+
+    def unpublish(self, identifier: str):
+        """Drop the latest copy (versioned files are left for CDN caches to expire)."""
+        if not self.enabled:
+            return
+        _remove(latest_key(identifier))
+        if settings.MENU_PUBLISH_HTML:
+            _remove(latest_key(identifier, "html"))
+
+    def has_published_menu(self, db, identifier: str) -> bool:
+        """
+        Whether the public route may redirect to menus/{identifier}.json: only
+        for restaurants with a published version, so unknown identifiers and
+        restaurants that never published (whose object may not exist yet) go
+        through the DB path. Answers for existing restaurants are kept for
+        RESPONSE_CACHE_TTL and dropped when the restaurant changes.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._redirectable.get(identifier)
+        if cached and now - cached[0] < settings.RESPONSE_CACHE_TTL:
+            return cached[2]
+
+        from app.crud.crud import get_restaurant_by_identifier
+
+        restaurant = get_restaurant_by_identifier(db, identifier)
+        if not restaurant:
+            return False
+        published = restaurant.published_version is not None
+        with self._lock:
+            self._redirectable[identifier] = (now, restaurant.id, published)
+        return published
+
+    def forget(self, restaurant_id: int):
+        with self._lock:
+            for identifier in [i for i, (_, rid, _) in self._redirectable.items() if rid == restaurant_id]:
+                del self._redirectable[identifier]
+
+    # ---------- incremental mode ----------
+
+    def enqueue(self, restaurant_id: int):
+        if self.enabled:
+            self._queue.put(restaurant_id)
+
+    def start(self):
+        if not self.enabled or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="menu-publisher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            pending = {self._queue.get()}
+            # coalesce bursts of edits to the same restaurant into one publish
+            while not self._queue.empty():
+                pending.add(self._queue.get_nowait())
+
+            db = SessionLocal()
+            try:
+                for restaurant_id in pending:
+                    try:
+                        self.publish(db, restaurant_id)
+                    except Exception as exc:
+                        db.rollback()
+                        logger.error("Menu publish failed for restaurant %s: %r", restaurant_id, exc)
+            finally:
+                db.close()
+
+    # ---------- full rebuild ----------
+
+    def publish_all(self, workers: int = 8) -> int:
+        from app.models.models import Restaurant
+
+        db = SessionLocal()
+        try:
+            ids = [rid for (rid,) in db.query(Restaurant.id).filter(Restaurant.deleted_at.is_(None))]
+        finally:
+            db.close()
+
+        def _one(restaurant_id: int):
+            session = SessionLocal()
+            try:
+                return self.publish(session, restaurant_id)
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            published = [v for v in pool.map(_one, ids) if v]
+        return len(published)
+
+
+menu_publisher = MenuPublisher()
+
+
+@on_restaurant_change
+def _publish_on_change(restaurant_id: int):
+    menu_publisher.forget(restaurant_id)
+    menu_publisher.enqueue(restaurant_id)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish every restaurant's static menu")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    if not menu_publisher.enabled:
+        raise SystemExit("Set MENU_PUBLISH_TARGET to 'local' or 's3' first")
+    count = menu_publisher.publish_all(args.workers)
+    print(f"✅ Published {count} menus to {settings.MENU_PUBLISH_TARGET}")
@@ -0,0 +1,234 @@
+"""
+Background purge of deleted restaurants.
+
+DELETE /restaurants/{id} only stamps `deleted_at` (every read filters it out)
+and records a RestaurantPurge row. This worker then removes the restaurant's
+data in batches of PURGE_BATCH_SIZE, one short transaction per batch:
+
+1. products with their sizes, images (releasing shared blobs, deleting S3
+   objects that lose their last reference) and category links
+2. orders with their items
+3. menu versions, analytics rows, tombstones, user links, the logo and
+   finally the restaurant row itself
+
+Progress counters are committed with each batch, so GET .../purge can show
+them and a purge interrupted by a restart simply resumes at startup. A purge
+that fails is retried with exponential backoff (PURGE_RETRY_SECONDS, capped
+at PURGE_RETRY_MAX_SECONDS), and failed purges are picked up again at
+startup too: the restaurant is already hidden and can't be deleted twice.
+"""
+import logging
+import queue
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+
+from app.core.config import settings
+from app.core.images import image_variants
+from app.crud.crud import delete_released_objects
+from app.db.session import SessionLocal
+from app.models.models import (
+    ImageBlob,
+    MenuDailyStat,
+    MenuVersion,
+    Order,
+    OrderItem,
+    Product,
+    ProductImage,
+    ProductSize,
+    Restaurant,
+    RestaurantPurge,
+    Tombstone,
+    User,
+    product_category,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _purge_product_batch(db, restaurant_id: int) -> tuple[int, int, list[str]]:
+    """
+    Delete up to one batch of products; returns (products, images) removed and
+    the URLs of objects to delete once the batch has committed.
+    """
+    ids = list(db.scalars(
+        select(Product.id)
+        .where(Product.restaurant_id == restaurant_id)
+        .limit(settings.PURGE_BATCH_SIZE)
+    ))
+    if not ids:
+        return 0, 0, []
+
+    images = db.execute(
+        select(ProductImage.id, ProductImage.blob_id, ProductImage.image_url)
+        .where(ProductImage.product_id.in_(ids))
+    ).all()
+
+    # one decrement per shared blob instead of one per image
+    refs = Counter(blob_id for _, blob_id, _ in images if blob_id is not None)
+    for blob_id, count in refs.items():
+        db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.id == blob_id)
+            .values(ref_count=ImageBlob.ref_count - count)
+        )
+    orphans = db.execute(
+        select(ImageBlob.id, ImageBlob.url)
+        .where(ImageBlob.id.in_(list(refs)), ImageBlob.ref_count <= 0)
+    ).all()
+
+    db.execute(delete(ProductImage).where(ProductImage.product_id.in_(ids)))
+    if orphans:
+        db.execute(delete(ImageBlob).where(ImageBlob.id.in_([blob_id for blob_id, _ in orphans])))
+    db.execute(delete(ProductSize).where(ProductSize.product_id.in_(ids)))
+    db.execute(delete(product_category).where(product_category.c.product_id.in_(ids)))
+    db.execute(
+        update(OrderItem)
+        .where(OrderItem.product_id.in_(ids))
+        .values(product_id=None, size_id=None)
+    )
+    db.execute(delete(Product).where(Product.id.in_(ids)))
+
+    urls = [url for _, url in orphans]
+    for image_id, blob_id, url in images:
+        if blob_id is None:
+            urls.append(url)   # legacy image with its own object
+        image_variants.invalidate(image_id)
+
+    return len(ids), len(images), urls
+
+
+def _purge_order_batch(db, restaurant_id: int) -> int:
+    ids = list(db.scalars(
+        select(Order.id)
+        .where(Order.restaurant_id == restaurant_id)
+        .limit(settings.PURGE_BATCH_SIZE)
+    ))
+    if ids:
+        db.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+        db.execute(delete(Order).where(Order.id.in_(ids)))
+    return len(ids)
+
+
+def _progress(db, restaurant_id: int, **counts):
+    db.execute(
+        update(RestaurantPurge)
+        .where(RestaurantPurge.restaurant_id == restaurant_id)
+        .values({
+            getattr(RestaurantPurge, name): getattr(RestaurantPurge, name) + count
+            for name, count in counts.items()
+        })
+    )
+
+
+def purge_restaurant(restaurant_id: int) -> bool:
+    """Run (or resume) one purge; False when it failed and should be retried."""
+    db = SessionLocal()
+    try:
+        purge = db.get(RestaurantPurge, restaurant_id)
+        if purge is None or purge.status == "done":
+            return True
+        purge.status = "running"
+        purge.error = None
+        db.commit()
+
+        while True:
+            products, images, urls = _purge_product_batch(db, restaurant_id)
+            if not products:
+                break
+            _progress(db, restaurant_id, products_deleted=products, images_deleted=images)
+            db.commit()
+            # as in delete_product_image: objects go only once the rows are gone,
+            # skipping any the same content was uploaded to again meanwhile;
+            # the session's connection is released before the S3 calls
+            delete_released_objects(db, urls)
+
+        while True:
+            orders = _purge_order_batch(db, restaurant_id)
+            if not orders:
+                break
+            _progress(db, restaurant_id, orders_deleted=orders)
+            db.commit()
+
+        logo_url = db.scalar(select(Restaurant.logo_url).where(Restaurant.id == restaurant_id))
+        db.execute(delete(MenuVersion).where(MenuVersion.restaurant_id == restaurant_id))
+        db.execute(delete(MenuDailyStat).where(MenuDailyStat.restaurant_id == restaurant_id))
+        db.execute(delete(Tombstone).where(Tombstone.restaurant_id == restaurant_id))
+        db.execute(update(User).where(User.restaurant_id == restaurant_id).values(restaurant_id=None))
+        db.execute(delete(Restaurant).where(Restaurant.id == restaurant_id))
+        purge = db.get(RestaurantPurge, restaurant_id)
+        purge.status = "done"
+        purge.finished_at = datetime.utcnow()
+        products_deleted = purge.products_deleted
+        db.commit()
+
+        delete_released_objects(db, [logo_url])
+        logger.info("Purged restaurant %s (%s products)", restaurant_id, products_deleted)
+        return True
+    except Exception as exc:
+        db.rollback()
+        db.execute(
+            update(RestaurantPurge)
+            .where(RestaurantPurge.restaurant_id == restaurant_id)
+            .values(status="failed", error=repr(exc)[:500])
+        )
+        db.commit()
+        logger.exception("Purge of restaurant %s failed", restaurant_id)
+        return False
+    finally:
+        db.close()
+
+
+class RestaurantPurger:
+    def __init__(self):
+        self._queue: queue.Queue[int] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._failures: dict[int, int] = {}   # restaurant_id -> failed attempts in a row
+
+    def enqueue(self, restaurant_id: int):
+        if self._thread is None:
+            purge_restaurant(restaurant_id)   # worker not started (scripts, tests)
+            return
+        self._queue.put(restaurant_id)
+
+    def start(self):
+        """Start the worker and resume purges left unfinished (or failed) before a restart."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="restaurant-purger", daemon=True)
+        self._thread.start()
+
+        db = SessionLocal()
+        try:
+            pending = db.scalars(
+                select(RestaurantPurge.restaurant_id)
+                .where(RestaurantPurge.status.in_(("pending", "running", "failed")))
+            ).all()
+        finally:
+            db.close()
+        for restaurant_id in pending:
+            self._queue.put(restaurant_id)
+
+    def _run(self):
+        while True:
+            restaurant_id = self._queue.get()
+            if purge_restaurant(restaurant_id):
+                self._failures.pop(restaurant_id, None)
+            else:
+                self._retry_later(restaurant_id)
+
+    def _retry_later(self, restaurant_id: int):
+        attempts = self._failures[restaurant_id] = self._failures.get(restaurant_id, 0) + 1
+        delay = min(
+            settings.PURGE_RETRY_SECONDS * 2 ** (attempts - 1),
+            settings.PURGE_RETRY_MAX_SECONDS,
+        )
+        logger.warning("Retrying purge of restaurant %s in %.0f s (attempt %d)", restaurant_id, delay, attempts + 1)
+        timer = threading.Timer(delay, self._queue.put, args=(restaurant_id,))
+        timer.daemon = True
+        timer.start()
+
+
+restaurant_purger = RestaurantPurger()
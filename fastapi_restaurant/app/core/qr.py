@@ -0,0 +1,161 @@
+"""
+QR code generation for restaurant public menu URLs.
+
+Every rendered file is content addressed (sha256 of format + layout + payload)
+and cached under QR_CACHE_DIR, so a code or sheet is only ever drawn once.
+Printable sheets render one A4 page per task on a process pool and are
+assembled into a PDF with Pillow.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+import qrcode.image.svg
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import settings
+
+BOX_SIZE = 10
+BORDER = 4
+
+# A4 @ 150 dpi, 3 x 4 codes per page
+PAGE_SIZE = (1240, 1754)
+GRID = (3, 4)
+MARGIN = 60
+LABEL_HEIGHT = 50
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def public_menu_link(restaurant, table: int | None = None) -> str:
+    # same identifier as the published menu files (lowercase), so scans hit them
+    from app.core.publisher import identifier_for   # lazy: workers never need the DB layer
+
+    identifier = identifier_for(restaurant)
+    url = (
+        f"{settings.PUBLIC_SITE_URL.rstrip('/')}/"
+        f"{restaurant.country_code}/{restaurant.state_code}/{restaurant.city_code}/{identifier}"
+    )
+    return f"{url}?table={table}" if table is not None else url
+
+
+def _content_key(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str, ext: str) -> str:
+    # shard by the first two hex chars to keep directories small
+    return os.path.join(settings.QR_CACHE_DIR, key[:2], f"{key}.{ext}")
+
+
+def _store(path: str, body: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def _make_qr(data: str) -> qrcode.QRCode:
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=BOX_SIZE,
+        border=BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(data: str) -> bytes:
+    buf = io.BytesIO()
+    _make_qr(data).make_image(fill_color="black", back_color="white").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_svg(data: str) -> bytes:
+    buf = io.BytesIO()
+    _make_qr(data).make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buf)
+    return buf.getvalue()
+
+
+def qr_file(data: str, fmt: str) -> tuple[str, str]:
+    """Return (path, etag) of the cached QR code for `data`, rendering it if needed."""
+    key = _content_key("qr", fmt, BOX_SIZE, BORDER, data)
+    path = _cache_path(key, fmt)
+    if not os.path.isfile(path):
+        _store(path, render_png(data) if fmt == "png" else render_svg(data))
+    return path, key
+
+
+# ============================
+# Printable sheets
+# ============================
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.QR_WORKERS or None)
+        return _pool
+
+
+def _matrix_image(data: str) -> Image.Image:
+    # one pixel per module straight from the matrix; much cheaper than make_image()
+    matrix = _make_qr(data).get_matrix()
+    pixels = bytes(0 if cell else 255 for row in matrix for cell in row)
+    return Image.frombytes("L", (len(matrix), len(matrix)), pixels)
+
+
+def _render_page(job: tuple[str, list[tuple[str, str]]]) -> bytes:
+    """
+    Draw one bilevel A4 page of (label, link) codes. Runs in a worker process
+    and returns raw mode "1" pixels, which are cheap to ship back.
+    """
+    title, cells = job
+    cols, rows = GRID
+    cell_w = (PAGE_SIZE[0] - 2 * MARGIN) // cols
+    cell_h = (PAGE_SIZE[1] - 2 * MARGIN - LABEL_HEIGHT) // rows
+    code_size = min(cell_w, cell_h - LABEL_HEIGHT) - 20
+    font = ImageFont.load_default(size=28)
+
+    page = Image.new("1", PAGE_SIZE, 1)
+    draw = ImageDraw.Draw(page)
+    draw.text((MARGIN, MARGIN // 2), title, fill=0, font=font)
+
+    for i, (label, link) in enumerate(cells):
+        col, row = i % cols, i // cols
+        x = MARGIN + col * cell_w + (cell_w - code_size) // 2
+        y = MARGIN + LABEL_HEIGHT + row * cell_h
+        page.paste(_matrix_image(link).resize((code_size, code_size), Image.NEAREST), (x, y))
+        text_w = draw.textlength(label, font=font)
+        draw.text((x + (code_size - text_w) / 2, y + code_size + 5), label, fill=0, font=font)
+
+    return page.tobytes()
+
+
+def qr_sheet_file(restaurant, tables: list[int]) -> tuple[str, str]:
+    """Return (path, etag) of a cached multi-page PDF with one QR code per table."""
+    links = [public_menu_link(restaurant, t) for t in tables]
+    key = _content_key("sheet", BOX_SIZE, BORDER, GRID, restaurant.name, *links)
+    path = _cache_path(key, "pdf")
+    if os.path.isfile(path):
+        return path, key
+
+    per_page = GRID[0] * GRID[1]
+    cells = [(f"Table {t}", link) for t, link in zip(tables, links)]
+    jobs = [(restaurant.name, cells[i:i + per_page]) for i in range(0, len(cells), per_page)]
+
+    pages = [
+        Image.frombytes("1", PAGE_SIZE, raw)
+        for raw in _get_pool().map(_render_page, jobs)
+    ]
+    buf = io.BytesIO()
+    pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+
+    _store(path, buf.getvalue())
+    return path, key
@@ -1,8 +1,16 @@
+import base64
+import hashlib
+import logging
 import uuid
+from typing import NamedTuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import boto3
+from fastapi import HTTPException
 from botocore.config import Config
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
 s3 = boto3.client(
     "s3",
@@ -13,28 +21,257 @@ s3 = boto3.client(
 )
 
 
-def upload_file_to_s3(file, folder: str) -> str:
-    ext = file.filename.split(".")[-1]
-    key = f"{folder}/{uuid.uuid4()}.{ext}"
-
-    s3.upload_fileobj(
-        file.file,
-        settings.AWS_S3_BUCKET,
-        key,
-        ExtraArgs={"ContentType": file.content_type},
+def s3_url(key: str) -> str:
+    return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
+
+
+def put_bytes_to_s3(key: str, body: bytes, content_type: str, cache_control: str | None = None) -> str:
+    extra = {"CacheControl": cache_control} if cache_control else {}
+    s3.put_object(
+        Bucket=settings.AWS_S3_BUCKET,
+        Key=key,
+        Body=body,
+        ContentType=content_type,
+        **extra,
     )
+    return s3_url(key)
 
-    return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
 
+# ============================
+# Streaming uploads
+# ============================
 
-def delete_file_from_s3(image_url: str):
+CHUNK_SIZE = 64 * 1024
+
+# (magic prefix, offset, content type, extension)
+MAGIC_TYPES = [
+    (b"\xff\xd8\xff", 0, "image/jpeg", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png", "png"),
+    (b"GIF87a", 0, "image/gif", "gif"),
+    (b"GIF89a", 0, "image/gif", "gif"),
+    (b"WEBP", 8, "image/webp", "webp"),
+    (b"ftypavif", 4, "image/avif", "avif"),
+    (b"ftypheic", 4, "image/heic", "heic"),
+]
+
+
+def sniff_content_type(head: bytes) -> tuple[str, str]:
+    """Content type and extension from the file's magic bytes, never from its name."""
+    for magic, offset, content_type, ext in MAGIC_TYPES:
+        if head[offset:offset + len(magic)] == magic:
+            if content_type == "image/webp" and not head.startswith(b"RIFF"):
+                continue
+            return content_type, ext
+    raise HTTPException(status_code=415, detail="Unsupported image type")
+
+
+def _read_chunks(fileobj, limit: int):
+    """Yield chunks from `fileobj`, failing as soon as more than `limit` bytes are seen."""
+    total = 0
+    while True:
+        chunk = fileobj.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > limit:
+            raise HTTPException(status_code=413, detail=f"File too large (max {limit} bytes)")
+        yield chunk
+
+
+def _b64_sha256(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def _put_single(key: str, body: bytes, content_type: str):
+    s3.put_object(
+        Bucket=settings.AWS_S3_BUCKET,
+        Key=key,
+        Body=body,
+        ContentType=content_type,
+        ChecksumSHA256=_b64_sha256(body),   # S3 verifies the bytes it stored
+    )
+
+
+class MultipartWriter:
     """
-    Extracts S3 key from full URL and deletes object
+    A multipart upload fed chunk by chunk: parts of S3_MULTIPART_PART_SIZE go
+    out concurrently as they fill, at most S3_MULTIPART_CONCURRENCY in memory
+    / in flight. `complete()` finishes the object, `abort()` drops it.
     """
-    base = f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/"
-    key = image_url.replace(base, "")
 
-    s3.delete_object(
+    def __init__(self, key: str, content_type: str):
+        self.key = key
+        self.upload_id = s3.create_multipart_upload(
+            Bucket=settings.AWS_S3_BUCKET,
+            Key=key,
+            ContentType=content_type,
+            ChecksumAlgorithm="SHA256",
+        )["UploadId"]
+        self._pool = ThreadPoolExecutor(max_workers=settings.S3_MULTIPART_CONCURRENCY)
+        self._futures = []
+        self._buf = bytearray()
+
+    def _upload_part(self, number: int, data: bytes) -> dict:
+        checksum = _b64_sha256(data)
+        res = s3.upload_part(
+            Bucket=settings.AWS_S3_BUCKET,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=data,
+            ChecksumAlgorithm="SHA256",
+            ChecksumSHA256=checksum,
+        )
+        return {"PartNumber": number, "ETag": res["ETag"], "ChecksumSHA256": checksum}
+
+    def _send(self, data: bytes):
+        running = [f for f in self._futures if not f.done()]
+        if len(running) >= settings.S3_MULTIPART_CONCURRENCY:
+            wait(running, return_when=FIRST_COMPLETED)
+        self._futures.append(self._pool.submit(self._upload_part, len(self._futures) + 1, data))
+
+    def write(self, chunk: bytes):
+        part_size = settings.S3_MULTIPART_PART_SIZE
+        self._buf += chunk
+        while len(self._buf) >= part_size:
+            self._send(bytes(self._buf[:part_size]))
+            del self._buf[:part_size]
+
+    def complete(self):
+        try:
+            if self._buf or not self._futures:
+                self._send(bytes(self._buf))   # last part may be short
+                self._buf.clear()
+            parts = [f.result() for f in self._futures]
+            s3.complete_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        finally:
+            self._pool.shutdown(wait=False)
+
+    def abort(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        s3.abort_multipart_upload(Bucket=settings.AWS_S3_BUCKET, Key=self.key, UploadId=self.upload_id)
+
+
+def _put_multipart(key: str, first: bytes, chunks, content_type: str):
+    """Upload parts of S3_MULTIPART_PART_SIZE concurrently as they are read."""
+    writer = MultipartWriter(key, content_type)
+    try:
+        writer.write(first)
+        for chunk in chunks:
+            writer.write(chunk)
+        writer.complete()
+    except Exception:
+        writer.abort()
+        raise
+
+
+# 🔹 Uploads big enough to be sent while the request is still arriving
+# (app.core.uploads) land here first: their final key depends on a hash that
+# isn't known yet. Give the prefix a short expiry lifecycle rule in the bucket
+# so a worker killed mid-request can't leave objects behind.
+STAGING_PREFIX = "uploads/staging/"
+
+
+def staging_key() -> str:
+    return f"{STAGING_PREFIX}{uuid.uuid4().hex}"
+
+
+def copy_staged(staged_key: str, key: str, content_type: str):
+    """Server-side copy of a completed staged upload to its final key (< 5 GB)."""
+    s3.copy_object(
         Bucket=settings.AWS_S3_BUCKET,
-        Key=key
+        Key=key,
+        CopySource={"Bucket": settings.AWS_S3_BUCKET, "Key": staged_key},
+        ContentType=content_type,
+        MetadataDirective="REPLACE",
+        ChecksumAlgorithm="SHA256",
     )
+
+
+class UploadInfo(NamedTuple):
+    sha256: str
+    size: int
+    content_type: str
+    ext: str
+
+
+def inspect_upload(file) -> UploadInfo:
+    """
+    Sniff the type from the first chunk, enforce UPLOAD_MAX_BYTES and hash
+    the content. Files received by app.core.uploads were already hashed as
+    they arrived and are not read again; anything else (the onboarding CLI's
+    open files) gets one streaming pass here. No network I/O.
+    """
+    fileobj = file.file
+    if isinstance(getattr(fileobj, "sha256", None), str):
+        # hashed and size-checked while the body streamed in (app.core.uploads)
+        if not fileobj.size:
+            raise HTTPException(status_code=400, detail="Empty file")
+        content_type, ext = sniff_content_type(fileobj.head)
+        return UploadInfo(fileobj.sha256, fileobj.size, content_type, ext)
+
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    content_type = ext = None
+
+    for chunk in _read_chunks(fileobj, settings.UPLOAD_MAX_BYTES):
+        if content_type is None:
+            content_type, ext = sniff_content_type(chunk[:32])
+        digest.update(chunk)
+        size += len(chunk)
+
+    if not size:
+        raise HTTPException(status_code=400, detail="Empty file")
+
+    fileobj.seek(0)
+    return UploadInfo(digest.hexdigest(), size, content_type, ext)
+
+
+def put_upload(file, key: str, info: UploadInfo) -> str:
+    """Store an inspected upload under `key` on the configured backend (app.core.storage)."""
+    from app.core.storage import storage
+    return storage.put_file(file.file, key, info)
+
+
+def storage_url(key: str) -> str:
+    """Public URL of `key` on the configured backend."""
+    from app.core.storage import storage
+    return storage.url(key)
+
+
+def stream_upload_to_s3(file, folder: str) -> tuple[str, str]:
+    """Upload under a random (sharded) key in `folder`; returns (url, sha256 hex)."""
+    info = inspect_upload(file)
+    name = uuid.uuid4().hex
+    url = put_upload(file, f"{folder}/{name[:2]}/{name}.{info.ext}", info)
+    return url, info.sha256
+
+
+def content_key(info: UploadInfo) -> str:
+    # content addressed: identical bytes always map to the same object
+    return f"images/{info.sha256[:2]}/{info.sha256}.{info.ext}"
+
+
+def upload_file_to_s3(file, folder: str) -> str:
+    url, _ = stream_upload_to_s3(file, folder)
+    return url
+
+
+def delete_file_from_s3(image_url: str):
+    """
+    Deletes the object behind a stored URL, on whichever backend holds it
+    """
+    from app.core.storage import backend_for_url
+
+    found = backend_for_url(image_url)
+    if found is None:
+        logger.warning("Not a storage URL, nothing deleted: %s", image_url)
+        return
+    backend, key = found
+    backend.delete(key)
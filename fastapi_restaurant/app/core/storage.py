@@ -0,0 +1,171 @@
+"""
+Pluggable object storage for uploaded files.
+
+`upload_file_to_s3`, `put_upload` and `delete_file_from_s3` in app.core.s3
+store through `storage`, picked by STORAGE_BACKEND:
+
+    s3     the bucket (default)
+    local  files under LOCAL_STORAGE_DIR, served by GET /api/v1/files/{key}
+
+Keys are already sharded (`images/ab/<sha>.png`, `restaurants/logos/cd/<uuid>.png`),
+so the local backend maps a key straight to a path. Objects are written once
+and never modified, which is what lets the serving route hand out strong
+ETags and year-long immutable caching. LOCAL_STORAGE_DIR holds nothing else:
+published menus, QR codes and other mutable files live under IMAGE_UPLOAD_DIR
+and are never reachable through that route.
+
+Deletes go to whichever backend a URL belongs to, so rows written before a
+switch of backend keep working.
+"""
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+
+from app.core import s3 as s3_client
+from app.core.config import settings
+
+
+class InvalidKey(ValueError):
+    """A key that would resolve outside the backend's root."""
+
+
+class Storage(ABC):
+    """Interface every backend implements."""
+
+    name: str
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def key_for(self, url: str) -> str | None:
+        """The key behind a public URL, or None if the URL isn't ours."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put_file(self, fileobj, key: str, info) -> str:
+        """Store an inspected upload (see s3.inspect_upload); returns its URL."""
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+
+class S3Storage(Storage):
+    name = "s3"
+
+    def url(self, key: str) -> str:
+        return s3_client.s3_url(key)
+
+    def key_for(self, url: str) -> str | None:
+        prefix = s3_client.s3_url("")
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    def exists(self, key: str) -> bool:
+        try:
+            s3_client.s3.head_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
+            return True
+        except Exception:
+            return False
+
+    def put_file(self, fileobj, key: str, info) -> str:
+        staged = getattr(fileobj, "staged_key", None)
+        if staged:
+            # already in the bucket: its parts went up while the request arrived
+            s3_client.copy_staged(staged, key, info.content_type)
+            return self.url(key)
+
+        # single PUT when small, parallel multipart when large
+        fileobj.seek(0)
+        if info.size <= settings.S3_MULTIPART_THRESHOLD:
+            s3_client._put_single(key, fileobj.read(), info.content_type)
+        else:
+            chunks = iter(lambda: fileobj.read(s3_client.CHUNK_SIZE), b"")
+            s3_client._put_multipart(key, b"", chunks, info.content_type)
+        return self.url(key)
+
+    def get_bytes(self, key: str) -> bytes:
+        return s3_client.s3.get_object(Bucket=settings.AWS_S3_BUCKET, Key=key)["Body"].read()
+
+    def delete(self, key: str):
+        s3_client.s3.delete_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
+
+
+class LocalStorage(Storage):
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise InvalidKey(key)
+        return path
+
+    def url(self, key: str) -> str:
+        return f"{settings.LOCAL_STORAGE_URL.rstrip('/')}/{key}"
+
+    def key_for(self, url: str) -> str | None:
+        prefix = settings.LOCAL_STORAGE_URL.rstrip("/") + "/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def put_file(self, fileobj, key: str, info) -> str:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write next to the target, then rename: readers never see a partial file
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        fileobj.seek(0)
+        try:
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(fileobj, f, s3_client.CHUNK_SIZE)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return self.url(key)
+
+    def get_bytes(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+s3_storage = S3Storage()
+local_storage = LocalStorage(settings.LOCAL_STORAGE_DIR)
+
+BACKENDS = {"s3": s3_storage, "local": local_storage}
+if settings.STORAGE_BACKEND not in BACKENDS:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}")
+
+storage: Storage = BACKENDS[settings.STORAGE_BACKEND]
+
+
+def backend_for_url(url: str) -> tuple[Storage, str] | None:
+    """(backend, key) for a stored URL, checking the active backend first."""
+    for backend in (storage, *[b for b in BACKENDS.values() if b is not storage]):
+        key = backend.key_for(url)
+        if key:
+            return backend, key
+    return None
@@ -0,0 +1,60 @@
+"""
+Version tokens for ?since= deltas.
+
+A client sends back the `version` of its last response and gets only what
+changed after it (`full: false`), or everything (`full: true`) when it has
+nothing usable yet:
+
+    0           first sync
+    t<micros>   live rows: compared with updated_at and tombstones
+    v<n>        a published menu version: diffed with the live version
+
+Time tokens are handed out SYNC_VERSION_LAG_SECONDS in the past, so a
+transaction that stamped its rows just before a read but committed just
+after it is picked up by the next sync. A change may therefore be sent
+twice, which is harmless since clients merge by id. Tokens older than
+SYNC_TOMBSTONE_DAYS get a full response because the tombstones they would
+need may have been pruned.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def time_token(at: datetime) -> str:
+    return f"t{(at - EPOCH) // timedelta(microseconds=1)}"
+
+
+def current_time_token() -> str:
+    return time_token(datetime.utcnow() - timedelta(seconds=settings.SYNC_VERSION_LAG_SECONDS))
+
+
+def parse_token(token: str) -> tuple[str, datetime | int] | None:
+    """("t", datetime) or ("v", version); None when everything must be sent."""
+    if token == "0":
+        return None
+    kind, digits = token[:1], token[1:]
+    if kind not in ("t", "v") or not digits.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid since version")
+
+    if kind == "v":
+        return kind, int(digits)
+    at = EPOCH + timedelta(microseconds=int(digits))
+    if at < datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+        return None
+    return kind, at
+
+
+def diff_menus(old: dict, new: dict) -> dict:
+    """Changes between two serialized public menus (PublicRestaurantView JSON)."""
+    old_products = {p["id"]: p for p in old["products"]}
+    new_ids = {p["id"] for p in new["products"]}
+    return {
+        "restaurant": new["restaurant"] if new["restaurant"] != old["restaurant"] else None,
+        "products": [p for p in new["products"] if old_products.get(p["id"]) != p],
+        "deleted": [pid for pid in old_products if pid not in new_ids],
+    }
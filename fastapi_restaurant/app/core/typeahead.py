@@ -0,0 +1,117 @@
+"""
+In-memory prefix index for restaurant name suggestions.
+
+Each city partition is a sorted list of (key, restaurant_id) tuples, so a
+prefix lookup is one bisect plus a short forward scan. Keys are the
+normalised name, every word-suffix of the name ("spice hub" -> "hub") and
+the normalised location.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+ALL_CITIES = "*"
+
+_non_alnum = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(value: str | None) -> str:
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value)
+    value = value.encode("ascii", "ignore").decode("ascii").lower()
+    return _non_alnum.sub(" ", value).strip()
+
+
+def _keys_for(name: str | None, location: str | None) -> set[str]:
+    words = normalize(name).split()
+    keys = {" ".join(words[i:]) for i in range(len(words))}
+    loc = normalize(location)
+    if loc:
+        keys.add(loc)
+    return keys
+
+
+class RestaurantSuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._partitions: dict[str, list[tuple[str, int]]] = {}
+        self._entries: dict[int, dict] = {}   # restaurant_id -> display fields + keys
+
+    # ---------- build / maintenance ----------
+
+    def build(self, restaurants):
+        partitions: dict[str, list[tuple[str, int]]] = {}
+        entries = {}
+        for r in restaurants:
+            entry = self._entry(r)
+            entries[r.id] = entry
+            for city in (ALL_CITIES, entry["city_code"]):
+                partitions.setdefault(city, []).extend((k, r.id) for k in entry["keys"])
+
+        for keys in partitions.values():
+            keys.sort()
+
+        with self._lock:
+            self._partitions = partitions
+            self._entries = entries
+
+    def upsert(self, restaurant):
+        entry = self._entry(restaurant)
+        with self._lock:
+            self._remove_locked(restaurant.id)
+            self._entries[restaurant.id] = entry
+            for city in (ALL_CITIES, entry["city_code"]):
+                partition = self._partitions.setdefault(city, [])
+                for key in entry["keys"]:
+                    insort(partition, (key, restaurant.id))
+
+    def remove(self, restaurant_id: int):
+        with self._lock:
+            self._remove_locked(restaurant_id)
+
+    def _remove_locked(self, restaurant_id: int):
+        entry = self._entries.pop(restaurant_id, None)
+        if not entry:
+            return
+        for city in (ALL_CITIES, entry["city_code"]):
+            partition = self._partitions.get(city, [])
+            for key in entry["keys"]:
+                i = bisect_left(partition, (key, restaurant_id))
+                if i < len(partition) and partition[i] == (key, restaurant_id):
+                    del partition[i]
+
+    @staticmethod
+    def _entry(restaurant) -> dict:
+        return {
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "city_code": restaurant.city_code,
+            "location": restaurant.location,
+            "keys": _keys_for(restaurant.name, restaurant.location),
+        }
+
+    # ---------- lookup ----------
+
+    def suggest(self, q: str, city_code: str | None = None, limit: int = 10) -> list[dict]:
+        prefix = normalize(q)
+        if not prefix:
+            return []
+
+        results, seen = [], set()
+        with self._lock:
+            partition = self._partitions.get(city_code or ALL_CITIES, [])
+            i = bisect_left(partition, (prefix,))
+            while i < len(partition) and len(results) < limit:
+                key, restaurant_id = partition[i]
+                if not key.startswith(prefix):
+                    break
+                if restaurant_id not in seen:
+                    seen.add(restaurant_id)
+                    results.append(self._entries[restaurant_id])
+                i += 1
+        return results
+
+
+restaurant_suggest_index = RestaurantSuggestIndex()
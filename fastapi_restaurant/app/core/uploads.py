@@ -0,0 +1,286 @@
+"""
+Streaming multipart parsing for the upload routes.
+
+Starlette's form parser spools every file part to a temporary file (on disk
+past 1 MB) and leaves the size check to the route, so an oversized logo used
+to be written out in full before anything looked at it. Routes on a router
+with `route_class=UploadRoute` parse the body themselves, as it arrives:
+
+- the body is capped per route: UPLOAD_MAX_BYTES for each file field
+  (UPLOAD_MAX_FILES of them for a list field) plus UPLOAD_FORM_OVERHEAD, never
+  more than body_limit.request_limit(). A declared Content-Length over the cap
+  is refused before a byte is read.
+- each file is hashed and counted chunk by chunk and refused with 413 the
+  moment it passes UPLOAD_MAX_BYTES. s3.inspect_upload reuses that hash.
+- files stay in memory, never on disk. On the S3 backend an image past
+  S3_MULTIPART_THRESHOLD goes up as a staged multipart upload (parallel
+  parts) while the rest of the body is still arriving; storing it is then a
+  server-side copy to its final key. Whatever the route didn't store is
+  deleted when the request ends.
+"""
+import hashlib
+import io
+import logging
+import typing
+
+import anyio.to_thread
+import python_multipart
+from fastapi import HTTPException, Request, params
+from fastapi.routing import APIRoute
+from python_multipart.multipart import parse_options_header
+from starlette.datastructures import FormData, Headers, UploadFile
+
+from app.core import s3 as s3_client
+from app.core.body_limit import request_limit
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReceivedFile:
+    """
+    A file part as it arrives: hashed, size-checked and buffered in memory.
+    Past S3_MULTIPART_THRESHOLD an image is handed to a staged multipart
+    upload instead; after that only storage.put_file (a copy) can store it.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self.head = b""           # first bytes, for s3.sniff_content_type
+        self.sha256: str | None = None   # set once the part is complete
+        self.staged_key: str | None = None
+        self._digest = hashlib.sha256()
+        self._buf = io.BytesIO()
+        self._writer: s3_client.MultipartWriter | None = None
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.limit:
+            raise HTTPException(status_code=413, detail=f"File too large (max {self.limit} bytes)")
+        if len(self.head) < 32:
+            self.head += data[:32 - len(self.head)]
+        self._digest.update(data)
+
+        if self._writer is not None:
+            self._writer.write(data)
+            return
+        self._buf.write(data)
+        if self._buf.tell() > settings.S3_MULTIPART_THRESHOLD and self._stageable():
+            self._writer = s3_client.MultipartWriter(s3_client.staging_key(), self._content_type())
+            self._writer.write(self._buf.getvalue())
+            self._buf = io.BytesIO()
+
+    def _content_type(self) -> str:
+        return s3_client.sniff_content_type(self.head)[0]
+
+    def _stageable(self) -> bool:
+        # only images are ever stored; a CSV or an unknown type stays in memory
+        if settings.STORAGE_BACKEND != "s3":
+            return False
+        try:
+            self._content_type()
+            return True
+        except HTTPException:
+            return False
+
+    def finish(self):
+        self.sha256 = self._digest.hexdigest()
+        if self._writer is not None:
+            try:
+                self._writer.complete()
+            except Exception:
+                self._writer.abort()
+                self._writer = None
+                raise
+            self.staged_key = self._writer.key
+        self._buf.seek(0)
+
+    # file-like surface for code that reads small uploads (onboarding CSV, LocalStorage)
+    def read(self, size: int = -1) -> bytes:
+        if self._writer is not None:
+            raise io.UnsupportedOperation("already streamed to S3; store it with storage.put_file")
+        return self._buf.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._buf.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._buf.tell()
+
+    def close(self):
+        self._buf.close()
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        try:
+            if self.staged_key:
+                s3_client.s3.delete_object(Bucket=settings.AWS_S3_BUCKET, Key=self.staged_key)
+            else:
+                writer.abort()
+        except Exception as exc:
+            logger.warning("Could not remove staged upload %s: %r", writer.key, exc)
+
+
+async def stream_form(headers: Headers, stream, limits: dict[str, int]) -> FormData:
+    """
+    Parse a multipart body from `stream` without spooling it. `limits` maps
+    each file field to the number of files it accepts; any file part is
+    capped at UPLOAD_MAX_BYTES and text parts at UPLOAD_FORM_OVERHEAD.
+    """
+    _, options = parse_options_header(headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Missing boundary in multipart body")
+
+    items: list[tuple[str, str | UploadFile]] = []
+    received: list[ReceivedFile] = []
+    counts: dict[str, int] = {}
+    part: dict = {}
+    header = {"name": b"", "value": b""}
+    pending: list[tuple[ReceivedFile, bytes | None]] = []   # file data to write; None ends the file
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers=[], disposition=b"", data=bytearray(), file=None)
+
+    def on_header_field(data, start, end):
+        header["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        name = header["name"].lower()
+        if name == b"content-disposition":
+            part["disposition"] = header["value"]
+        part["headers"].append((name, header["value"]))
+        header["name"] = header["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["disposition"])
+        if b"name" not in disposition:
+            raise HTTPException(status_code=400, detail="Multipart part without a name")
+        part["name"] = disposition[b"name"].decode("utf-8", "replace")
+        if b"filename" not in disposition:
+            return
+        field = part["name"]
+        counts[field] = counts.get(field, 0) + 1
+        if counts[field] > limits.get(field, 0):
+            raise HTTPException(status_code=413, detail=f"Too many files in {field!r}")
+        file = ReceivedFile(settings.UPLOAD_MAX_BYTES)
+        received.append(file)
+        part["file"] = file
+        part["upload"] = UploadFile(
+            file=file,
+            filename=disposition[b"filename"].decode("utf-8", "replace"),
+            headers=Headers(raw=part["headers"]),
+        )
+
+    def on_part_data(data, start, end):
+        if part["file"] is not None:
+            if end > start:
+                pending.append((part["file"], data[start:end]))
+            return
+        part["data"] += data[start:end]
+        if len(part["data"]) > settings.UPLOAD_FORM_OVERHEAD:
+            raise HTTPException(status_code=413, detail=f"Field {part['name']!r} too large")
+
+    def on_part_end():
+        if part["file"] is None:
+            items.append((part["name"], part["data"].decode("utf-8", "replace")))
+        else:
+            pending.append((part["file"], None))
+            items.append((part["name"], part["upload"]))
+
+    parser = python_multipart.MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    def write_pending(batch):
+        for file, data in batch:
+            if data is None:
+                file.finish()
+            else:
+                file.write(data)
+
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+            if pending:
+                batch = pending[:]
+                pending.clear()
+                # hashing and S3 parts run off the event loop
+                await anyio.to_thread.run_sync(write_pending, batch)
+        parser.finalize()
+    except BaseException:
+        for file in received:
+            file.close()
+        raise
+    for _, value in items:
+        if isinstance(value, UploadFile):
+            value.size = value.file.size
+    return FormData(items)
+
+
+def _is_list(annotation) -> bool:
+    return any(
+        typing.get_origin(arg) in (list, tuple, set)
+        for arg in (annotation, *typing.get_args(annotation))
+    )
+
+
+def max_files(count: int):
+    """Let one list field take `count` files instead of UPLOAD_MAX_FILES."""
+    def mark(endpoint):
+        endpoint.upload_max_files = count
+        return endpoint
+    return mark
+
+
+class UploadRequest(Request):
+    def __init__(self, scope, receive, fields: dict[str, int | None]):
+        super().__init__(scope, receive)
+        # None: a list field, UPLOAD_MAX_FILES (read per request, like every cap here)
+        self._upload_limits = {
+            name: count or settings.UPLOAD_MAX_FILES for name, count in fields.items()
+        }
+        self._streamed_form: FormData | None = None
+
+    async def form(self, **_) -> FormData:
+        if self._streamed_form is None:
+            files = sum(self._upload_limits.values())
+            cap = min(files * settings.UPLOAD_MAX_BYTES + settings.UPLOAD_FORM_OVERHEAD, request_limit())
+            length = self.headers.get("content-length")
+            if length is not None and length.isdigit() and int(length) > cap:
+                raise HTTPException(status_code=413, detail="Request body too large")
+            self._streamed_form = await stream_form(self.headers, self.stream(), self._upload_limits)
+        return self._streamed_form
+
+
+class UploadRoute(APIRoute):
+    """APIRoute whose multipart bodies go through `stream_form` (routes with File() params only)."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        many = getattr(self.endpoint, "upload_max_files", None)
+        self.upload_fields = {
+            field.alias: many if _is_list(field.field_info.annotation) else 1
+            for field in self.dependant.body_params
+            if isinstance(field.field_info, params.File)
+        }
+        if not self.upload_fields:
+            return handler
+
+        async def upload_handler(request: Request):
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                request = UploadRequest(request.scope, request.receive, self.upload_fields)
+            return await handler(request)
+
+        return upload_handler
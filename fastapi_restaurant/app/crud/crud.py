@@ -1,10 +1,26 @@
-from sqlalchemy.orm import Session
+import json
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import Numeric, case, cast, func, or_, select, update
+from sqlalchemy.orm import Session, load_only, selectinload
 from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
 
 from app.models import models
 from app.schemas import schemas
-from app.models.models import Category, Product, ProductImage, ProductSize, Restaurant
+from fastapi import HTTPException
+
+from app.models.models import Category, ImageBlob, Product, ProductImage, ProductSize, Restaurant, Tombstone
+from app.core.s3 import UploadInfo, content_key, delete_file_from_s3, inspect_upload, put_upload, storage_url
+from app.db.menu_json import public_menu_json
+from app.db.search import search_statement
+from app.core.config import settings
+from app.core.sync import current_time_token, diff_menus, parse_token
+
+logger = logging.getLogger(__name__)
 
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -39,31 +55,45 @@ def create_restaurant(db: Session, rest_in: schemas.RestaurantCreate):
 
 
 def delete_restaurant(db: Session, restaurant_id: int):
-    restaurant = (
-        db.query(Restaurant)
-        .filter(Restaurant.id == restaurant_id)
-        .first()
-    )
+    """
+    Soft delete: hide the restaurant from every read right away and queue a
+    purge record. The rows and S3 objects are removed by app.core.purge.
+    """
+    restaurant = get_restaurant(db, restaurant_id)
 
     if not restaurant:
         return None
 
-    db.delete(restaurant)
+    restaurant.deleted_at = datetime.utcnow()
+    purge = db.get(models.RestaurantPurge, restaurant_id) or models.RestaurantPurge(
+        restaurant_id=restaurant_id
+    )
+    # a reused row (ids recycled, e.g. on SQLite) starts over
+    purge.status = "pending"
+    purge.products_deleted = purge.images_deleted = purge.orders_deleted = 0
+    purge.error = None
+    purge.requested_at = datetime.utcnow()
+    purge.finished_at = None
+    purge.products_total = (
+        db.query(func.count(Product.id))
+        .filter(Product.restaurant_id == restaurant_id)
+        .scalar()
+    )
+    db.add(purge)
     db.commit()
-    return True
-
-
+    return purge
 
 
 def get_restaurant(db: Session, rest_id: int):
     return (
         db.query(models.Restaurant)
-        .filter(models.Restaurant.id == rest_id)
+        .filter(models.Restaurant.id == rest_id, models.Restaurant.deleted_at.is_(None))
         .first()
     )
 
 
 def get_restaurant_by_email(db: Session, email: str):
+    # deliberately includes restaurants being purged: their email is still taken
     return (
         db.query(models.Restaurant)
         .filter(models.Restaurant.email == email)
@@ -71,26 +101,57 @@ def get_restaurant_by_email(db: Session, email: str):
     )
 
 
-def get_restaurants(db: Session, skip: int = 0, limit: int = 100):
+def get_restaurant_by_identifier(db: Session, identifier: str):
+    # public URLs use the local part of the restaurant's email
     return (
         db.query(models.Restaurant)
+        .filter(
+            models.Restaurant.email.ilike(f"{identifier}@%.com"),
+            models.Restaurant.deleted_at.is_(None),
+        )
+        .first()
+    )
+
+
+def get_restaurants(db: Session, skip: int = 0, limit: int = 100, columns=None):
+    query = db.query(models.Restaurant)
+    if columns is not None:
+        query = query.options(load_only(*[getattr(Restaurant, c) for c in columns]))
+    return (
+        query
+        .filter(models.Restaurant.deleted_at.is_(None))
         .offset(skip)
         .limit(limit)
         .all()
     )
     
 
+def count_restaurants_by_location(db: Session):
+    return (
+        db.query(
+            Restaurant.country_code,
+            Restaurant.state_code,
+            Restaurant.city_code,
+            func.count(Restaurant.id),
+            func.sum(case((Restaurant.pure_veg.is_(True), 1), else_=0)),
+        )
+        .filter(Restaurant.deleted_at.is_(None))
+        .group_by(Restaurant.country_code, Restaurant.state_code, Restaurant.city_code)
+        .all()
+    )
+
+
 def get_restaurant_by_id(db: Session, restaurant_id: int):
     return (
         db.query(Restaurant)
-        .filter(Restaurant.id == restaurant_id)
+        .filter(Restaurant.id == restaurant_id, Restaurant.deleted_at.is_(None))
         .first()
     )
 
 def update_restaurant(db: Session, restaurant_id: int, data):
     restaurant = (
         db.query(Restaurant)
-        .filter(Restaurant.id == restaurant_id)
+        .filter(Restaurant.id == restaurant_id, Restaurant.deleted_at.is_(None))
         .first()
     )
     if not restaurant:
@@ -127,7 +188,18 @@ def list_categories(db: Session):
 # Products
 # ============================
 
-def create_product(db: Session, rest_id: int, product_in: schemas.ProductCreate):
+class ImageUpload(NamedTuple):
+    file: object
+    info: UploadInfo
+
+
+def create_product(
+    db: Session,
+    rest_id: int,
+    product_in: schemas.ProductCreate,
+    uploads: list[ImageUpload] = (),
+    uploaded: set[str] = frozenset(),
+):
     product = models.Product(
         restaurant_id=rest_id,
         name=product_in.name,
@@ -147,6 +219,8 @@ def create_product(db: Session, rest_id: int, product_in: schemas.ProductCreate)
         )
         product.categories = categories
 
+    product.search_text = build_search_text(product)
+
     db.add(product)
     db.flush()  # 👈 IMPORTANT (gets product.id)
 
@@ -160,7 +234,11 @@ def create_product(db: Session, rest_id: int, product_in: schemas.ProductCreate)
             )
         )
 
+    # 👇 images were uploaded before this transaction began
+    _, late = attach_image_blobs(db, product.id, uploads, set(uploaded))
+
     db.commit()
+    put_image_blobs(late)   # connection released by the commit
     db.refresh(product)
     return product
 
@@ -169,7 +247,9 @@ from sqlalchemy import delete
 def update_product(
     db: Session,
     product: Product,
-    product_in: schemas.ProductUpdate
+    product_in: schemas.ProductUpdate,
+    uploads: list[ImageUpload] = (),
+    uploaded: set[str] = frozenset(),
 ):
     data = product_in.dict(exclude_unset=True)
 
@@ -178,53 +258,238 @@ def update_product(
         if field in data:
             setattr(product, field, data[field])
 
-    # 🔹 Categories
+    # 🔹 Categories (only touch association rows that actually change)
     if "category_ids" in data:
-        categories = (
-            db.query(Category)
-            .filter(Category.id.in_(data["category_ids"]))
-            .all()
-        )
-        product.categories = categories
+        sync_product_categories(db, product, data["category_ids"])
 
-    # 🔹 Sizes (FIXED PROPERLY)
-    if "sizes" in data:
-        # ❗ DELETE FIRST
-        db.query(ProductSize).filter(
-            ProductSize.product_id == product.id
-        ).delete(synchronize_session=False)
+    # 🔹 Sizes (diff against existing rows keyed by size_label; null = leave them)
+    if data.get("sizes") is not None:
+        sync_product_sizes(product, data["sizes"])
 
-        # ❗ INSERT FRESH
-        for size in data["sizes"]:
-            db.add(ProductSize(
-                product_id=product.id,
-                size_label=size["size_label"],
-                price=size["price"],
-            ))
+    search_text = build_search_text(product)
+    if product.search_text != search_text:
+        product.search_text = search_text   # otherwise no UPDATE, no new updated_at
+
+    _, late = attach_image_blobs(db, product.id, uploads, set(uploaded))
 
     db.commit()
+    put_image_blobs(late)   # connection released by the commit
     db.refresh(product)
     return product
 
 
 
+def sync_product_categories(db: Session, product: Product, category_ids: list[int]):
+    """
+    Apply the minimal set of product_category changes so the product ends up
+    linked to exactly `category_ids`. Only newly added ids hit the DB.
+    """
+    wanted = set(category_ids or [])
+    current = {c.id: c for c in product.categories}
+
+    for cat_id, cat in current.items():
+        if cat_id not in wanted:
+            product.categories.remove(cat)
+
+    to_add = wanted - current.keys()
+    if to_add:
+        product.categories.extend(
+            db.query(Category).filter(Category.id.in_(to_add)).all()
+        )
+
+
+def sync_product_sizes(product: Product, sizes: list[dict]):
+    """
+    Reconcile product.sizes with the incoming list, keyed by size_label
+    (matches uq_product_size). Unchanged rows are left alone, so the flush
+    only emits the INSERT / UPDATE / DELETE statements that are needed.
+    """
+    incoming = {size["size_label"]: size["price"] for size in sizes}
+    existing = {size.size_label: size for size in product.sizes}
+
+    for label, size in existing.items():
+        if label not in incoming:
+            product.sizes.remove(size)  # delete-orphan -> DELETE
+        elif size.price != incoming[label]:
+            size.price = incoming[label]  # -> UPDATE
+
+    for label, price in incoming.items():
+        if label not in existing:
+            product.sizes.append(ProductSize(size_label=label, price=price))
+
+
 
-def get_products_by_restaurant(db: Session, rest_id: int):
+PRODUCT_RELATIONS = ("sizes", "images", "categories")
+
+
+def _live_products(db: Session):
+    """Products whose restaurant isn't soft-deleted (its rows stay until the purge)."""
     return (
         db.query(models.Product)
+        .join(Restaurant, Restaurant.id == models.Product.restaurant_id)
+        .filter(Restaurant.deleted_at.is_(None))
+    )
+
+
+def get_products_by_restaurant(
+    db: Session,
+    rest_id: int,
+    columns=None,
+    relations=PRODUCT_RELATIONS,
+):
+    """
+    Products of a restaurant. `columns` limits the loaded columns (None =
+    all); each relation in `relations` is loaded with one extra query and the
+    others are not loaded at all.
+    """
+    query = _live_products(db)
+    if columns is not None:
+        query = query.options(load_only(*[getattr(Product, c) for c in columns]))
+    for name in relations:
+        query = query.options(selectinload(getattr(Product, name)))
+    return (
+        query
         .filter(models.Product.restaurant_id == rest_id)
+        .order_by(models.Product.id)
+        .all()
+    )
+
+
+def get_public_products(db: Session, rest_id: int):
+    return (
+        _live_products(db)
+        .options(
+            selectinload(models.Product.sizes),
+            selectinload(models.Product.images),
+            selectinload(models.Product.categories),
+        )
+        .filter(
+            models.Product.restaurant_id == rest_id,
+            models.Product.available.is_(True),
+        )
+        .order_by(models.Product.id)
         .all()
     )
 
 
+def get_dashboard(db: Session, restaurant: Restaurant) -> dict:
+    """
+    Everything the restaurant dashboard renders, in a fixed number of queries
+    (products, their sizes / images / categories, the category list) however
+    many products there are. Per-category counts come from the loaded rows.
+    """
+    products = (
+        _live_products(db)
+        .options(
+            selectinload(models.Product.sizes),
+            selectinload(models.Product.images),
+            selectinload(models.Product.categories),
+        )
+        .filter(models.Product.restaurant_id == restaurant.id)
+        .order_by(models.Product.id)
+        .all()
+    )
+
+    counts: dict[int, list[int]] = {}
+    for product in products:
+        for category in product.categories:
+            count = counts.setdefault(category.id, [0, 0])
+            count[0] += 1
+            count[1] += bool(product.available)
+
+    return {
+        "restaurant": restaurant,
+        "published_version": restaurant.published_version,
+        "products": products,
+        "categories": list_categories(db),
+        "category_counts": [
+            {"category_id": cid, "products": n, "available": available}
+            for cid, (n, available) in sorted(counts.items())
+        ],
+    }
+
+
 def get_product(db: Session, product_id: int):
     return (
-        db.query(models.Product)
+        _live_products(db)
         .filter(models.Product.id == product_id)
         .first()
     )
 
 
+def get_products_by_ids(db: Session, ids: list[int]) -> tuple[list[Product], list[int]]:
+    """
+    Products for `ids` in that order, plus the ids that don't exist (or whose
+    restaurant was deleted). One query for the products and one per relation,
+    however many ids.
+
+    Unavailable products are returned, flagged `available: false`, exactly as
+    GET /products/{id} returns them: a saved cart or favourites list can show
+    "sold out" instead of an item silently disappearing.
+    """
+    found = {
+        product.id: product
+        for product in (
+            _live_products(db)
+            .options(*[selectinload(getattr(Product, name)) for name in PRODUCT_RELATIONS])
+            .filter(models.Product.id.in_(ids))
+        )
+    }
+    return [found[i] for i in ids if i in found], [i for i in ids if i not in found]
+
+
+def build_search_text(product: Product) -> str:
+    parts = [product.description, product.remark]
+    parts += [c.name for c in product.categories]
+    return " ".join(p for p in parts if p)
+
+
+def search_products(
+    db: Session,
+    q: str,
+    city_code: str | None = None,
+    veg: bool | None = None,
+    available: bool | None = True,
+    skip: int = 0,
+    limit: int = 20,
+):
+    """
+    Ranked full-text search over product name, description, remark and
+    category names across all restaurants. Returns [(product, rank), ...].
+    """
+    if not q.strip():
+        return []
+
+    filters, params = ["r.deleted_at IS NULL"], {"skip": skip, "limit": limit}
+    if city_code is not None:
+        filters.append("r.city_code = :city_code")
+        params["city_code"] = city_code
+    if veg is not None:
+        filters.append("p.veg = :veg")
+        params["veg"] = veg
+    if available is not None:
+        filters.append("p.available = :available")
+        params["available"] = available
+
+    stmt, params["q"] = search_statement(db.get_bind().dialect.name, q, filters)
+    ranked = db.execute(stmt, params).all()
+    if not ranked:
+        return []
+
+    products = {
+        p.id: p
+        for p in db.query(Product)
+        .options(
+            selectinload(Product.sizes),
+            selectinload(Product.images),
+            selectinload(Product.categories),
+            selectinload(Product.restaurant),
+        )
+        .filter(Product.id.in_([row.id for row in ranked]))
+    }
+    return [(products[row.id], row.rank) for row in ranked if row.id in products]
+
+
 def update_product_availability(
     db: Session,
     product_id: int,
@@ -257,15 +522,480 @@ def add_product_images(db, product_id: int, image_urls: list[str]):
 
     return images
 
+
+def inspect_image_files(files) -> list[ImageUpload]:
+    """Validate and hash uploaded files locally. No DB, no network."""
+    return [ImageUpload(file, inspect_upload(file)) for file in files or []]
+
+
+def upload_new_image_blobs(db: Session, uploads: list[ImageUpload]) -> set[str]:
+    """
+    One query for the blobs that already exist, then release the session's
+    connection and upload only the new content. Pool usage stays flat no
+    matter how slow S3 is; the caller writes rows afterwards with
+    `attach_image_blobs` in a fresh, short transaction.
+    Returns the sha256s that were uploaded.
+    """
+    if not uploads:
+        return set()
+    shas = {u.info.sha256 for u in uploads}
+    known = {sha for (sha,) in db.query(ImageBlob.sha256).filter(ImageBlob.sha256.in_(shas))}
+    db.close()  # ⚠️ never hold a pooled connection across S3 I/O
+
+    uploaded = set()
+    for u in uploads:
+        if u.info.sha256 not in known and u.info.sha256 not in uploaded:
+            put_upload(u.file, content_key(u.info), u.info)
+            uploaded.add(u.info.sha256)
+    return uploaded
+
+
+def attach_image_blobs(
+    db: Session, product_id: int, uploads: list[ImageUpload], uploaded: set[str]
+) -> tuple[list[ProductImage], list[ImageUpload]]:
+    """
+    Take a reference on each upload's blob (creating the row when new) and add
+    the ProductImage rows. Runs in the caller's transaction; caller commits.
+
+    Returns the images and the uploads whose object must still be stored: a
+    blob released (and its object deleted) between `upload_new_image_blobs`'
+    lookup and this transaction gets its row back here, but the bytes are put
+    only after the caller commits (`put_image_blobs`), never while the
+    transaction holds a connection.
+    """
+    images, late = [], []
+    for u in uploads:
+        key = content_key(u.info)
+        bump = (
+            update(ImageBlob)
+            .where(ImageBlob.sha256 == u.info.sha256)
+            .values(ref_count=ImageBlob.ref_count + 1)
+            .returning(ImageBlob.id, ImageBlob.url)
+        )
+        row = db.execute(bump).first()
+        if row is None:
+            if u.info.sha256 not in uploaded:
+                # rare: the blob was released after the lookup; store it after commit
+                late.append(u)
+                uploaded.add(u.info.sha256)
+            try:
+                with db.begin_nested():
+                    blob = ImageBlob(
+                        sha256=u.info.sha256,
+                        url=storage_url(key),
+                        content_type=u.info.content_type,
+                        size=u.info.size,
+                        ref_count=1,
+                    )
+                    db.add(blob)
+                row = (blob.id, blob.url)
+            except IntegrityError:
+                row = db.execute(bump).first()   # inserted concurrently; share it
+                if row is None:
+                    raise HTTPException(status_code=409, detail="Image storage busy, please retry")
+
+        blob_id, url = row
+        image = ProductImage(product_id=product_id, image_url=url, blob_id=blob_id)
+        db.add(image)
+        images.append(image)
+    return images, late
+
+
+def put_image_blobs(uploads: list[ImageUpload]):
+    """Store the objects `attach_image_blobs` left for after commit."""
+    for u in uploads:
+        put_upload(u.file, content_key(u.info), u.info)
+
+
+def release_image_blob(db: Session, blob_id: int) -> str | None:
+    """
+    Drop one reference; when it was the last one, delete the blob row and
+    return its URL. The ProductImage pointing at it must already be deleted
+    and flushed. The object itself is the caller's to delete, after commit
+    (`delete_released_objects`), so a rolled-back release never loses it.
+    """
+    db.query(ImageBlob).filter(ImageBlob.id == blob_id).update(
+        {ImageBlob.ref_count: ImageBlob.ref_count - 1}, synchronize_session=False
+    )
+    orphan = (
+        db.query(ImageBlob.url)
+        .filter(ImageBlob.id == blob_id, ImageBlob.ref_count <= 0)
+        .first()
+    )
+    if not orphan:
+        return None
+    db.query(ImageBlob).filter(ImageBlob.id == blob_id).delete(synchronize_session=False)
+    return orphan.url
+
+
+def delete_released_objects(db: Session, urls) -> None:
+    """
+    Delete the objects behind released blobs, after the release committed.
+    A URL that a blob row points to again (the same content was uploaded
+    meanwhile) is kept. Failures only leak an object, so they are logged.
+    """
+    urls = {url for url in urls if url}
+    if not urls:
+        return
+    revived = {url for (url,) in db.query(ImageBlob.url).filter(ImageBlob.url.in_(urls))}
+    db.close()   # no pooled connection across S3 I/O
+    for url in urls - revived:
+        try:
+            delete_file_from_s3(url)
+        except Exception as exc:
+            logger.warning("Could not delete %s: %r", url, exc)
+
+
+def add_product_image_files(db: Session, product_id: int, files) -> list[ProductImage]:
+    uploads = inspect_image_files(files)
+    uploaded = upload_new_image_blobs(db, uploads)
+
+    images, late = attach_image_blobs(db, product_id, uploads, uploaded)
+    db.commit()
+    put_image_blobs(late)
+    for img in images:
+        db.refresh(img)
+    return images
+
+
+def delete_product_image(db: Session, image: ProductImage):
+    blob_id, url = image.blob_id, image.image_url
+    db.delete(image)
+    db.flush()   # product_images.blob_id must be gone before the blob row can go
+
+    if blob_id is not None:
+        url = release_image_blob(db, blob_id)
+    # else: legacy image with its own object
+    db.commit()
+    delete_released_objects(db, [url])
+
+# ============================
+# Orders
+# ============================
+
+def list_orders(db: Session, rest_id: int, status: str | None = None, limit: int = 50):
+    query = (
+        db.query(models.Order)
+        .options(selectinload(models.Order.items))
+        .filter(models.Order.restaurant_id == rest_id)
+    )
+    if status is not None:
+        query = query.filter(models.Order.status == status)
+    return query.order_by(models.Order.id.desc()).limit(limit).all()
+
+
+# ============================
+# Menu versions (draft / publish)
+# ============================
+
+def publish_menu(db: Session, restaurant: Restaurant) -> models.MenuVersion:
+    """Freeze the current draft (restaurant + available products) into a new version and make it live."""
+    body, product_count = public_menu_json(db, restaurant)
+
+    latest = (
+        db.query(func.max(models.MenuVersion.version))
+        .filter(models.MenuVersion.restaurant_id == restaurant.id)
+        .scalar()
+    )
+    menu_version = models.MenuVersion(
+        restaurant_id=restaurant.id,
+        version=(latest or 0) + 1,
+        payload=body.decode("utf-8"),
+        product_count=product_count,
+    )
+    db.add(menu_version)
+    restaurant.published_version = menu_version.version
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # another publish took the same version number
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Menu is being published, retry")
+    db.refresh(menu_version)
+    return menu_version
+
+
+def list_menu_versions(db: Session, rest_id: int, limit: int = 50):
+    return (
+        db.query(models.MenuVersion)
+        .options(load_only(
+            models.MenuVersion.restaurant_id,
+            models.MenuVersion.version,
+            models.MenuVersion.product_count,
+            models.MenuVersion.published_at,
+        ))
+        .filter(models.MenuVersion.restaurant_id == rest_id)
+        .order_by(models.MenuVersion.version.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def activate_menu_version(db: Session, restaurant: Restaurant, version: int) -> models.MenuVersion:
+    """Point the live menu at an existing version (rollback / roll forward)."""
+    menu_version = db.get(models.MenuVersion, (restaurant.id, version))
+    if not menu_version:
+        raise HTTPException(status_code=404, detail="Menu version not found")
+
+    restaurant.published_version = version
+    db.commit()
+    return menu_version
+
+
+def get_public_menu_body(db: Session, restaurant: Restaurant) -> bytes:
+    """Serialized public menu: the published version, or the live draft if never published."""
+    if restaurant.published_version is not None:
+        menu_version = db.get(models.MenuVersion, (restaurant.id, restaurant.published_version))
+        if menu_version:
+            return menu_version.payload.encode("utf-8")
+
+    body, _ = public_menu_json(db, restaurant)
+    return body
+
+
+def get_public_menu_by_identifier(db: Session, identifier: str) -> tuple[int, bytes] | None:
+    """(restaurant_id, menu bytes) for a public URL; a published menu is one indexed row fetch."""
+    row = (
+        db.query(models.Restaurant.id, models.MenuVersion.payload)
+        .outerjoin(
+            models.MenuVersion,
+            (models.MenuVersion.restaurant_id == models.Restaurant.id)
+            & (models.MenuVersion.version == models.Restaurant.published_version),
+        )
+        .filter(
+            models.Restaurant.email.ilike(f"{identifier}@%.com"),
+            models.Restaurant.deleted_at.is_(None),
+        )
+        .first()
+    )
+    if row is None:
+        return None
+
+    restaurant_id, payload = row
+    if payload is not None:
+        return restaurant_id, payload.encode("utf-8")
+    return restaurant_id, get_public_menu_body(db, get_restaurant(db, restaurant_id))
+
+
+# ============================
+# Delta sync (?since=)
+# ============================
+
+def _changed_since(since: datetime):
+    # sizes / images written with Core (bulk repricing, image attach) only stamp
+    # their own rows, and a deleted child leaves only a tombstone
+    return or_(
+        Product.updated_at >= since,
+        select(ProductSize.id)
+        .where(ProductSize.product_id == Product.id, ProductSize.updated_at >= since)
+        .exists(),
+        select(ProductImage.id)
+        .where(ProductImage.product_id == Product.id, ProductImage.updated_at >= since)
+        .exists(),
+        Product.id.in_(
+            select(Tombstone.product_id).where(
+                Tombstone.restaurant_id == Product.restaurant_id,
+                Tombstone.deleted_at >= since,
+            )
+        ),
+    )
+
+
+def _tombstones_since(db: Session, rest_id: int, since: datetime, entity: str | None = None):
+    query = db.query(Tombstone).filter(
+        Tombstone.restaurant_id == rest_id,
+        Tombstone.deleted_at >= since,
+    )
+    if entity is not None:
+        query = query.filter(Tombstone.entity == entity)
+    return query.order_by(Tombstone.id).all()
+
+
+def get_product_delta(db: Session, rest_id: int, since: str) -> dict:
+    """Owner product list changed since a `t` token (anything else: the full list)."""
+    version = current_time_token()   # before reading, see app.core.sync
+    token = parse_token(since)
+
+    query = (
+        _live_products(db)
+        .options(*[selectinload(getattr(Product, name)) for name in PRODUCT_RELATIONS])
+        .filter(models.Product.restaurant_id == rest_id)
+    )
+    if token is None or token[0] != "t":
+        return {"version": version, "full": True, "products": query.all(), "deleted": []}
+
+    since_at = token[1]
+    return {
+        "version": version,
+        "full": False,
+        "products": query.filter(_changed_since(since_at)).all(),
+        "deleted": [
+            {"entity": t.entity, "id": t.entity_id, "product_id": t.product_id}
+            for t in _tombstones_since(db, rest_id, since_at)
+        ],
+    }
+
+
+def get_public_menu_delta(db: Session, restaurant: Restaurant, since: str) -> dict:
+    """
+    Public menu changes since a token. Published menus are diffed version
+    against version, so draft edits never leak; restaurants that never
+    published are served live, so their delta comes from the rows.
+    """
+    token = parse_token(since)
+
+    if restaurant.published_version is not None:
+        current = json.loads(get_public_menu_body(db, restaurant))
+        version = f"v{restaurant.published_version}"
+        old = None
+        if token is not None and token[0] == "v":
+            old_version = db.get(models.MenuVersion, (restaurant.id, token[1]))
+            old = json.loads(old_version.payload) if old_version else None
+        if old is None:
+            return {"version": version, "full": True, **current, "deleted": []}
+        return {"version": version, "full": False, **diff_menus(old, current)}
+
+    version = current_time_token()
+    if token is None or token[0] != "t":
+        return {
+            "version": version,
+            "full": True,
+            "restaurant": restaurant,
+            "products": get_public_products(db, restaurant.id),
+            "deleted": [],
+        }
+
+    since_at = token[1]
+    changed = (
+        _live_products(db)
+        .options(*[selectinload(getattr(Product, name)) for name in PRODUCT_RELATIONS])
+        .filter(models.Product.restaurant_id == restaurant.id, _changed_since(since_at))
+        .all()
+    )
+    # a product switched off disappears from the public menu
+    deleted = [p.id for p in changed if not p.available]
+    deleted += [t.product_id for t in _tombstones_since(db, restaurant.id, since_at, "product")]
+    return {
+        "version": version,
+        "full": False,
+        "restaurant": restaurant if restaurant.updated_at and restaurant.updated_at >= since_at else None,
+        "products": [p for p in changed if p.available],
+        "deleted": deleted,
+    }
+
+
+def prune_tombstones(db: Session):
+    """Drop tombstones no token can still ask for (see SYNC_TOMBSTONE_DAYS)."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    db.query(Tombstone).filter(Tombstone.deleted_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+
+
+# ============================
+# Menu analytics
+# ============================
+
+def get_menu_analytics(db: Session, rest_id: int, since, limit: int = 50):
+    """(daily scans, most viewed products) aggregated from menu_daily_stats since `since`."""
+    stats = models.MenuDailyStat
+    in_range = (stats.restaurant_id == rest_id) & (stats.day >= since)
+
+    daily = (
+        db.query(stats.day, stats.views)
+        .filter(in_range, stats.product_id == 0)
+        .order_by(stats.day)
+        .all()
+    )
+    total = func.sum(stats.views)
+    products = (
+        db.query(stats.product_id, models.Product.name, total.label("views"))
+        .outerjoin(models.Product, models.Product.id == stats.product_id)
+        .filter(in_range, stats.product_id != 0)
+        .group_by(stats.product_id, models.Product.name)
+        .order_by(total.desc())
+        .limit(limit)
+        .all()
+    )
+    return daily, products
+
+
 # ============================
 # Product Sizes & Pricing
 # ============================
 
+def _adjusted_price(adj: schemas.PriceAdjustment):
+    """SQL expression for the new price of a ProductSize row under `adj`."""
+    if adj.mode == "percent":
+        raw = ProductSize.price * (100 + adj.amount) / 100
+    else:
+        raw = ProductSize.price + adj.amount
+
+    steps = raw / adj.round_to
+    if adj.rounding == "up":
+        steps = func.ceil(steps)
+    elif adj.rounding == "down":
+        steps = func.floor(steps)
+    else:
+        steps = func.round(steps)
+    return cast(steps * adj.round_to, Numeric(10, 2))
+
+
+def adjust_prices(db: Session, rest_id: int, adj: schemas.PriceAdjustment):
+    """
+    Reprice a restaurant's sizes with one set-based UPDATE. Always returns the
+    diff; only writes (and commits) when `adj.dry_run` is False.
+    """
+    products = select(Product.id).where(Product.restaurant_id == rest_id)
+    if adj.category_id is not None:
+        products = products.where(
+            Product.id.in_(
+                select(models.product_category.c.product_id)
+                .where(models.product_category.c.category_id == adj.category_id)
+            )
+        )
+
+    new_price = _adjusted_price(adj)
+    scope = [ProductSize.product_id.in_(products), new_price != ProductSize.price]
+    if adj.size_label is not None:
+        scope.append(ProductSize.size_label == adj.size_label)
+
+    changes = (
+        db.query(
+            ProductSize.id.label("size_id"),
+            ProductSize.product_id,
+            Product.name.label("product_name"),
+            ProductSize.size_label,
+            ProductSize.price.label("old_price"),
+            new_price.label("new_price"),
+        )
+        .join(Product, Product.id == ProductSize.product_id)
+        .filter(*scope)
+        .order_by(Product.name, ProductSize.size_label)
+        .all()
+    )
+
+    negative = sum(1 for c in changes if c.new_price < 0)
+    if negative:
+        raise HTTPException(status_code=400, detail=f"Adjustment would make {negative} prices negative")
+
+    if changes and not adj.dry_run:
+        db.execute(
+            update(ProductSize)
+            .where(*scope)
+            .values(price=new_price)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    return changes
+
+
 def add_product_sizes(
     db: Session,
     product_id: int,
     size_label: str,
-    price: float
+    price: Decimal
 ):
     size = models.ProductSize(
         product_id=product_id,
@@ -0,0 +1,201 @@
+"""
+Menu JSON assembled by the database.
+
+Postgres: the public menu and the owner product list are each one statement
+(json_build_object / json_agg over products, sizes, images and categories)
+returning ready-to-send bytes. No ORM objects, identity map or pydantic pass.
+Other dialects (SQLite in development) use the ORM + pydantic path.
+
+Keys follow the read schemas' field order, so both paths produce the same
+document; only number formatting differs (Postgres writes 180, not 180.0).
+A schema field without a SQL expression below fails at import.
+
+Compare both paths on a real restaurant (Postgres only for the SQL side):
+
+    python -m app.db.menu_json 42 --repeat 50
+"""
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.schemas.schemas import (
+    CategoryRead,
+    ProductImageRead,
+    ProductRead,
+    ProductSizeRead,
+    PublicProductRead,
+    PublicRestaurantRead,
+)
+
+RESTAURANT_SQL = {
+    "id": "r.id",
+    "name": "r.name",
+    "email": "r.email",
+    "country_code": "r.country_code",
+    "state_code": "r.state_code",
+    "city_code": "r.city_code",
+    "location": "r.location",
+    "logo_url": "r.logo_url",
+    "pure_veg": "r.pure_veg",
+    "staff_rating": "round(r.staff_rating)::int",
+    "type": "r.type",
+}
+PRODUCT_SQL = {
+    "id": "p.id",
+    "restaurant_id": "p.restaurant_id",
+    "name": "p.name",
+    "description": "p.description",
+    "remark": "p.remark",
+    "veg": "p.veg",
+    "iced": "p.iced",
+    "available": "p.available",
+    "sizes": "coalesce(sizes_agg.items, '[]'::json)",
+    "images": "coalesce(images_agg.items, '[]'::json)",
+    "categories": "coalesce(categories_agg.items, '[]'::json)",
+}
+SIZE_SQL = {"id": "s.id", "size_label": "s.size_label", "price": "s.price::float8"}
+IMAGE_SQL = {"id": "i.id", "image_url": "i.image_url"}
+CATEGORY_SQL = {"id": "c.id", "name": "c.name", "remark": "c.remark"}
+
+
+def _json_object(model, columns: dict[str, str]) -> str:
+    pairs = ", ".join(f"'{name}', {columns[name]}" for name in model.model_fields)
+    return f"json_build_object({pairs})"
+
+
+def _products_cte(product_model, available_only: bool) -> str:
+    # one aggregate per relation, grouped by product and hash-joined back:
+    # no per-product subqueries, whatever the menu size
+    return f"""
+    WITH p AS (
+        SELECT products.* FROM products
+        JOIN restaurants ON restaurants.id = products.restaurant_id
+        WHERE products.restaurant_id = :rid AND restaurants.deleted_at IS NULL
+        {"AND products.available" if available_only else ""}
+    ),
+    sizes_agg AS (
+        SELECT s.product_id, json_agg({_json_object(ProductSizeRead, SIZE_SQL)} ORDER BY s.id) AS items
+        FROM product_sizes s
+        WHERE s.product_id IN (SELECT id FROM p)
+        GROUP BY s.product_id
+    ),
+    images_agg AS (
+        SELECT i.product_id, json_agg({_json_object(ProductImageRead, IMAGE_SQL)} ORDER BY i.id) AS items
+        FROM product_images i
+        WHERE i.product_id IN (SELECT id FROM p)
+        GROUP BY i.product_id
+    ),
+    categories_agg AS (
+        SELECT pc.product_id, json_agg({_json_object(CategoryRead, CATEGORY_SQL)} ORDER BY c.id) AS items
+        FROM product_category pc
+        JOIN categories c ON c.id = pc.category_id
+        WHERE pc.product_id IN (SELECT id FROM p)
+        GROUP BY pc.product_id
+    ),
+    items AS (
+        SELECT coalesce(json_agg({_json_object(product_model, PRODUCT_SQL)} ORDER BY p.id), '[]'::json) AS products,
+               count(*) AS n
+        FROM p
+        LEFT JOIN sizes_agg ON sizes_agg.product_id = p.id
+        LEFT JOIN images_agg ON images_agg.product_id = p.id
+        LEFT JOIN categories_agg ON categories_agg.product_id = p.id
+    )
+    """
+
+
+PG_PUBLIC_MENU = text(
+    _products_cte(PublicProductRead, available_only=True)
+    + f"""
+    SELECT json_build_object(
+        'restaurant', (SELECT {_json_object(PublicRestaurantRead, RESTAURANT_SQL)} FROM restaurants r WHERE r.id = :rid),
+        'products', items.products
+    )::text, items.n
+    FROM items
+    """
+)
+
+PG_PRODUCT_LIST = text(
+    _products_cte(ProductRead, available_only=False)
+    + "SELECT items.products::text, items.n FROM items"
+)
+
+_product_list = TypeAdapter(list[ProductRead])
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def public_menu_json(db: Session, restaurant) -> tuple[bytes, int]:
+    """(PublicRestaurantView JSON, product count) for a restaurant's live menu."""
+    if _is_postgres(db):
+        body, count = db.execute(PG_PUBLIC_MENU, {"rid": restaurant.id}).one()
+        return body.encode("utf-8"), count
+    return _orm_public_menu(db, restaurant)
+
+
+def product_list_json(db: Session, rest_id: int) -> bytes:
+    """JSON list of ProductRead for the owner's product list."""
+    if _is_postgres(db):
+        body, _ = db.execute(PG_PRODUCT_LIST, {"rid": rest_id}).one()
+        return body.encode("utf-8")
+    return _orm_product_list(db, rest_id)
+
+
+def _orm_public_menu(db: Session, restaurant) -> tuple[bytes, int]:
+    from app.core.publisher import render_menu
+    from app.crud.crud import get_public_products
+
+    products = get_public_products(db, restaurant.id)
+    _, body = render_menu(restaurant, products)
+    return body, len(products)
+
+
+def _orm_product_list(db: Session, rest_id: int) -> bytes:
+    from app.crud.crud import get_products_by_restaurant
+
+    products = get_products_by_restaurant(db, rest_id)
+    return _product_list.dump_json(_product_list.validate_python(products, from_attributes=True))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import tracemalloc
+
+    from app.crud.crud import get_restaurant
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Compare SQL-built and ORM-built menu JSON")
+    parser.add_argument("restaurant_id", type=int)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    def measure(label, build):
+        db = SessionLocal()
+        try:
+            restaurant = get_restaurant(db, args.restaurant_id)
+            build(db, restaurant)   # warm up
+            db.expunge_all()
+            tracemalloc.start()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                size = len(build(db, restaurant))
+                db.expunge_all()   # like a fresh request session
+            elapsed = (time.perf_counter() - start) / args.repeat
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            db.close()
+        print(f"{label:<22} {elapsed * 1000:8.2f} ms/call  peak {peak / 1024:9.1f} KiB  {size} bytes")
+
+    measure("public menu (ORM)", lambda db, r: _orm_public_menu(db, r)[0])
+    measure("product list (ORM)", lambda db, r: _orm_product_list(db, r.id))
+    db = SessionLocal()
+    postgres = _is_postgres(db)
+    db.close()
+    if postgres:
+        measure("public menu (SQL)", lambda db, r: public_menu_json(db, r)[0])
+        measure("product list (SQL)", lambda db, r: product_list_json(db, r.id))
+    else:
+        print("SQL path needs Postgres; only the ORM path was measured")
@@ -0,0 +1,207 @@
+"""
+Full-text search plumbing for products.
+
+Postgres: `products.search_vector` is a generated tsvector column (name weighted
+above `search_text`) backed by a GIN index.
+SQLite:   `products_fts` is an external-content FTS5 table kept in sync by triggers.
+
+`products.search_text` (description, remark and category names) is maintained by
+the CRUD layer, so both backends only ever index columns of `products`.
+"""
+from sqlalchemy import inspect, text
+
+
+PG_DDL = [
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(search_text, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+    USING fts5(name, search_text, content='products', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, search_text)
+        VALUES (new.id, new.name, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, search_text)
+        VALUES ('delete', old.id, old.name, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, search_text)
+        VALUES ('delete', old.id, old.name, old.search_text);
+        INSERT INTO products_fts(rowid, name, search_text)
+        VALUES (new.id, new.name, new.search_text);
+    END
+    """,
+]
+
+
+def ensure_search_index(engine):
+    """Create the dialect specific search structures if they are missing."""
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            for stmt in PG_DDL:
+                conn.execute(text(stmt))
+
+        elif dialect == "sqlite":
+            is_new = "products_fts" not in inspect(conn).get_table_names()
+            for stmt in SQLITE_DDL:
+                conn.execute(text(stmt))
+            if is_new:
+                # index rows that existed before the FTS table did
+                conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def _fts5_query(q: str) -> str:
+    # quote every term so user input can't inject FTS5 syntax
+    terms = [t.replace('"', '""') for t in q.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def search_statement(dialect: str, q: str, filters: list[str]):
+    """
+    Build a `SELECT id, rank` statement for the given dialect, ordered best first.
+    `filters` are extra SQL predicates over `p` (products) and `r` (restaurants).
+    """
+    where = " AND ".join(filters)
+    where = f" AND {where}" if where else ""
+
+    if dialect == "postgresql":
+        sql = f"""
+            SELECT p.id, ts_rank(p.search_vector, query) AS rank
+            FROM products p
+            JOIN restaurants r ON r.id = p.restaurant_id,
+                 plainto_tsquery('simple', :q) query
+            WHERE p.search_vector @@ query{where}
+            ORDER BY rank DESC, p.id
+            LIMIT :limit OFFSET :skip
+        """
+        return text(sql), q
+
+    if dialect == "sqlite":
+        # bm25() is "lower is better"; name column weighted 10x
+        sql = f"""
+            SELECT p.id, -bm25(products_fts, 10.0, 1.0) AS rank
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            JOIN restaurants r ON r.id = p.restaurant_id
+            WHERE products_fts MATCH :q{where}
+            ORDER BY rank DESC, p.id
+            LIMIT :limit OFFSET :skip
+        """
+        return text(sql), _fts5_query(q)
+
+    raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+
+
+if __name__ == "__main__":
+    # Seed a synthetic catalogue and time ranked searches against it, e.g.
+    #   python -m app.db.search --seed 1000000 --repeat 50
+    #   python -m app.db.search --drop
+    # On Postgres the plan of the first query is printed: it should be a
+    # Bitmap Index Scan on ix_products_search_vector, not a Seq Scan.
+    import argparse
+    import random
+    import time
+
+    from sqlalchemy import delete, func, insert, select
+
+    from app.crud.crud import search_products
+    from app.db.session import SessionLocal, engine
+    from app.models.models import Product, Restaurant
+
+    WORDS = (
+        "paneer tikka masala butter chicken dal makhani biryani naan roti kulfi lassi "
+        "chai samosa dosa idli vada thali korma kebab saffron mango pista rabri"
+    ).split()
+    CITIES = ["PATNA", "GAYA", "DELHI", "PUNE", "GOA"]
+    BENCH_EMAIL = "search-bench-{}@example.invalid"
+
+    parser = argparse.ArgumentParser(description="Seed products and time full-text search")
+    parser.add_argument("--seed", type=int, default=0, help="products to insert first")
+    parser.add_argument("--per-restaurant", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--queries", nargs="*", default=["paneer", "butter chicken", "saffron kulfi", "dosa"])
+    parser.add_argument("--drop", action="store_true", help="delete the seeded data and exit")
+    args = parser.parse_args()
+
+    ensure_search_index(engine)
+    bench = Restaurant.email.like(BENCH_EMAIL.format("%"))
+
+    if args.drop:
+        with engine.begin() as conn:
+            ids = select(Restaurant.id).where(bench).scalar_subquery()
+            conn.execute(delete(Product).where(Product.restaurant_id.in_(ids)))
+            conn.execute(delete(Restaurant).where(bench))
+        raise SystemExit(0)
+
+    if args.seed:
+        rng = random.Random(42)
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            offset = conn.scalar(select(func.count()).select_from(Restaurant).where(bench))
+            restaurants = -(-args.seed // args.per_restaurant)
+            rest_ids = [
+                conn.execute(insert(Restaurant).values(
+                    name=f"Bench {offset + i}",
+                    email=BENCH_EMAIL.format(offset + i),
+                    password_hash="!",
+                    city_code=CITIES[i % len(CITIES)],
+                ).returning(Restaurant.id)).scalar_one()
+                for i in range(restaurants)
+            ]
+            batch = []
+            for n in range(args.seed):
+                batch.append({
+                    "restaurant_id": rest_ids[n // args.per_restaurant],
+                    "name": " ".join(rng.sample(WORDS, 2)).title(),
+                    "veg": rng.random() < 0.5,
+                    "available": rng.random() < 0.9,
+                    "iced": False,
+                    "search_text": " ".join(rng.sample(WORDS, 6)),
+                })
+                if len(batch) == 10000:
+                    conn.execute(insert(Product), batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(Product), batch)
+        print(f"seeded {args.seed} products in {time.perf_counter() - start:.1f} s")
+
+    db = SessionLocal()
+    try:
+        dialect = db.get_bind().dialect.name
+        total = db.scalar(select(func.count()).select_from(Product))
+        print(f"{dialect}: {total} products")
+        if dialect == "postgresql":
+            stmt, q = search_statement(dialect, args.queries[0], ["r.deleted_at IS NULL"])
+            plan = db.execute(
+                text(f"EXPLAIN (ANALYZE, BUFFERS) {stmt.text}"), {"q": q, "skip": 0, "limit": 20}
+            ).scalars()
+            print("\n".join(plan))
+
+        for q in args.queries:
+            search_products(db, q)   # warm up
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                hits = search_products(db, q)
+                db.expunge_all()
+            elapsed = (time.perf_counter() - start) / args.repeat
+            print(f"{q!r:<20} {elapsed * 1000:8.2f} ms/query  {len(hits)} hits")
+    finally:
+        db.close()
@@ -1,6 +1,16 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+
+from fastapi import Request
+from jose import jwt
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.events import on_restaurant_change
+
+logger = logging.getLogger(__name__)
 
 engine = create_engine(settings.DATABASE_URL, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
@@ -14,3 +24,132 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ============================
+# Read replicas
+# ============================
+# GET routes that use get_read_db read from a healthy replica, except for a
+# restaurant that wrote in the last REPLICA_STICKY_SECONDS: its reads stay on
+# the primary (read-your-writes). The restaurant comes from the path or the
+# caller's token.
+#
+# ⚠️ Stickiness is per process: the write is remembered by the worker that
+# handled it. With several workers (uvicorn --workers, several pods) a read
+# that lands on another worker may go to a replica and miss the write for up
+# to the replica's lag (at most REPLICA_MAX_LAG_SECONDS, see _check_replica).
+# Route a restaurant's requests to one worker, or keep
+# REPLICA_MAX_LAG_SECONDS small, when that matters.
+
+replica_engines = [
+    create_engine(url, future=True, pool_pre_ping=True)
+    for url in settings.DATABASE_REPLICA_URLS
+]
+ReadSessionLocal = sessionmaker(autoflush=False, autocommit=False, future=True)
+
+_replica_cycle = itertools.cycle(range(len(replica_engines)))
+_replica_health: dict[int, tuple[float, bool]] = {}   # index -> (checked_at, healthy)
+_last_write: dict[int, float] = {}                    # restaurant_id -> monotonic time
+_lock = threading.Lock()
+
+# Postgres: seconds the standby is behind (0 when it has replayed everything received)
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@on_restaurant_change
+def mark_restaurant_write(restaurant_id: int | None):
+    """
+    Record that a restaurant just wrote to the primary, so its reads stay on
+    the primary for REPLICA_STICKY_SECONDS (read-your-writes).
+    """
+    if restaurant_id is None:
+        return
+    with _lock:
+        _last_write[restaurant_id] = time.monotonic()
+
+
+def _recently_wrote(restaurant_id: int | None) -> bool:
+    if restaurant_id is None:
+        return False
+    written_at = _last_write.get(restaurant_id)
+    if written_at is None:
+        return False
+    if time.monotonic() - written_at < settings.REPLICA_STICKY_SECONDS:
+        return True
+    with _lock:
+        _last_write.pop(restaurant_id, None)
+    return False
+
+
+def _check_replica(index: int) -> bool:
+    replica = replica_engines[index]
+    try:
+        with replica.connect() as conn:
+            if replica.dialect.name == "postgresql":
+                lag = conn.execute(_PG_LAG_SQL).scalar() or 0
+                return float(lag) <= settings.REPLICA_MAX_LAG_SECONDS
+            conn.execute(text("SELECT 1"))
+            return True
+    except Exception as exc:
+        logger.warning("Replica %d unavailable: %s", index, exc.__class__.__name__)
+        return False
+
+
+def _replica_is_healthy(index: int) -> bool:
+    now = time.monotonic()
+    with _lock:
+        cached = _replica_health.get(index)
+    if cached and now - cached[0] < settings.REPLICA_HEALTH_INTERVAL:
+        return cached[1]
+
+    healthy = _check_replica(index)   # outside the lock: it's a round trip
+    with _lock:
+        _replica_health[index] = (now, healthy)
+    return healthy
+
+
+def pick_read_engine():
+    """Next healthy replica (round robin), or the primary if none are usable."""
+    for _ in range(len(replica_engines)):
+        with _lock:
+            index = next(_replica_cycle)
+        if _replica_is_healthy(index):
+            return replica_engines[index]
+    return engine
+
+
+def _requesting_restaurant_ids(request: Request) -> set[int]:
+    ids = set()
+    for key in ("rest_id", "restaurant_id"):
+        value = request.path_params.get(key)
+        if value is not None and str(value).isdigit():
+            ids.add(int(value))
+
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(auth[7:], settings.SECRET_KEY, algorithms=["HS256"])
+            if payload.get("restaurant_id") is not None:
+                ids.add(int(payload["restaurant_id"]))
+        except Exception:
+            pass
+    return ids
+
+
+# Read-only dependency for GET routes
+def get_read_db(request: Request):
+    if not replica_engines or any(
+        _recently_wrote(rid) for rid in _requesting_restaurant_ids(request)
+    ):
+        bind = engine
+    else:
+        bind = pick_read_engine()
+
+    db = ReadSessionLocal(bind=bind)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,16 +1,31 @@
+import anyio.to_thread
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.api.api_v1 import router as api_router
 from app.api.auth import router as auth_router
 from app.core.security import hash_password
 from app.db import session
 from app.db.session import SessionLocal, engine, Base
+from app.db.search import ensure_search_index
+from app.core.typeahead import restaurant_suggest_index
+from app.core.publisher import menu_publisher
+from app.core.admission import AdmissionControlMiddleware, render_metrics
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.orders import order_ingestor, render_order_metrics
+from app.core.analytics import menu_analytics
+from app.core.purge import restaurant_purger
 from app.core.config import settings
+from app.crud.crud import prune_tombstones
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.models.models import User
+from app.models.models import Restaurant, User
 
 app = FastAPI(title="Restaurant API")
+# Added before CORS so CORS stays outermost and 503s still carry CORS headers
+app.add_middleware(BodySizeLimitMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -25,17 +40,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Dynamic responses; cached payloads arrive precompressed and pass through untouched
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MIN_SIZE,
+    compresslevel=settings.GZIP_LEVEL,
+)
+
 app.include_router(api_router, prefix="/api/v1")
 app.include_router(auth_router)
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return render_metrics() + render_order_metrics()
+
+
 # Ensure uploads dir
 os.makedirs(settings.IMAGE_UPLOAD_DIR, exist_ok=True)
 
 
 @app.on_event("startup")
 def on_startup():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    menu_publisher.start()
+    order_ingestor.start()
+    menu_analytics.start()
+    restaurant_purger.start()
 
     db: session = SessionLocal()
     try:
@@ -60,6 +93,21 @@ def on_startup():
         else:
             print("ℹ️ Admin already exists")
 
+        prune_tombstones(db)
+
+        restaurant_suggest_index.build(
+            db.query(
+                Restaurant.id, Restaurant.name, Restaurant.city_code, Restaurant.location
+            ).filter(Restaurant.deleted_at.is_(None)).all()
+        )
+
     finally:
         db.close()
 
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    # flush orders accepted by the write-behind queue before exiting
+    order_ingestor.stop()
+    menu_analytics.stop()
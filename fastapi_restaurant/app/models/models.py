@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, DateTime, Float, Table
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Date, DateTime, Float, Numeric, Table
+from sqlalchemy import event, insert, select
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
 
 # Many-to-many if required between product and categories (optional)
 product_category = Table(
@@ -24,7 +26,7 @@ class Restaurant(Base):
     # 👇 NEW LOCATION FIELDS
     country_code = Column(String(5), nullable=True)   # e.g. IN
     state_code = Column(String(10), nullable=True)    # e.g. BR, KA
-    city_code = Column(String(50), nullable=True)     # e.g. PATNA
+    city_code = Column(String(50), nullable=True, index=True)  # e.g. PATNA
 
     location = Column(String(500))
     date_created = Column(DateTime, default=datetime.utcnow)
@@ -34,6 +36,15 @@ class Restaurant(Base):
     
     logo_url = Column(String(500), nullable=True)
 
+    # 👇 current live menu version (None = never published, menu is served from the draft rows)
+    published_version = Column(Integer, nullable=True)
+
+    # 👇 set by DELETE; hidden from all reads while app.core.purge removes its data
+    deleted_at = Column(DateTime, nullable=True, index=True)
+
+    # 👇 last change, for ?since= deltas
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     products = relationship("Product", back_populates="restaurant")
 
 
@@ -59,29 +70,58 @@ class Product(Base):
     iced = Column(Boolean, default=False)
     description = Column(Text)
 
+    # description + remark + category names, denormalised for full-text search
+    # (indexed by products.search_vector on Postgres / products_fts on SQLite)
+    search_text = Column(Text)
+
+    # 👇 also bumped when sizes / categories change (see _touch_product)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
     restaurant = relationship("Restaurant", back_populates="products")
-    categories = relationship("Category", secondary=product_category, back_populates="products")
+    # ordered like the SQL-built menu JSON (app.db.menu_json)
+    categories = relationship(
+        "Category", secondary=product_category, back_populates="products", order_by="Category.id"
+    )
 
     sizes = relationship(
         "ProductSize",
         back_populates="product",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="ProductSize.id",
     )
 
     images = relationship(
         "ProductImage",
         back_populates="product",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="ProductImage.id",
     )
 
+class ImageBlob(Base):
+    """One stored object per distinct image content, shared by every ProductImage using it."""
+    __tablename__ = "image_blobs"
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    url = Column(String(1024), nullable=False)
+    content_type = Column(String(50), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    date_created = Column(DateTime, default=datetime.utcnow)
+
+
 class ProductImage(Base):
     __tablename__ = "product_images"
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"))
     image_url = Column(String(1024), nullable=False)
+    # NULL for images uploaded before content-addressed storage
+    blob_id = Column(Integer, ForeignKey("image_blobs.id"), nullable=True, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     product = relationship("Product", back_populates="images")
+    blob = relationship("ImageBlob")
 
 
 class ProductSize(Base):
@@ -95,7 +135,8 @@ class ProductSize(Base):
     )
 
     size_label = Column(String(20), nullable=False)
-    price = Column(Float, nullable=False)
+    price = Column(Numeric(10, 2), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     product = relationship("Product", back_populates="sizes")
 
@@ -105,6 +146,97 @@ class ProductSize(Base):
     )
 
 
+class Tombstone(Base):
+    # a deleted product / size / image, so ?since= deltas can report deletions
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    restaurant_id = Column(Integer, nullable=False)   # no FK: removed by the purge
+    entity = Column(String(20), nullable=False)       # product | size | image
+    entity_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_tombstones_restaurant_deleted", "restaurant_id", "deleted_at"),
+    )
+
+
+class RestaurantPurge(Base):
+    # progress of a background restaurant purge; kept after the restaurant row is gone
+    __tablename__ = "restaurant_purges"
+
+    restaurant_id = Column(Integer, primary_key=True)
+    status = Column(String(20), nullable=False, default="pending")   # pending | running | done | failed
+    products_total = Column(Integer, nullable=False, default=0)
+    products_deleted = Column(Integer, nullable=False, default=0)
+    images_deleted = Column(Integer, nullable=False, default=0)
+    orders_deleted = Column(Integer, nullable=False, default=0)
+    error = Column(String(500), nullable=True)
+    requested_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class MenuVersion(Base):
+    # immutable snapshot of a restaurant's public menu, written by "publish"
+    __tablename__ = "menu_versions"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    # serialized PublicRestaurantView, stored as text so it is served byte for byte
+    payload = Column(Text, nullable=False)
+    product_count = Column(Integer, nullable=False, default=0)
+    published_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MenuDailyStat(Base):
+    # aggregated by app.core.analytics; product_id 0 = whole-menu hits (QR scans)
+    __tablename__ = "menu_daily_stats"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)   # no FK: stats outlive deleted products
+    views = Column(Integer, nullable=False, default=0)
+
+
+class Order(Base):
+    __tablename__ = "orders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # assigned when the order is accepted (or supplied by the client for
+    # idempotent retries), before the row exists; unique per restaurant
+    uid = Column(String(36), nullable=False)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False, index=True)
+    table_number = Column(Integer, nullable=True)
+    note = Column(String(500), nullable=True)
+    status = Column(String(20), nullable=False, default="new")
+    total = Column(Numeric(10, 2), nullable=False)
+    date_created = Column(DateTime, default=datetime.utcnow, index=True)
+
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("restaurant_id", "uid", name="uq_orders_restaurant_uid"),
+    )
+
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
+    size_id = Column(Integer, ForeignKey("product_sizes.id", ondelete="SET NULL"), nullable=True)
+
+    # snapshot of what was ordered, so later menu edits don't rewrite history
+    product_name = Column(String(255), nullable=False)
+    size_label = Column(String(20), nullable=False)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+    order = relationship("Order", back_populates="items")
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -115,3 +247,48 @@ class User(Base):
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=True)
 
     restaurant = relationship("Restaurant", backref="users")
+
+
+# ============================
+# Change tracking for ?since= deltas
+# ============================
+
+@event.listens_for(Product, "before_update")
+def _touch_product(mapper, connection, target):
+    # runs for collection-only changes too (sizes, categories), which onupdate
+    # misses; but also for any product merely marked dirty (a PATCH assigning
+    # the values it already had), which must not show up in every later delta
+    changed = any(
+        attr.history.has_changes()
+        for attr in sa_inspect(target).attrs
+        if attr.key != "updated_at"
+    )
+    if changed:
+        target.updated_at = datetime.utcnow()
+
+
+def _record_tombstone(entity: str):
+    def listener(mapper, connection, target):
+        if entity == "product":
+            product_id, restaurant_id = target.id, target.restaurant_id
+        else:
+            # children are deleted before their product, so the row is still there
+            product_id = target.product_id
+            restaurant_id = select(Product.restaurant_id).where(Product.id == product_id).scalar_subquery()
+        connection.execute(
+            insert(Tombstone).values(
+                restaurant_id=restaurant_id,
+                entity=entity,
+                entity_id=target.id,
+                product_id=product_id,
+                deleted_at=datetime.utcnow(),
+            )
+        )
+    return listener
+
+
+# ORM deletes only (including delete-orphan); bulk deletes in app.core.purge
+# remove the whole restaurant, tombstones included
+event.listen(Product, "after_delete", _record_tombstone("product"))
+event.listen(ProductSize, "after_delete", _record_tombstone("size"))
+event.listen(ProductImage, "after_delete", _record_tombstone("image"))
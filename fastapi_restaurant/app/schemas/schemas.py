@@ -1,14 +1,38 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+from pydantic import BaseModel, BeforeValidator, ConfigDict, EmailStr, Field, PlainSerializer, TypeAdapter, create_model
+from typing import Annotated, List, Literal, Optional
 
 
 # ============================
 # Product Size (Pricing)
 # ============================
 
+def _to_cents(value):
+    # float inputs go through str() so 19.99 stays 19.99, then round half up
+    if isinstance(value, (int, float, str)):
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation:
+            return value   # let the Decimal validator report it
+    if isinstance(value, Decimal) and value.is_finite():
+        return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return value
+
+
+# exact 2-decimal amounts in Python and the DB; still plain numbers in JSON
+Money = Annotated[
+    Decimal,
+    BeforeValidator(_to_cents),
+    Field(ge=0, max_digits=10, decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
+
 class ProductSizeCreate(BaseModel):
     size_label: str
-    price: float
+    price: Money
 
 
 class ProductSizeRead(ProductSizeCreate):
@@ -120,6 +144,26 @@ class RestaurantCreate(BaseModel):
 
 
 
+class BulkRestaurantRow(RestaurantCreate):
+    logo: Optional[str] = None   # file name of one of the uploaded logos
+    # logos come only from uploaded files, never from a URL in the file
+    logo_url: None = Field(None, exclude=True)
+
+
+class OnboardingRowResult(BaseModel):
+    row: int                     # 1-based position in the file
+    email: Optional[str] = None
+    status: Literal["created", "error"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class OnboardingReport(BaseModel):
+    created: int
+    failed: int
+    rows: List[OnboardingRowResult]
+
+
 class RestaurantRead(BaseModel):
     id: int
     name: str
@@ -138,6 +182,33 @@ class RestaurantRead(BaseModel):
         orm_mode = True
 
 
+class RestaurantSuggestion(BaseModel):
+    id: int
+    name: str
+    city_code: Optional[str]
+    location: Optional[str]
+
+
+class DirectoryCity(BaseModel):
+    code: Optional[str]
+    count: int
+    veg_count: int
+
+
+class DirectoryState(BaseModel):
+    code: Optional[str]
+    count: int
+    veg_count: int
+    cities: List[DirectoryCity] = []
+
+
+class DirectoryCountry(BaseModel):
+    code: Optional[str]
+    count: int
+    veg_count: int
+    states: List[DirectoryState] = []
+
+
 class RestaurantUpdate(BaseModel):
     name: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -196,4 +267,237 @@ class PublicRestaurantView(BaseModel):
     products: List[PublicProductRead]
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+# ============================
+# Product Search
+# ============================
+
+class ProductSearchHit(BaseModel):
+    product: PublicProductRead
+    restaurant_id: int
+    restaurant_name: str
+    city_code: Optional[str]
+    rank: float
+
+
+class ProductSearchResults(BaseModel):
+    q: str
+    skip: int
+    limit: int
+    items: List[ProductSearchHit]
+
+
+# ============================
+# Batch fetch
+# ============================
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class ProductBatch(BaseModel):
+    items: List[ProductRead]     # in the requested order
+    missing: List[int]
+
+
+
+# ============================
+# Orders
+# ============================
+
+class OrderItemCreate(BaseModel):
+    product_id: int
+    size_label: Optional[str] = None   # may be omitted for single-size products
+    quantity: int = Field(1, ge=1, le=100)
+
+
+class OrderCreate(BaseModel):
+    table_number: Optional[int] = Field(None, ge=1)
+    note: Optional[str] = Field(None, max_length=500)
+    client_order_id: Optional[str] = Field(None, min_length=8, max_length=36)
+    items: List[OrderItemCreate] = Field(..., min_length=1, max_length=100)
+
+
+class OrderItemRead(BaseModel):
+    product_id: Optional[int]
+    product_name: str
+    size_label: str
+    unit_price: Money
+    quantity: int
+
+    class Config:
+        orm_mode = True
+
+
+class OrderRead(BaseModel):
+    uid: str
+    restaurant_id: int
+    table_number: Optional[int]
+    note: Optional[str]
+    status: str
+    total: Money
+    date_created: Optional[datetime]
+    items: List[OrderItemRead] = []
+
+    class Config:
+        orm_mode = True
+
+
+# ============================
+# Menu versions
+# ============================
+
+class MenuVersionRead(BaseModel):
+    version: int
+    product_count: int
+    published_at: Optional[datetime]
+    live: bool = False
+
+    class Config:
+        orm_mode = True
+
+
+# ============================
+# Menu analytics
+# ============================
+
+class MenuViewsCreate(BaseModel):
+    product_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+
+class DailyScans(BaseModel):
+    day: date
+    scans: int
+
+
+class ProductViews(BaseModel):
+    product_id: int
+    name: Optional[str]
+    views: int
+
+
+class MenuAnalyticsRead(BaseModel):
+    days: int
+    total_scans: int
+    daily: List[DailyScans]
+    products: List[ProductViews]
+
+
+# ============================
+# Restaurant purge
+# ============================
+
+class RestaurantPurgeRead(BaseModel):
+    restaurant_id: int
+    status: str
+    products_total: int
+    products_deleted: int
+    images_deleted: int
+    orders_deleted: int
+    error: Optional[str]
+    requested_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+# ============================
+# Bulk repricing
+# ============================
+
+class PriceAdjustment(BaseModel):
+    category_id: Optional[int] = None       # only products in this category
+    size_label: Optional[str] = None        # only this size (e.g. "L")
+    mode: Literal["percent", "absolute"]
+    amount: Decimal = Field(..., max_digits=8, decimal_places=2)   # +5 = +5% or +5.00
+    round_to: Decimal = Field(Decimal("0.01"), gt=0, max_digits=6, decimal_places=2)
+    rounding: Literal["nearest", "up", "down"] = "nearest"
+    dry_run: bool = True
+
+
+class PriceChange(BaseModel):
+    size_id: int
+    product_id: int
+    product_name: str
+    size_label: str
+    old_price: Money
+    new_price: Money
+
+    class Config:
+        orm_mode = True
+
+
+class PriceAdjustmentResult(BaseModel):
+    applied: bool
+    count: int
+    changes: List[PriceChange]
+
+
+# ============================
+# Dashboard bootstrap
+# ============================
+
+class CategoryCount(BaseModel):
+    category_id: int
+    products: int
+    available: int
+
+
+class DashboardRead(BaseModel):
+    restaurant: RestaurantRead
+    published_version: Optional[int]
+    products: List[ProductRead]
+    categories: List[CategoryRead]
+    category_counts: List[CategoryCount]
+
+
+# ============================
+# Delta sync (?since=)
+# ============================
+
+class DeletedRecord(BaseModel):
+    entity: Literal["product", "size", "image"]
+    id: int
+    product_id: int
+
+
+class ProductDelta(BaseModel):
+    version: str                  # send back as ?since= next time
+    full: bool                    # true: replace the local list instead of merging
+    products: List[ProductRead]   # changed products, with all their sizes / images / categories
+    deleted: List[DeletedRecord]
+
+
+class PublicMenuDelta(BaseModel):
+    version: str
+    full: bool
+    restaurant: Optional[PublicRestaurantRead]   # only when it changed
+    products: List[PublicProductRead]
+    deleted: List[int]                           # product ids no longer on the menu
+
+
+# ============================
+# Sparse fieldsets (?fields= / ?include=)
+# ============================
+
+@lru_cache(maxsize=256)
+def _sparse_list_adapter(model: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    sparse = create_model(
+        f"{model.__name__}Sparse",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields},
+    )
+    return TypeAdapter(List[sparse])
+
+
+def dump_sparse_list(model: type[BaseModel], fields: tuple[str, ...], rows) -> bytes:
+    """
+    JSON for a list of ORM rows as `model` trimmed to `fields`. Only those
+    attributes are read, so columns left out by load_only and relationships
+    that weren't loaded are never touched.
+    """
+    adapter = _sparse_list_adapter(model, fields)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
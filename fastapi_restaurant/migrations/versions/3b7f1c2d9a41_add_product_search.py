@@ -0,0 +1,54 @@
+"""add product full-text search
+
+Revision ID: 3b7f1c2d9a41
+Revises: ecaedef2d784
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7f1c2d9a41'
+down_revision: Union[str, Sequence[str], None] = 'ecaedef2d784'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('search_text', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_restaurants_city_code'), 'restaurants', ['city_code'], unique=False)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # backfill description + remark + category names
+    op.execute("""
+        UPDATE products p SET search_text = concat_ws(' ', p.description, p.remark, (
+            SELECT string_agg(c.name, ' ')
+            FROM product_category pc JOIN categories c ON c.id = pc.category_id
+            WHERE pc.product_id = p.id
+        ))
+    """)
+    op.execute("""
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(search_text, '')), 'B')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_products_search_vector ON products USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+        op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+
+    op.drop_index(op.f('ix_restaurants_city_code'), table_name='restaurants')
+    op.drop_column('products', 'search_text')
@@ -0,0 +1,38 @@
+"""add menu versions
+
+Revision ID: 5d8f2b6e9a17
+Revises: c4a9e7b1d352
+Create Date: 2026-10-19 15:02:41.508163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f2b6e9a17'
+down_revision: Union[str, Sequence[str], None] = 'c4a9e7b1d352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('menu_versions',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('restaurant_id', 'version')
+    )
+    op.add_column('restaurants', sa.Column('published_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('restaurants', 'published_version')
+    op.drop_table('menu_versions')
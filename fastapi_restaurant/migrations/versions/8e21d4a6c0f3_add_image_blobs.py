@@ -0,0 +1,44 @@
+"""add content addressed image blobs
+
+Revision ID: 8e21d4a6c0f3
+Revises: 3b7f1c2d9a41
+Create Date: 2026-10-19 11:02:17.530911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e21d4a6c0f3'
+down_revision: Union[str, Sequence[str], None] = '3b7f1c2d9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.String(length=1024), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    op.add_column('product_images', sa.Column('blob_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_product_images_blob_id'), 'product_images', ['blob_id'], unique=False)
+    op.create_foreign_key('fk_product_images_blob_id', 'product_images', 'image_blobs', ['blob_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_product_images_blob_id', 'product_images', type_='foreignkey')
+    op.drop_index(op.f('ix_product_images_blob_id'), table_name='product_images')
+    op.drop_column('product_images', 'blob_id')
+    op.drop_table('image_blobs')
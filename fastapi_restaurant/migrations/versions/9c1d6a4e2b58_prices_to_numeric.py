@@ -0,0 +1,49 @@
+"""store prices as numeric(10, 2)
+
+Revision ID: 9c1d6a4e2b58
+Revises: e2b94f7c3a06
+Create Date: 2026-10-19 18:04:27.339120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1d6a4e2b58'
+down_revision: Union[str, Sequence[str], None] = 'e2b94f7c3a06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY_COLUMNS = [
+    ('product_sizes', 'price'),
+    ('orders', 'total'),
+    ('order_items', 'unit_price'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in MONEY_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Float(),
+                type_=sa.Numeric(precision=10, scale=2),
+                existing_nullable=False,
+                postgresql_using=f'round({column}::numeric, 2)',
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in MONEY_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Numeric(precision=10, scale=2),
+                type_=sa.Float(),
+                existing_nullable=False,
+            )
@@ -0,0 +1,53 @@
+"""add updated_at and tombstones for delta sync
+
+Revision ID: b8f31d7c5a94
+Revises: 9c1d6a4e2b58
+Create Date: 2026-10-19 21:02:37.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8f31d7c5a94'
+down_revision: Union[str, Sequence[str], None] = '9c1d6a4e2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('restaurants', 'products', 'product_sizes', 'product_images')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_restaurant_deleted', 'tombstones', ['restaurant_id', 'deleted_at'], unique=False)
+
+    # updated_at holds naive UTC (datetime.utcnow); CURRENT_TIMESTAMP on Postgres
+    # is in the session time zone, so ask for UTC explicitly
+    # (SQLite's CURRENT_TIMESTAMP already is UTC)
+    now_utc = "timezone('utc', now())" if op.get_bind().dialect.name == 'postgresql' else 'CURRENT_TIMESTAMP'
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # existing rows count as changed now: the first delta after upgrade is a full one
+        op.execute(sa.text(f"UPDATE {table} SET updated_at = {now_utc}"))
+    op.create_index(op.f('ix_products_updated_at'), 'products', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_products_updated_at'), table_name='products')
+    for table in reversed(TABLES):
+        op.drop_column(table, 'updated_at')
+    op.drop_index('ix_tombstones_restaurant_deleted', table_name='tombstones')
+    op.drop_table('tombstones')
@@ -0,0 +1,31 @@
+"""scope order uid uniqueness to the restaurant
+
+Revision ID: d7a2c5e8f013
+Revises: b8f31d7c5a94
+Create Date: 2026-10-19 23:12:48.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a2c5e8f013'
+down_revision: Union[str, Sequence[str], None] = 'b8f31d7c5a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # client_order_id is chosen by the client; two restaurants may well see the same one
+    op.drop_constraint('orders_uid_key', 'orders', type_='unique')
+    op.create_unique_constraint('uq_orders_restaurant_uid', 'orders', ['restaurant_id', 'uid'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_orders_restaurant_uid', 'orders', type_='unique')
+    op.create_unique_constraint('orders_uid_key', 'orders', ['uid'])
@@ -0,0 +1,43 @@
+"""add restaurant soft delete and purges
+
+Revision ID: e2b94f7c3a06
+Revises: a7e3c5d1f820
+Create Date: 2026-10-19 17:18:55.061247
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b94f7c3a06'
+down_revision: Union[str, Sequence[str], None] = 'a7e3c5d1f820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('restaurant_purges',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('products_total', sa.Integer(), nullable=False),
+    sa.Column('products_deleted', sa.Integer(), nullable=False),
+    sa.Column('images_deleted', sa.Integer(), nullable=False),
+    sa.Column('orders_deleted', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(length=500), nullable=True),
+    sa.Column('requested_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('restaurant_id')
+    )
+    op.add_column('restaurants', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_restaurants_deleted_at'), 'restaurants', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_restaurants_deleted_at'), table_name='restaurants')
+    op.drop_column('restaurants', 'deleted_at')
+    op.drop_table('restaurant_purges')
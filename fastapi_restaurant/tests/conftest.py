@@ -0,0 +1,145 @@
+"""
+Shared fixtures.
+
+Settings are read when `app.core.config` is imported, so the environment is
+set here first: a throwaway SQLite database, a dummy bucket and a known admin.
+The boto3 client is swapped for a MagicMock, so nothing leaves the machine.
+
+Run from fastapi_restaurant/:
+
+    python -m pytest -q
+"""
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import pytest
+
+TMP_DIR = tempfile.mkdtemp(prefix="qr-menu-tests-")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(TMP_DIR, 'app.db')}",
+    "SECRET_KEY": "test-secret",
+    "AWS_ACCESS_KEY_ID": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "AWS_REGION": "us-east-1",
+    "AWS_S3_BUCKET": "test-bucket",
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ADMIN_PASSWORD": "admin-pw",
+    "IMAGE_UPLOAD_DIR": os.path.join(TMP_DIR, "uploads"),
+    "IMAGE_CACHE_DIR": os.path.join(TMP_DIR, "uploads", "variants"),
+    "QR_CACHE_DIR": os.path.join(TMP_DIR, "uploads", "qr"),
+    "LOCAL_STORAGE_DIR": os.path.join(TMP_DIR, "storage"),
+})
+
+from sqlalchemy import event  # noqa: E402
+
+import app.core.s3 as s3_module  # noqa: E402
+from app.db import session as db_session  # noqa: E402
+
+s3_module.s3 = mock.MagicMock()
+
+
+@event.listens_for(db_session.engine, "connect")
+def _sqlite_foreign_keys(dbapi_conn, _):
+    # behave like Postgres: a dangling foreign key is an error
+    dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+
+from fastapi.testclient import TestClient  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+_emails = itertools.count(1)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def s3():
+    s3_module.s3.reset_mock()
+    return s3_module.s3
+
+
+@pytest.fixture
+def db():
+    session = db_session.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def login(client, username: str, password: str) -> dict:
+    res = client.post("/auth/login", json={"username": username, "password": password})
+    assert res.status_code == 200, res.text
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return login(client, "admin", "admin-pw")
+
+
+@pytest.fixture
+def make_restaurant(client, admin_headers):
+    """Create a restaurant; returns (id, owner auth headers)."""
+    def make(**fields):
+        email = f"owner{next(_emails)}@example.com"
+        data = {
+            "name": "Spice Hub",
+            "email": email,
+            "password": "owner-pw",
+            "country_code": "IN",
+            "state_code": "BR",
+            "city_code": "PATNA",
+            "location": "Main Road",
+            "type": "Cafe",
+            **fields,
+        }
+        res = client.post("/api/v1/restaurants/", data=data, headers=admin_headers)
+        assert res.status_code == 200, res.text
+        return res.json()["id"], login(client, data["email"], data["password"])
+    return make
+
+
+@pytest.fixture
+def make_product(client):
+    """Create a product; returns its ProductRead JSON."""
+    def make(rest_id: int, headers: dict, images=(), **fields):
+        product = {
+            "name": "Paneer Tikka",
+            "sizes": [{"size_label": "Half", "price": 100}, {"size_label": "Full", "price": 180}],
+            "category_ids": [],
+            **fields,
+        }
+        files = [("images", (f"img{i}.png", data, "image/png")) for i, data in enumerate(images)]
+        res = client.post(
+            f"/api/v1/restaurants/{rest_id}/products/",
+            data={"product": json.dumps(product)},
+            files=files or None,
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+        return res.json()
+    return make
+
+
+def png_bytes(color=(200, 30, 30), size=(8, 8)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
@@ -0,0 +1,152 @@
+import asyncio
+
+from app.core import admission
+from app.core.admission import AdmissionControlMiddleware, RouteClassLimiter, classify, limiters, render_metrics
+from app.core.config import settings
+
+AUTH = {b"authorization": b"Bearer x"}
+
+
+def test_orders_stream_has_its_own_class():
+    assert classify("GET", "/api/v1/restaurants/7/orders/stream", AUTH) == "stream"
+    assert classify("GET", "/api/v1/restaurants/7/orders", AUTH) == "dashboard_read"
+    assert "stream" in limiters
+
+
+def test_other_classes_unchanged():
+    assert classify("POST", "/api/v1/restaurants/7/orders", {}) == "write"
+    assert classify("POST", "/api/v1/products/batch", {}) == "public_read"
+    assert classify("GET", "/api/v1/public/restaurants/x", AUTH) == "public_read"
+    assert classify("POST", "/auth/login", {}) == "auth"
+    assert classify("GET", "/metrics", {}) is None
+
+
+def test_full_stream_class_rejects_without_queueing():
+    async def scenario():
+        limiter = RouteClassLimiter("stream", concurrency=1, queue=0, timeout=1.0)
+        assert await limiter.acquire()
+        assert not await limiter.acquire()   # second stream: straight 503
+        limiter.release()
+        assert await limiter.acquire()
+        return limiter.rejected
+
+    assert asyncio.run(scenario()) == 1
+
+
+def _limiters(**overrides):
+    limits = {
+        "public_read": {"concurrency": 2, "queue": 2, "timeout": 1.0},
+        "write": {"concurrency": 1, "queue": 1, "timeout": 1.0},
+    }
+    for name, values in overrides.items():
+        limits[name].update(values)
+    return {name: RouteClassLimiter(name, **values) for name, values in limits.items()}
+
+
+class HeldApp:
+    """An ASGI app whose write requests run until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def __call__(self, scope, receive, send):
+        self.started += 1
+        if scope["method"] == "POST":
+            await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _call(app, method: str, path: str) -> tuple[int, dict]:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+WRITE = ("POST", "/api/v1/restaurants/7/products/")
+PUBLIC = ("GET", "/api/v1/public/in/br/patna/spice")
+
+
+def test_busy_write_class_does_not_block_public_reads(monkeypatch):
+    monkeypatch.setattr(admission, "limiters", _limiters())
+
+    async def scenario():
+        inner = HeldApp()
+        app = AdmissionControlMiddleware(inner)
+        upload = asyncio.create_task(_call(app, *WRITE))
+        await _settle()
+        assert admission.limiters["write"].in_flight == 1
+
+        public = await asyncio.wait_for(_call(app, *PUBLIC), 1.0)   # not stuck behind the write
+        inner.release.set()
+        return public, await upload
+
+    (public_status, _), (write_status, _) = asyncio.run(scenario())
+    assert (public_status, write_status) == (200, 200)
+
+
+def test_full_queue_is_503_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "limiters", _limiters())
+    monkeypatch.setattr(settings, "ADMISSION_RETRY_AFTER", 3)
+
+    async def scenario():
+        inner = HeldApp()
+        app = AdmissionControlMiddleware(inner)
+        running = asyncio.create_task(_call(app, *WRITE))
+        await _settle()
+        queued = asyncio.create_task(_call(app, *WRITE))
+        await _settle()
+        depth = render_metrics()
+
+        rejected = await _call(app, *WRITE)   # slot busy, queue full: no waiting
+
+        inner.release.set()
+        return depth, rejected, await running, await queued, render_metrics()
+
+    depth, (status, headers), first, second, after = asyncio.run(scenario())
+    assert (status, headers[b"retry-after"], headers[b"x-route-class"]) == (503, b"3", b"write")
+    assert (first[0], second[0]) == (200, 200)   # the queued request ran once the slot freed
+    assert 'admission_queue_depth{route_class="write"} 1' in depth
+    assert 'admission_in_flight{route_class="write"} 1' in depth
+    assert 'admission_rejected_total{route_class="write"} 1' in after
+    assert 'admission_admitted_total{route_class="write"} 2' in after
+    assert 'admission_queue_depth{route_class="write"} 0' in after
+
+
+def test_queued_request_times_out_with_503(monkeypatch):
+    monkeypatch.setattr(admission, "limiters", _limiters(write={"timeout": 0.05}))
+
+    async def scenario():
+        inner = HeldApp()
+        app = AdmissionControlMiddleware(inner)
+        running = asyncio.create_task(_call(app, *WRITE))
+        await _settle()
+        timed_out = await _call(app, *WRITE)
+        inner.release.set()
+        await running
+        return timed_out, inner.started
+
+    (status, _), started = asyncio.run(scenario())
+    assert status == 503
+    assert started == 1   # the rejected request never reached the app
+
+
+def test_metrics_endpoint_reports_every_class(client):
+    text = client.get("/metrics").text
+
+    for route_class in settings.ADMISSION_LIMITS:
+        assert f'admission_queue_depth{{route_class="{route_class}"}}' in text
+        assert f'admission_rejected_total{{route_class="{route_class}"}}' in text
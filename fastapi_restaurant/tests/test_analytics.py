@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from app.core.analytics import MENU_SCAN, MenuAnalytics, menu_analytics
+from app.core.config import settings
+from app.models.models import MenuDailyStat
+
+
+def _stats(db, rest_id: int) -> dict:
+    db.expire_all()
+    rows = db.query(MenuDailyStat).filter(MenuDailyStat.restaurant_id == rest_id)
+    return {(r.day, r.product_id): r.views for r in rows}
+
+
+def test_scans_and_views_reach_the_report(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    tikka = make_product(rest_id, headers)
+    kulfi = make_product(rest_id, headers, name="Kulfi")
+    identifier = client.get(f"/api/v1/restaurants/{rest_id}").json()["email"].split("@")[0]
+
+    for _ in range(2):
+        assert client.get(f"/api/v1/public/in/br/patna/{identifier}").status_code == 200
+    for product_ids in ([tikka["id"], tikka["id"]], [tikka["id"], kulfi["id"], 10 ** 6]):
+        res = client.post(f"/api/v1/restaurants/{rest_id}/menu/views", json={"product_ids": product_ids})
+        assert res.status_code == 204
+    menu_analytics.flush()
+
+    report = client.get(f"/api/v1/restaurants/{rest_id}/analytics", params={"days": 7}, headers=headers).json()
+
+    assert report["total_scans"] == 2
+    assert report["daily"] == [{"day": datetime.utcnow().date().isoformat(), "scans": 2}]
+    # repeated ids in one beacon count once; products not on the menu are ignored
+    assert report["products"] == [
+        {"product_id": tikka["id"], "name": "Paneer Tikka", "views": 2},
+        {"product_id": kulfi["id"], "name": "Kulfi", "views": 1},
+    ]
+
+
+def test_flushes_add_to_the_same_row(db, make_restaurant):
+    rest_id, _ = make_restaurant()
+    analytics = MenuAnalytics()
+    today = datetime.utcnow().date()
+
+    for hits in (3, 2):
+        for _ in range(hits):
+            analytics.record_scan(rest_id)
+        analytics.record_views(rest_id, [7])
+        analytics.flush()
+
+    assert _stats(db, rest_id) == {(today, MENU_SCAN): 5, (today, 7): 2}
+
+
+def test_hits_for_a_deleted_restaurant_are_dropped(db, make_restaurant):
+    rest_id, _ = make_restaurant()
+    analytics = MenuAnalytics()
+    analytics.record_scan(rest_id)
+    analytics.record_scan(10 ** 6)   # no such restaurant: the batch hits the foreign key
+
+    analytics.flush()
+
+    assert _stats(db, rest_id) == {(datetime.utcnow().date(), MENU_SCAN): 1}
+    assert _stats(db, 10 ** 6) == {}
+
+
+def test_counter_table_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_MAX_KEYS", 2)
+    analytics = MenuAnalytics()
+
+    analytics.record_views(1, [1, 2, 3])
+    analytics.record_views(1, [1])
+
+    assert analytics.dropped == 1
+    assert sorted(analytics._counts.values()) == [1, 2]   # known keys still count
+    assert analytics._wake.is_set()   # the flusher is woken early
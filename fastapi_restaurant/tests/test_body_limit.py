@@ -0,0 +1,56 @@
+import pytest
+
+from app.core.config import settings
+
+BOUNDARY = "limit-test"
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_REQUEST_BYTES", 64 * 1024)
+
+
+def _multipart_chunks(total: int, chunk: int = 8 * 1024):
+    """A multipart body with one big file field, streamed without a Content-Length."""
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="logo"; filename="big.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode()
+    sent = 0
+    while sent < total:
+        yield b"x" * chunk
+        sent += chunk
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def test_chunked_body_over_limit_is_413(client, admin_headers, small_limit):
+    res = client.post(
+        "/api/v1/restaurants/",
+        content=_multipart_chunks(256 * 1024),
+        headers={**admin_headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert res.status_code == 413
+    assert res.json() == {"detail": "Request body too large"}
+
+
+def test_declared_length_over_limit_is_413(client, admin_headers, small_limit):
+    res = client.post(
+        "/api/v1/restaurants/",
+        content=b"x" * (128 * 1024),
+        headers={**admin_headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert res.status_code == 413
+
+
+def test_chunked_body_under_limit_reaches_the_route(client, admin_headers, small_limit):
+    res = client.post(
+        "/api/v1/restaurants/",
+        content=_multipart_chunks(16 * 1024),
+        headers={**admin_headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    # parsed and validated by the route: the required fields are missing
+    assert res.status_code == 422
@@ -0,0 +1,71 @@
+import pytest
+from starlette.requests import Request
+
+from app.core.cache import CachedBody, cached_response, if_none_match, pick_encoding
+
+
+def _request(**headers) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    })
+
+
+@pytest.fixture
+def entry():
+    return CachedBody(b'{"products": []}' * 100, "application/json", restaurant_id=1)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0.0, gzip", "gzip"),
+    ("br; q=0 , gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0.8, gzip;q=0.8", "br"),
+    ("gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0, gzip", "gzip"),
+    ("identity", None),
+    ("br;q=oops, gzip", "gzip"),
+])
+def test_pick_encoding_honours_q_values(header, expected):
+    assert pick_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ('"x",W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ('"x", "y"', False),
+])
+def test_if_none_match(header, matches):
+    assert if_none_match(header, '"abc"') is matches
+
+
+def test_each_encoding_has_its_own_etag(entry):
+    identity = cached_response(_request(), entry)
+    br = cached_response(_request(accept_encoding="br"), entry)
+    gz = cached_response(_request(accept_encoding="gzip"), entry)
+
+    etags = {identity.headers["etag"], br.headers["etag"], gz.headers["etag"]}
+    assert len(etags) == 3
+    assert br.headers["content-encoding"] == "br"
+    assert "content-encoding" not in identity.headers
+
+
+def test_not_modified_only_for_the_same_representation(entry):
+    br_etag = cached_response(_request(accept_encoding="br"), entry).headers["etag"]
+
+    again = cached_response(_request(accept_encoding="br", if_none_match=f'"other", W/{br_etag}'), entry)
+    other_encoding = cached_response(_request(accept_encoding="gzip", if_none_match=br_etag), entry)
+
+    assert again.status_code == 304
+    assert other_encoding.status_code == 200
+    assert other_encoding.headers["content-encoding"] == "gzip"
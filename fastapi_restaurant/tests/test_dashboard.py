@@ -0,0 +1,83 @@
+import itertools
+import json
+import threading
+
+from sqlalchemy import event
+
+from app.db.session import engine
+
+_names = itertools.count(1)
+BACKGROUND = {"menu-publisher", "menu-analytics", "order-ingestor", "restaurant-purger"}
+
+
+def _dashboard(client, rest_id, headers, **extra):
+    return client.get(f"/api/v1/restaurants/{rest_id}/dashboard", headers={**headers, **extra})
+
+
+def test_payload_shape_and_counts(client, admin_headers, make_restaurant, make_product):
+    category = client.post(
+        "/api/v1/categories/", json={"name": f"Dashboard {next(_names)}"}, headers=admin_headers   # unique names
+    ).json()["id"]
+    rest_id, headers = make_restaurant()
+    first = make_product(rest_id, headers, category_ids=[category])
+    second = make_product(rest_id, headers, name="Kulfi", category_ids=[category], available=False)
+    make_product(rest_id, headers, name="Lassi")
+
+    res = _dashboard(client, rest_id, headers)
+
+    assert res.status_code == 200, res.text
+    assert res.headers["cache-control"] == "private, no-cache"
+    body = res.json()
+    assert set(body) == {"restaurant", "published_version", "products", "categories", "category_counts"}
+    assert body["restaurant"]["id"] == rest_id
+    assert body["published_version"] is None
+    assert [p["name"] for p in body["products"]] == ["Paneer Tikka", "Kulfi", "Lassi"]
+    assert body["products"][0] == client.get(f"/api/v1/products/{first['id']}").json()
+    assert category in [c["id"] for c in body["categories"]]
+    assert body["category_counts"] == [{"category_id": category, "products": 2, "available": 1}]
+    assert second["id"] in [p["id"] for p in body["products"]]   # unavailable products are listed too
+
+
+def test_query_count_does_not_grow_with_products(client, make_restaurant, make_product):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if threading.current_thread().name not in BACKGROUND and statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    def selects_for(count: int) -> int:
+        rest_id, headers = make_restaurant()
+        for i in range(count):
+            make_product(rest_id, headers, name=f"Dish {i}")
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            assert _dashboard(client, rest_id, headers).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return len(statements)
+
+    assert selects_for(1) == selects_for(6)
+
+
+def test_etag_spares_the_body_until_something_changes(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    etag = _dashboard(client, rest_id, headers).headers["etag"]
+
+    res = _dashboard(client, rest_id, headers, **{"If-None-Match": etag})
+    assert (res.status_code, res.content) == (304, b"")
+
+    client.patch(f"/api/v1/products/{product['id']}", data={"product": json.dumps({"name": "Tikka"})},
+                 headers=headers)
+    res = _dashboard(client, rest_id, headers, **{"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+    assert res.json()["products"][0]["name"] == "Tikka"
+
+
+def test_other_owners_are_refused(client, make_restaurant):
+    rest_id, _ = make_restaurant()
+    _, other_headers = make_restaurant()
+
+    assert _dashboard(client, rest_id, other_headers).status_code == 403
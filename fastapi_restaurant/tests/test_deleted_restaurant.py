@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.models import Restaurant
+
+
+@pytest.fixture
+def deleted_restaurant(db, make_restaurant, make_product):
+    """A soft-deleted restaurant whose rows the purge hasn't removed yet."""
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    db.get(Restaurant, rest_id).deleted_at = datetime.utcnow()
+    db.commit()
+    return rest_id, product
+
+
+def test_product_detail_is_gone(client, deleted_restaurant):
+    _, product = deleted_restaurant
+
+    assert client.get(f"/api/v1/products/{product['id']}").status_code == 404
+
+
+@pytest.mark.parametrize("query", ["", "?fields=id,name", "?since=0"])
+def test_product_list_is_empty(client, deleted_restaurant, query):
+    rest_id, _ = deleted_restaurant
+
+    body = client.get(f"/api/v1/restaurants/{rest_id}/products/{query}").json()
+
+    products = body["products"] if isinstance(body, dict) else body
+    assert products == []
+
+
+def test_live_restaurant_still_lists_products(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+
+    assert [p["id"] for p in client.get(f"/api/v1/restaurants/{rest_id}/products/").json()] == [product["id"]]
+    assert client.get(f"/api/v1/products/{product['id']}").status_code == 200
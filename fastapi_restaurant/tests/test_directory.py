@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+from app.core.directory import location_directory
+from app.crud.crud import count_restaurants_by_location
+
+_countries = itertools.count(1)
+
+
+@pytest.fixture
+def country():
+    """A country code no other test's restaurants use."""
+    return f"D{next(_countries)}"
+
+
+def _directory(client) -> list[dict]:
+    res = client.get("/api/v1/restaurants/directory")
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def _country(client, code) -> dict | None:
+    return next((c for c in _directory(client) if c["code"] == code), None)
+
+
+def _cities(node) -> dict:
+    return {
+        (state["code"], city["code"]): (city["count"], city["veg_count"])
+        for state in node["states"] for city in state["cities"]
+    }
+
+
+def test_counts_follow_creates(client, country, make_restaurant):
+    make_restaurant(country_code=country)
+    make_restaurant(country_code=country, pure_veg="true")
+    make_restaurant(country_code=country, state_code="JH", city_code="RANCHI")
+
+    node = _country(client, country)
+
+    assert (node["count"], node["veg_count"]) == (3, 1)
+    assert _cities(node) == {("BR", "PATNA"): (2, 1), ("JH", "RANCHI"): (1, 0)}
+    assert [(s["code"], s["count"]) for s in node["states"]] == [("BR", 2), ("JH", 1)]
+
+
+def test_counts_follow_moves_and_soft_deletes(client, db, country, admin_headers, make_restaurant):
+    stays, _ = make_restaurant(country_code=country, pure_veg="true")
+    moves, _ = make_restaurant(country_code=country)
+    _directory(client)   # warm the cached tree
+
+    res = client.patch(f"/api/v1/restaurants/{moves}", data={"city_code": "GAYA"}, headers=admin_headers)
+    assert res.status_code == 200, res.text
+    moved = _country(client, country)
+    assert _cities(moved) == {("BR", "GAYA"): (1, 0), ("BR", "PATNA"): (1, 1)}
+
+    # the in-place counts agree with a fresh grouped query
+    location_directory.load(count_restaurants_by_location(db))
+    assert _country(client, country) == moved
+
+    client.delete(f"/api/v1/restaurants/{stays}", headers=admin_headers)
+    assert _cities(_country(client, country)) == {("BR", "GAYA"): (1, 0)}
+
+    client.delete(f"/api/v1/restaurants/{moves}", headers=admin_headers)
+    assert _country(client, country) is None
@@ -0,0 +1,65 @@
+"""Object storage I/O must never run while the request holds a pooled connection."""
+import io
+import threading
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.crud import crud
+from app.db import session as db_session
+from app.models.models import ImageBlob
+from app.schemas.schemas import ProductCreate
+from tests.conftest import png_bytes
+
+
+@pytest.fixture
+def connections_held():
+    """Connections checked out per thread, kept current by pool events."""
+    held = Counter()
+
+    def checkout(dbapi_conn, record, proxy):
+        held[threading.get_ident()] += 1
+
+    def checkin(dbapi_conn, record):
+        held[threading.get_ident()] -= 1
+
+    event.listen(db_session.engine, "checkout", checkout)
+    event.listen(db_session.engine, "checkin", checkin)
+    yield held
+    event.remove(db_session.engine, "checkout", checkout)
+    event.remove(db_session.engine, "checkin", checkin)
+
+
+@pytest.fixture
+def puts(s3, connections_held):
+    """Connections the uploading thread held at each object PUT."""
+    seen = []
+    s3.put_object.side_effect = lambda **kw: seen.append(connections_held[threading.get_ident()])
+    yield seen
+    s3.put_object.side_effect = None
+
+
+def test_product_upload_holds_no_connection_during_put(puts, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+
+    make_product(rest_id, headers, images=[png_bytes((101, 1, 1)), png_bytes((102, 1, 1))])
+
+    assert puts == [0, 0]
+
+
+def test_blob_released_after_lookup_is_stored_after_commit(db, puts, make_restaurant):
+    rest_id, _ = make_restaurant()
+    data = png_bytes((103, 1, 1))
+    upload = SimpleNamespace(file=io.BytesIO(data))
+    uploads = crud.inspect_image_files([upload])
+
+    # as if upload_new_image_blobs had found the blob, which was released since:
+    # nothing was uploaded, and there is no row to take a reference on
+    product = crud.create_product(db, rest_id, ProductCreate(name="Lassi"), uploads, uploaded=set())
+
+    assert puts == [0]
+    blob = db.query(ImageBlob).filter(ImageBlob.sha256 == uploads[0].info.sha256).one()
+    assert blob.ref_count == 1
+    assert [img.image_url for img in product.images] == [blob.url]
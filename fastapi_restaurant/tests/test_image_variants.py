@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+from app.core.config import settings
+from app.core.images import UnsupportedImage, render_variant
+from tests.conftest import png_bytes
+
+HEIC = b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic" + b"\x00" * 64
+
+
+def _variant_path(image_id: int) -> str:
+    return f"/api/v1/images/{image_id}?w={settings.IMAGE_VARIANT_WIDTHS[0]}&format=webp"
+
+
+def test_png_variant_is_rendered(client, s3, make_restaurant, make_product):
+    data = png_bytes((60, 70, 80), size=(40, 40))
+    s3.get_object.side_effect = lambda **kw: {"Body": io.BytesIO(data)}
+    rest_id, headers = make_restaurant()
+    image = make_product(rest_id, headers, images=[data])["images"][0]
+
+    res = client.get(_variant_path(image["id"]))
+
+    s3.get_object.side_effect = None
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/webp"
+
+
+def test_heic_upload_is_accepted_but_has_no_variants(client, s3, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    image = make_product(rest_id, headers, images=[HEIC])["images"][0]
+    assert image["image_url"].endswith(".heic")
+
+    res = client.get(_variant_path(image["id"]))
+
+    assert res.status_code == 415
+    s3.get_object.assert_not_called()   # refused before fetching the original
+
+
+def test_undecodable_original_raises_unsupported():
+    with pytest.raises(UnsupportedImage):
+        render_variant(b"\x89PNG\r\n\x1a\n" + b"garbage" * 10, 320, "webp")
@@ -0,0 +1,113 @@
+import itertools
+import json
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy.dialects import postgresql
+
+from app.crud.crud import get_products_by_restaurant, get_public_products, get_restaurant
+from app.db.menu_json import PG_PRODUCT_LIST, PG_PUBLIC_MENU, product_list_json, public_menu_json
+from app.schemas.schemas import ProductRead, PublicRestaurantView
+from tests.conftest import png_bytes
+
+
+_names = itertools.count(1)
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _json_objects(sql: str) -> set[tuple[str, ...]]:
+    """Key sequence of every json_build_object(...) call in `sql`."""
+    found = set()
+    start = sql.find("json_build_object(")
+    while start != -1:
+        i, depth, quoted, args, arg = start + len("json_build_object("), 1, False, [], ""
+        while depth:
+            ch = sql[i]
+            if ch == "'":
+                quoted = not quoted
+            elif not quoted and ch == "(":
+                depth += 1
+            elif not quoted and ch == ")":
+                depth -= 1
+            if not quoted and depth == 1 and ch == ",":
+                args.append(arg.strip())
+                arg = ""
+            elif depth:
+                arg += ch
+            i += 1
+        args.append(arg.strip())
+        found.add(tuple(key.strip("'") for key in args[::2]))
+        start = sql.find("json_build_object(", start + 1)
+    return found
+
+
+def _document_objects(value, found=None) -> set[tuple[str, ...]]:
+    """Key sequence of every object in a parsed JSON document."""
+    found = set() if found is None else found
+    if isinstance(value, dict):
+        found.add(tuple(value))
+        for item in value.values():
+            _document_objects(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _document_objects(item, found)
+    return found
+
+
+@pytest.fixture
+def full_menu(db, client, admin_headers, make_restaurant, make_product):
+    """A restaurant with sizes, images and two categories linked out of id order."""
+    names = [f"Parity {name} {next(_names)}" for name in ("Starters", "Mains")]   # unique names
+    first, second = (
+        client.post("/api/v1/categories/", json={"name": name}, headers=admin_headers).json()["id"]
+        for name in names
+    )
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers, images=[png_bytes((31, 32, 33)), png_bytes((34, 35, 36))],
+                 category_ids=[second, first], description="Smoky", remark="Chef's pick")
+    make_product(rest_id, headers, name="Kulfi", veg=True)
+    make_product(rest_id, headers, name="Sold out", available=False)
+    return get_restaurant(db, rest_id)
+
+
+@pytest.mark.parametrize("stmt", [PG_PUBLIC_MENU, PG_PRODUCT_LIST], ids=["public", "list"])
+def test_postgres_statements_compile(stmt):
+    sql = _compiled(stmt)
+
+    assert "%(rid)s" in sql and ":rid" not in sql
+    assert sql.count("json_agg(") == 4
+
+
+def test_public_menu_fallback_matches_the_schema(db, full_menu):
+    body, count = public_menu_json(db, full_menu)
+
+    expected = PublicRestaurantView.model_validate(
+        {"restaurant": full_menu, "products": get_public_products(db, full_menu.id)}, from_attributes=True
+    ).model_dump_json()
+    assert body.decode() == expected
+    assert count == 2
+
+    product = json.loads(body)["products"][0]
+    assert [c["id"] for c in product["categories"]] == sorted(c["id"] for c in product["categories"])
+    assert len(product["images"]) == 2 and len(product["sizes"]) == 2
+
+
+def test_public_menu_keys_match_the_sql(db, full_menu):
+    body, _ = public_menu_json(db, full_menu)
+
+    assert _document_objects(json.loads(body)) == _json_objects(_compiled(PG_PUBLIC_MENU))
+
+
+def test_product_list_fallback_matches_the_schema_and_the_sql(db, full_menu):
+    body = product_list_json(db, full_menu.id)
+
+    adapter = TypeAdapter(list[ProductRead])
+    expected = adapter.dump_json(
+        adapter.validate_python(get_products_by_restaurant(db, full_menu.id), from_attributes=True)
+    )
+    assert body == expected
+    assert len(json.loads(body)) == 3
+    assert _document_objects(json.loads(body)) == _json_objects(_compiled(PG_PRODUCT_LIST))
@@ -0,0 +1,76 @@
+import json
+
+
+def _public_path(client, rest_id: int) -> str:
+    identifier = client.get(f"/api/v1/restaurants/{rest_id}").json()["email"].split("@")[0]
+    return f"/api/v1/public/in/br/patna/{identifier}"
+
+
+def _public_names(client, path) -> list[str]:
+    res = client.get(path)
+    assert res.status_code == 200, res.text
+    return [p["name"] for p in res.json()["products"]]
+
+
+def _rename(client, product_id, headers, name):
+    res = client.patch(
+        f"/api/v1/products/{product_id}", data={"product": json.dumps({"name": name})}, headers=headers
+    )
+    assert res.status_code == 200, res.text
+
+
+def _publish(client, rest_id, headers) -> dict:
+    res = client.post(f"/api/v1/restaurants/{rest_id}/menu/publish", headers=headers)
+    assert res.status_code == 201, res.text
+    return res.json()
+
+
+def test_draft_edits_stay_private_until_published(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    make_product(rest_id, headers, name="Hidden", available=False)
+    path = _public_path(client, rest_id)
+
+    first = _publish(client, rest_id, headers)
+    _rename(client, product["id"], headers, "Paneer Tikka Masala")
+
+    assert (first["version"], first["product_count"], first["live"]) == (1, 1, True)
+    assert _public_names(client, path) == ["Paneer Tikka"]
+    draft = client.get(f"/api/v1/restaurants/{rest_id}/products/", headers=headers).json()
+    assert "Paneer Tikka Masala" in [p["name"] for p in draft]
+
+    assert _publish(client, rest_id, headers)["version"] == 2
+    assert _public_names(client, path) == ["Paneer Tikka Masala"]
+
+
+def test_rollback_moves_the_live_pointer(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    path = _public_path(client, rest_id)
+    _publish(client, rest_id, headers)
+    _rename(client, product["id"], headers, "Malai Tikka")
+    _publish(client, rest_id, headers)
+
+    res = client.post(f"/api/v1/restaurants/{rest_id}/menu/versions/1/activate", headers=headers)
+
+    assert res.status_code == 200, res.text
+    assert res.json()["version"] == 1
+    assert _public_names(client, path) == ["Paneer Tikka"]
+    versions = client.get(f"/api/v1/restaurants/{rest_id}/menu/versions", headers=headers).json()
+    assert [(v["version"], v["live"]) for v in versions] == [(2, False), (1, True)]
+
+    # rolling back changes nothing in the draft; the next publish is a new version
+    assert _publish(client, rest_id, headers)["version"] == 3
+    assert _public_names(client, path) == ["Malai Tikka"]
+
+
+def test_unknown_version_and_other_owners(client, make_restaurant):
+    rest_id, headers = make_restaurant()
+    _, other_headers = make_restaurant()
+
+    res = client.post(f"/api/v1/restaurants/{rest_id}/menu/versions/99/activate", headers=headers)
+    assert res.status_code == 404
+
+    res = client.post(f"/api/v1/restaurants/{rest_id}/menu/publish", headers=other_headers)
+    assert res.status_code == 403
+    assert client.get(f"/api/v1/restaurants/{rest_id}/menu/versions", headers=headers).json() == []
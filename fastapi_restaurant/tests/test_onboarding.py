@@ -0,0 +1,31 @@
+from app.core.onboarding import _insert, onboard_restaurants
+
+
+def _values(email: str, **fields) -> dict:
+    return {"name": "Branch", "email": email, "password_hash": "x", **fields}
+
+
+def test_batch_failure_reports_each_rows_own_reason(db, make_restaurant, client):
+    rest_id, _ = make_restaurant()
+    taken = client.get(f"/api/v1/restaurants/{rest_id}").json()["email"]
+
+    created, errors = _insert(db, [
+        (0, _values("branch-ok@example.com")),
+        (1, _values(taken)),
+        (2, _values("branch-bad@example.com", name=None)),
+    ])
+
+    assert list(created) == [0]
+    assert errors[1] == "Email already registered"
+    assert errors[2].startswith("Rejected by the database:")
+    assert "name" in errors[2]
+
+
+def test_rows_cannot_set_logo_url(db):
+    report = onboard_restaurants(db, [
+        {"name": "Branch", "email": "branch-logo@example.com", "password": "pw",
+         "logo_url": "https://elsewhere.example.com/logo.png"},
+    ], logos={})
+
+    assert report[0]["status"] == "error"
+    assert report[0]["detail"].startswith("logo_url:")
@@ -0,0 +1,134 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.core import orders
+from app.core.orders import _store, order_ingestor, order_stats
+from app.models.models import Order, OrderItem
+
+
+def _order(rest_id: int, uid: str | None = None, product_id=None, size_id=None) -> dict:
+    """Shaped like validate_order's result."""
+    return {
+        "uid": uid or str(uuid.uuid4()),
+        "restaurant_id": rest_id,
+        "table_number": 4,
+        "note": None,
+        "status": "new",
+        "total": Decimal("180.00"),
+        "date_created": datetime.utcnow(),
+        "items": [{
+            "product_id": product_id,
+            "size_id": size_id,
+            "product_name": "Paneer Tikka",
+            "size_label": "Full",
+            "unit_price": Decimal("180.00"),
+            "quantity": 1,
+        }],
+    }
+
+
+@pytest.fixture
+def restaurant_with_product(make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    return rest_id, headers, product
+
+
+def _stored_uids(db, rest_id: int) -> list[str]:
+    return [uid for (uid,) in db.query(Order.uid).filter(Order.restaurant_id == rest_id).order_by(Order.id)]
+
+
+def test_retried_client_order_id_is_stored_once(db, restaurant_with_product):
+    rest_id, _, product = restaurant_with_product
+    size_id = product["sizes"][0]["id"]
+    first, retry, other = (
+        _order(rest_id, "client-0001", product["id"], size_id),
+        _order(rest_id, "client-0001", product["id"], size_id),
+        _order(rest_id, "client-0002", product["id"], size_id),
+    )
+    duplicates = order_stats["duplicate"]
+
+    stored, failed = _store([first, retry, other])
+
+    assert [o["uid"] for o in stored] == ["client-0001", "client-0002"]
+    assert failed == []
+    assert order_stats["duplicate"] == duplicates + 1
+    assert _stored_uids(db, rest_id) == ["client-0001", "client-0002"]
+
+
+def test_client_order_id_is_unique_per_restaurant_only(db, make_restaurant):
+    first_id, _ = make_restaurant()
+    second_id, _ = make_restaurant()
+
+    stored, failed = _store([_order(first_id, "shared-uid-1"), _order(second_id, "shared-uid-1")])
+
+    assert len(stored) == 2 and failed == []
+    assert _stored_uids(db, first_id) == ["shared-uid-1"]
+    assert _stored_uids(db, second_id) == ["shared-uid-1"]
+
+
+def test_item_for_deleted_size_is_kept_without_the_reference(db, restaurant_with_product):
+    rest_id, _, product = restaurant_with_product
+    good = _order(rest_id, product_id=product["id"], size_id=product["sizes"][0]["id"])
+    stale = _order(rest_id, product_id=product["id"], size_id=987654)
+
+    stored, failed = _store([good, stale])
+
+    assert len(stored) == 2 and failed == []
+    item = (
+        db.query(OrderItem).join(Order)
+        .filter(Order.uid == stale["uid"], Order.restaurant_id == rest_id)
+        .one()
+    )
+    assert item.product_id == product["id"]
+    assert item.size_id is None
+    assert item.unit_price == Decimal("180.00")
+
+
+def test_unstorable_order_is_dead_lettered_alone(db, caplog, restaurant_with_product):
+    rest_id, _, product = restaurant_with_product
+    good = _order(rest_id, product_id=product["id"], size_id=product["sizes"][0]["id"])
+    orphan = _order(987654)   # restaurant gone since validation
+    lost = order_stats["dead_lettered"]
+
+    order_ingestor._flush([good, orphan])
+
+    assert _stored_uids(db, rest_id) == [good["uid"]]
+    assert order_stats["dead_lettered"] == lost + 1
+    lost_lines = [r.getMessage() for r in caplog.records if r.levelname == "ERROR"]
+    assert any(line.startswith(f'ORDER_LOST {{"uid": "{orphan["uid"]}"') for line in lost_lines)
+    assert not any(good["uid"] in line for line in lost_lines)
+
+
+def test_accepted_order_is_flushed_on_shutdown(client, db, restaurant_with_product):
+    rest_id, _, product = restaurant_with_product
+    body = {
+        "table_number": 2,
+        "client_order_id": "durable-0001",
+        "items": [{"product_id": product["id"], "size_label": "Full", "quantity": 2}],
+    }
+
+    assert client.post(f"/api/v1/restaurants/{rest_id}/orders", json=body).status_code == 202
+    assert client.post(f"/api/v1/restaurants/{rest_id}/orders", json=body).status_code == 202
+    order_ingestor.stop()   # graceful shutdown drains the queue
+    order_ingestor.start()
+
+    assert _stored_uids(db, rest_id) == ["durable-0001"]
+
+
+def test_inline_store_failure_fails_the_request(monkeypatch):
+    monkeypatch.setattr(orders.settings, "ORDER_WRITE_BEHIND", False)
+
+    with pytest.raises(orders.HTTPException) as exc:
+        order_ingestor.submit(_order(987654))
+    assert exc.value.status_code == 409
+
+
+def test_metrics_report_ingest_outcomes(client):
+    text = client.get("/metrics").text
+
+    assert 'orders_ingested_total{outcome="dead_lettered"}' in text
+    assert "orders_queue_depth " in text
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from app.models.models import Restaurant
+
+
+def test_batch_keeps_order_and_reports_missing(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    first, second = make_product(rest_id, headers), make_product(rest_id, headers, name="Kulfi")
+
+    body = client.get(f"/api/v1/products?ids={second['id']},987654,{first['id']},{second['id']}").json()
+
+    assert [p["id"] for p in body["items"]] == [second["id"], first["id"]]
+    assert body["missing"] == [987654]
+
+
+def test_unavailable_products_are_returned_flagged(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, available=False)
+
+    body = client.post("/api/v1/products/batch", json={"ids": [product["id"]]}).json()
+
+    assert [(p["id"], p["available"]) for p in body["items"]] == [(product["id"], False)]
+    assert body["missing"] == []
+
+
+def test_products_of_deleted_restaurant_are_missing(client, db, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    db.get(Restaurant, rest_id).deleted_at = datetime.utcnow()
+    db.commit()
+
+    body = client.post("/api/v1/products/batch", json={"ids": [product["id"]]}).json()
+
+    assert body == {"items": [], "missing": [product["id"]]}
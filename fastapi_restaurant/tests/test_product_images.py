@@ -0,0 +1,59 @@
+from app.models.models import ImageBlob, ProductImage
+from tests.conftest import png_bytes
+
+
+def _deleted_keys(s3) -> list[str]:
+    return [call.kwargs["Key"] for call in s3.delete_object.call_args_list]
+
+
+def test_deleting_last_reference_removes_row_then_object(client, db, s3, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, images=[png_bytes((1, 2, 3))])
+    image = product["images"][0]
+    blob_id = db.get(ProductImage, image["id"]).blob_id
+
+    res = client.delete(f"/api/v1/products/images/{image['id']}", headers=headers)
+
+    assert res.status_code in (200, 204), res.text
+    db.expire_all()
+    assert db.get(ProductImage, image["id"]) is None
+    assert db.get(ImageBlob, blob_id) is None
+    assert len(_deleted_keys(s3)) == 1
+    assert image["image_url"].endswith(_deleted_keys(s3)[0])
+
+
+def test_shared_blob_survives_until_last_reference(client, db, s3, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    data = png_bytes((4, 5, 6))
+    first = make_product(rest_id, headers, images=[data])["images"][0]
+    second = make_product(rest_id, headers, images=[data], name="Paneer Roll")["images"][0]
+    assert first["image_url"] == second["image_url"]
+
+    client.delete(f"/api/v1/products/images/{first['id']}", headers=headers)
+    assert _deleted_keys(s3) == []
+    db.expire_all()
+    assert db.query(ImageBlob).filter(ImageBlob.url == first["image_url"]).one().ref_count == 1
+
+    client.delete(f"/api/v1/products/images/{second['id']}", headers=headers)
+    assert len(_deleted_keys(s3)) == 1
+
+
+def test_failed_commit_keeps_the_object(db, s3, make_restaurant, make_product, monkeypatch):
+    from app.crud import crud
+
+    rest_id, headers = make_restaurant()
+    image_id = make_product(rest_id, headers, images=[png_bytes((7, 8, 9))])["images"][0]["id"]
+    image = db.get(ProductImage, image_id)
+
+    def failing_commit():
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    try:
+        crud.delete_product_image(db, image)
+    except RuntimeError:
+        pass
+    db.rollback()
+
+    assert _deleted_keys(s3) == []
+    assert db.get(ProductImage, image_id) is not None
@@ -0,0 +1,131 @@
+import itertools
+import json
+import re
+from collections import Counter
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+
+_names = itertools.count(1)
+WRITE = re.compile(r"^\s*(INSERT INTO|UPDATE|DELETE FROM)\s+\"?(\w+)", re.IGNORECASE)
+# background flushes (analytics, orders) may write meanwhile; only these tables count
+PRODUCT_TABLES = {"products", "product_sizes", "product_category", "product_images", "image_blobs", "tombstones"}
+
+
+@pytest.fixture
+def writes():
+    """(verb, table) -> count of the write statements sent while the test runs."""
+    seen = Counter()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        match = WRITE.match(statement)
+        if match and match.group(2) in PRODUCT_TABLES:
+            seen[(match.group(1).split()[0].upper(), match.group(2))] += 1
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def categories(client, admin_headers):
+    def make(name):
+        name = f"{name} {next(_names)}"   # category names are unique
+        res = client.post("/api/v1/categories/", json={"name": name}, headers=admin_headers)
+        assert res.status_code == 200, res.text
+        return res.json()["id"]
+    return make("Starters"), make("Mains")
+
+
+def _patch(client, product_id, headers, **fields):
+    res = client.patch(f"/api/v1/products/{product_id}", data={"product": json.dumps(fields)}, headers=headers)
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def _sizes(product) -> dict:
+    return {s["size_label"]: float(s["price"]) for s in product["sizes"]}
+
+
+HALF_FULL = [{"size_label": "Half", "price": 100}, {"size_label": "Full", "price": 180}]
+
+
+def test_changed_price_updates_one_size_row(client, writes, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    writes.clear()
+
+    updated = _patch(client, product["id"], headers, sizes=[HALF_FULL[0], {"size_label": "Full", "price": 200}])
+
+    assert writes == {("UPDATE", "product_sizes"): 1}
+    assert _sizes(updated) == {"Half": 100, "Full": 200}
+    assert {s["id"] for s in updated["sizes"]} == {s["id"] for s in product["sizes"]}
+
+
+def test_added_label_inserts_one_row(client, writes, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    writes.clear()
+
+    updated = _patch(client, product["id"], headers, sizes=[*HALF_FULL, {"size_label": "Family", "price": 320}])
+
+    assert writes == {("INSERT", "product_sizes"): 1, ("UPDATE", "products"): 1}   # updated_at
+    assert _sizes(updated) == {"Half": 100, "Full": 180, "Family": 320}
+
+
+def test_dropped_label_deletes_one_row(client, writes, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    writes.clear()
+
+    updated = _patch(client, product["id"], headers, sizes=HALF_FULL[1:])
+
+    assert writes == {
+        ("DELETE", "product_sizes"): 1,
+        ("INSERT", "tombstones"): 1,
+        ("UPDATE", "products"): 1,
+    }
+    assert _sizes(updated) == {"Full": 180}
+
+
+def test_category_swap_changes_only_the_association(client, writes, categories, make_restaurant, make_product):
+    starters, mains = categories
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, category_ids=[starters])
+    writes.clear()
+
+    updated = _patch(client, product["id"], headers, category_ids=[mains])
+
+    assert writes == {
+        ("DELETE", "product_category"): 1,
+        ("INSERT", "product_category"): 1,
+        ("UPDATE", "products"): 1,   # search_text holds category names
+    }
+    assert [c["id"] for c in updated["categories"]] == [mains]
+
+
+def test_noop_patch_writes_nothing(client, writes, categories, make_restaurant, make_product):
+    starters, _ = categories
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, category_ids=[starters])
+    writes.clear()
+
+    _patch(
+        client, product["id"], headers,
+        name=product["name"], available=product["available"], category_ids=[starters], sizes=HALF_FULL,
+    )
+
+    assert writes == {}
+
+
+def test_null_sizes_leave_sizes_alone(client, writes, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    writes.clear()
+
+    updated = _patch(client, product["id"], headers, sizes=None)
+
+    assert writes == {}
+    assert _sizes(updated) == {"Half": 100, "Full": 180}
@@ -0,0 +1,84 @@
+import json
+
+from app.core.cache import response_cache
+from app.core.config import settings
+
+
+def _delta_keys(identifier: str) -> set:
+    return {key[2] for key in response_cache._entries if key[:2] == ("public-delta", identifier)}
+
+
+def _public_path(identifier: str) -> str:
+    return f"/api/v1/public/in/br/patna/{identifier}"
+
+
+def _identifier(client, rest_id: int) -> str:
+    return client.get(f"/api/v1/restaurants/{rest_id}").json()["email"].split("@")[0]
+
+
+def test_time_tokens_are_not_cached(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers)
+    identifier = _identifier(client, rest_id)
+
+    full = client.get(_public_path(identifier), params={"since": "0"}).json()
+    assert full["full"] is True and full["version"].startswith("t")
+    for _ in range(3):
+        res = client.get(_public_path(identifier), params={"since": full["version"]})
+        assert res.status_code == 200 and res.json()["full"] is False
+
+    assert _delta_keys(identifier) == {None}
+
+
+def test_only_real_published_versions_are_cached(client, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers)
+    identifier = _identifier(client, rest_id)
+    client.post(f"/api/v1/restaurants/{rest_id}/menu/publish", headers=headers)
+    make_product(rest_id, headers, name="Kulfi")
+    client.post(f"/api/v1/restaurants/{rest_id}/menu/publish", headers=headers)
+
+    diff = client.get(_public_path(identifier), params={"since": "v1"}).json()
+    bogus = client.get(_public_path(identifier), params={"since": "v424242"}).json()
+
+    assert diff["full"] is False and [p["name"] for p in diff["products"]] == ["Kulfi"]
+    assert bogus["full"] is True
+    assert _delta_keys(identifier) == {("v", 1)}
+
+
+def test_invalid_token_is_400(client, make_restaurant):
+    rest_id, _ = make_restaurant()
+
+    res = client.get(_public_path(_identifier(client, rest_id)), params={"since": "x12"})
+
+    assert res.status_code == 400
+
+
+def _patch(client, product_id: int, headers: dict, **fields):
+    res = client.patch(
+        f"/api/v1/products/{product_id}", data={"product": json.dumps(fields)}, headers=headers
+    )
+    assert res.status_code == 200, res.text
+
+
+def test_noop_patch_leaves_the_delta_empty(client, make_restaurant, make_product, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_VERSION_LAG_SECONDS", 0)
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+    identifier = _identifier(client, rest_id)
+    version = client.get(_public_path(identifier), params={"since": "0"}).json()["version"]
+
+    _patch(
+        client, product["id"], headers,
+        name=product["name"], available=product["available"], category_ids=[],
+        sizes=[{"size_label": s["size_label"], "price": s["price"]} for s in product["sizes"]],
+    )
+
+    public = client.get(_public_path(identifier), params={"since": version}).json()
+    owner = client.get(f"/api/v1/restaurants/{rest_id}/products/", params={"since": version}).json()
+    assert (public["products"], public["deleted"]) == ([], [])
+    assert (owner["products"], owner["deleted"]) == ([], [])
+
+    _patch(client, product["id"], headers, available=False)
+    owner = client.get(f"/api/v1/restaurants/{rest_id}/products/", params={"since": version}).json()
+    assert [p["id"] for p in owner["products"]] == [product["id"]]
@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.config import settings
+
+
+@pytest.fixture
+def s3_target(monkeypatch):
+    monkeypatch.setattr(settings, "MENU_PUBLISH_TARGET", "s3")
+
+
+def _public_path(client, rest_id: int) -> str:
+    identifier = client.get(f"/api/v1/restaurants/{rest_id}").json()["email"].split("@")[0]
+    return f"/api/v1/public/in/br/patna/{identifier}"
+
+
+def test_unpublished_menu_is_served_from_the_database(client, s3_target, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers)
+
+    res = client.get(_public_path(client, rest_id), follow_redirects=False)
+
+    assert res.status_code == 200
+    assert [p["name"] for p in res.json()["products"]] == ["Paneer Tikka"]
+
+
+def test_unknown_restaurant_is_404_not_a_redirect(client, s3_target):
+    res = client.get("/api/v1/public/in/br/patna/nobody-here", follow_redirects=False)
+
+    assert res.status_code == 404
+
+
+def test_published_menu_redirects_to_the_static_copy(client, s3_target, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers)
+    path = _public_path(client, rest_id)
+    assert client.get(path, follow_redirects=False).status_code == 200
+
+    client.post(f"/api/v1/restaurants/{rest_id}/menu/publish", headers=headers)
+    res = client.get(path, follow_redirects=False)
+
+    assert res.status_code == 307
+    assert res.headers["location"].endswith(f"menus/{path.rsplit('/', 1)[1]}.json")
@@ -0,0 +1,106 @@
+import time
+from datetime import datetime
+
+from app.core import purge as purge_module
+from app.core.config import settings
+from app.core.purge import RestaurantPurger, restaurant_purger
+from app.db.session import SessionLocal
+from app.models.models import ImageBlob, Product, Restaurant, RestaurantPurge
+from tests.conftest import png_bytes
+
+
+def _deleted_keys(s3) -> list[str]:
+    return [call.kwargs["Key"] for call in s3.delete_object.call_args_list]
+
+
+def _purge(db, rest_id: int) -> RestaurantPurge:
+    db.expire_all()
+    return db.get(RestaurantPurge, rest_id)
+
+
+def _wait_for(db, rest_id: int, status: str = "done") -> RestaurantPurge:
+    # the app's purger runs in its own thread (started with the test client)
+    deadline = time.monotonic() + 5
+    while _purge(db, rest_id).status != status and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return _purge(db, rest_id)
+
+
+def test_purge_removes_rows_and_objects(client, db, s3, admin_headers, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    image = make_product(rest_id, headers, images=[png_bytes((11, 12, 13))])["images"][0]
+
+    assert client.delete(f"/api/v1/restaurants/{rest_id}", headers=admin_headers).status_code == 202
+
+    purge = _wait_for(db, rest_id)
+    assert (purge.status, purge.products_deleted, purge.images_deleted) == ("done", 1, 1)
+    assert db.get(Restaurant, rest_id) is None
+    assert db.query(Product).filter(Product.restaurant_id == rest_id).count() == 0
+    assert [image["image_url"].endswith(key) for key in _deleted_keys(s3)] == [True]
+
+
+def test_object_uploaded_again_during_the_purge_is_kept(
+    client, db, s3, admin_headers, make_restaurant, make_product, monkeypatch
+):
+    rest_id, headers = make_restaurant()
+    image = make_product(rest_id, headers, images=[png_bytes((21, 22, 23))])["images"][0]
+    blob = db.query(ImageBlob).filter(ImageBlob.url == image["image_url"]).one()
+    content = dict(sha256=blob.sha256, url=blob.url, content_type=blob.content_type, size=blob.size)
+    real_delete = purge_module.delete_released_objects
+
+    def upload_same_content_first(session, urls):
+        if content["url"] in urls:
+            # another restaurant uploads identical bytes between the batch commit and the delete
+            other = SessionLocal()
+            other.add(ImageBlob(ref_count=1, **content))
+            other.commit()
+            other.close()
+        real_delete(session, urls)
+
+    monkeypatch.setattr(purge_module, "delete_released_objects", upload_same_content_first)
+    client.delete(f"/api/v1/restaurants/{rest_id}", headers=admin_headers)
+
+    assert _wait_for(db, rest_id).status == "done"
+    assert _deleted_keys(s3) == []
+
+
+def test_failed_purge_is_retried_with_backoff(
+    db, admin_headers, client, make_restaurant, make_product, monkeypatch, caplog
+):
+    monkeypatch.setattr(settings, "PURGE_RETRY_SECONDS", 0.05)
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers)
+    make_product(rest_id, headers, name="Kulfi")
+    real_batch = purge_module._purge_product_batch
+    calls = []
+
+    def flaky_batch(session, restaurant_id):
+        calls.append(restaurant_id)
+        if len(calls) <= 2:
+            raise RuntimeError("connection reset")
+        return real_batch(session, restaurant_id)
+
+    monkeypatch.setattr(purge_module, "_purge_product_batch", flaky_batch)
+    client.delete(f"/api/v1/restaurants/{rest_id}", headers=admin_headers)
+
+    purge = _wait_for(db, rest_id)
+    assert purge.status == "done", purge.error
+    assert purge.products_deleted == 2
+    assert len(calls) >= 3   # two failures, then a batch per retry
+    assert rest_id not in restaurant_purger._failures
+    failures = [r for r in caplog.records if r.name == "app.core.purge" and r.levelname == "ERROR"]
+    assert [r.getMessage() for r in failures] == [f"Purge of restaurant {rest_id} failed"] * 2
+    assert "connection reset" in failures[0].exc_text
+
+
+def test_failed_purges_resume_at_startup(db, make_restaurant):
+    rest_id, _ = make_restaurant()
+    db.get(Restaurant, rest_id).deleted_at = datetime.utcnow()
+    db.merge(RestaurantPurge(restaurant_id=rest_id, status="failed", error="RuntimeError()"))   # ids are recycled on SQLite
+    db.commit()
+
+    RestaurantPurger().start()   # as after a restart
+
+    purge = _wait_for(db, rest_id)
+    assert purge.status == "done"
+    assert purge.error is None
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.core.publisher import identifier_for
+from app.core.qr import public_menu_link
+
+
+def test_link_uses_the_published_identifier():
+    restaurant = SimpleNamespace(
+        email="Spice.Hub@Example.com", country_code="IN", state_code="BR", city_code="PATNA",
+    )
+
+    link = public_menu_link(restaurant, table=4)
+
+    base = settings.PUBLIC_SITE_URL.rstrip("/")
+    assert link == f"{base}/IN/BR/PATNA/{identifier_for(restaurant)}?table=4"
+    assert identifier_for(restaurant) == "spice.hub"
@@ -0,0 +1,85 @@
+import itertools
+import os
+
+import pytest
+from jose import jwt
+from sqlalchemy import create_engine
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.db import session
+from app.db.session import Base
+from tests.conftest import TMP_DIR
+
+
+def _engine(name: str):
+    return create_engine(f"sqlite:///{os.path.join(TMP_DIR, name)}", future=True)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """A second, empty database standing in for a replica."""
+    engine = _engine("replica.db")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(session, "replica_engines", [engine])
+    monkeypatch.setattr(session, "_replica_cycle", itertools.cycle([0]))
+    monkeypatch.setattr(session, "_replica_health", {})
+    monkeypatch.setattr(session, "_last_write", {})
+    yield engine
+    engine.dispose()
+
+
+def _read_bind(path_params: dict | None = None, token_restaurant: int | None = None):
+    headers = []
+    if token_restaurant is not None:
+        token = jwt.encode({"restaurant_id": token_restaurant}, settings.SECRET_KEY, algorithm="HS256")
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    request = Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": headers, "path_params": path_params or {},
+    })
+    dependency = session.get_read_db(request)
+    bind = next(dependency).get_bind()
+    dependency.close()
+    return bind
+
+
+def test_reads_go_to_the_replica(replica):
+    assert _read_bind({"rest_id": 1}) is replica
+
+
+def test_recent_writer_reads_from_the_primary(replica):
+    session.mark_restaurant_write(7)
+
+    assert _read_bind({"rest_id": 7}) is session.engine
+    assert _read_bind(token_restaurant=7) is session.engine
+    assert _read_bind({"rest_id": 8}) is replica
+
+
+def test_stickiness_expires(replica, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_STICKY_SECONDS", 0)
+    session.mark_restaurant_write(7)
+
+    assert _read_bind({"rest_id": 7}) is replica
+
+
+def test_unreachable_replica_falls_back_to_the_primary(monkeypatch):
+    broken = create_engine(f"sqlite:///{os.path.join(TMP_DIR, 'missing', 'replica.db')}", future=True)
+    monkeypatch.setattr(session, "replica_engines", [broken])
+    monkeypatch.setattr(session, "_replica_cycle", itertools.cycle([0]))
+    monkeypatch.setattr(session, "_replica_health", {})
+
+    assert _read_bind({"rest_id": 1}) is session.engine
+    assert session._replica_health[0][1] is False
+
+
+def test_read_your_writes_across_two_databases(client, replica, monkeypatch, make_restaurant, make_product):
+    # the replica never receives the rows, like a replica lagging forever
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers)
+
+    listed = client.get(f"/api/v1/restaurants/{rest_id}/products/").json()
+    assert [p["id"] for p in listed] == [product["id"]]
+
+    monkeypatch.setattr(settings, "REPLICA_STICKY_SECONDS", 0)
+    assert client.get(f"/api/v1/restaurants/{rest_id}/products/").json() == []
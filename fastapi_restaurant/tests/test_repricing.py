@@ -0,0 +1,114 @@
+import itertools
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+
+_names = itertools.count(1)
+SIZE_UPDATE = re.compile(r"^\s*UPDATE\s+\"?product_sizes\b", re.IGNORECASE)
+
+
+def _adjust(client, rest_id, headers, **adjustment):
+    return client.post(f"/api/v1/restaurants/{rest_id}/prices/adjust", json=adjustment, headers=headers)
+
+
+def _prices(client, rest_id, headers) -> dict:
+    products = client.get(f"/api/v1/restaurants/{rest_id}/products/", headers=headers).json()
+    return {(p["name"], s["size_label"]): s["price"] for p in products for s in p["sizes"]}
+
+
+@pytest.fixture
+def menu(client, admin_headers, make_restaurant, make_product):
+    """(rest_id, headers, drinks category id): Tikka 100/180, Lassi 60/90 (drinks)."""
+    drinks = client.post(
+        "/api/v1/categories/", json={"name": f"Drinks {next(_names)}"}, headers=admin_headers   # unique names
+    ).json()["id"]
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers, name="Tikka")
+    make_product(rest_id, headers, name="Lassi", category_ids=[drinks], sizes=[
+        {"size_label": "Half", "price": 60}, {"size_label": "Full", "price": 90},
+    ])
+    return rest_id, headers, drinks
+
+
+def test_preview_changes_nothing(client, menu):
+    rest_id, headers, _ = menu
+    before = _prices(client, rest_id, headers)
+
+    res = _adjust(client, rest_id, headers, mode="percent", amount=5, round_to=0.5, rounding="up")
+
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert (body["applied"], body["count"]) == (False, 4)
+    assert [(c["product_name"], c["size_label"], c["old_price"], c["new_price"]) for c in body["changes"]] == [
+        ("Lassi", "Full", 90.0, 94.5),
+        ("Lassi", "Half", 60.0, 63.0),
+        ("Tikka", "Full", 180.0, 189.0),
+        ("Tikka", "Half", 100.0, 105.0),
+    ]
+    assert _prices(client, rest_id, headers) == before
+
+
+def test_apply_is_one_update(client, menu):
+    rest_id, headers, _ = menu
+    updates = []
+
+    def record(conn, cursor, statement, *args):
+        if SIZE_UPDATE.match(statement):
+            updates.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = _adjust(client, rest_id, headers, mode="absolute", amount=-10, dry_run=False)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert res.json()["applied"] is True
+    assert len(updates) == 1
+    assert _prices(client, rest_id, headers) == {
+        ("Tikka", "Half"): 90.0, ("Tikka", "Full"): 170.0, ("Lassi", "Half"): 50.0, ("Lassi", "Full"): 80.0,
+    }
+
+
+def test_category_and_size_filters(client, menu):
+    rest_id, headers, drinks = menu
+
+    res = _adjust(client, rest_id, headers, mode="percent", amount=10, category_id=drinks, size_label="Full",
+                  dry_run=False)
+
+    assert res.json()["count"] == 1
+    assert _prices(client, rest_id, headers)[("Lassi", "Full")] == 99.0
+    assert _prices(client, rest_id, headers)[("Tikka", "Full")] == 180.0
+
+
+@pytest.mark.parametrize("rounding, expected", [
+    ("nearest", {("Tikka", "Half"): 110.0, ("Tikka", "Full"): 190.0}),
+    ("down", {}),   # 105 -> 100 and 189 -> 180: nothing moves
+])
+def test_rounding_step(client, menu, rounding, expected):
+    rest_id, headers, _ = menu
+
+    res = _adjust(client, rest_id, headers, mode="percent", amount=5, round_to=10, rounding=rounding)
+
+    changes = {(c["product_name"], c["size_label"]): c["new_price"] for c in res.json()["changes"]}
+    assert {k: v for k, v in changes.items() if k[0] == "Tikka"} == expected
+
+
+def test_negative_result_is_refused(client, menu):
+    rest_id, headers, _ = menu
+    before = _prices(client, rest_id, headers)
+
+    res = _adjust(client, rest_id, headers, mode="absolute", amount=-70, dry_run=False)   # Lassi Half: 60
+
+    assert res.status_code == 400
+    assert res.json() == {"detail": "Adjustment would make 1 prices negative"}
+    assert _prices(client, rest_id, headers) == before
+
+
+def test_only_the_owner_can_reprice(client, menu, make_restaurant):
+    rest_id, _, _ = menu
+    _, other_headers = make_restaurant()
+
+    assert _adjust(client, rest_id, other_headers, mode="percent", amount=5).status_code == 403
@@ -0,0 +1,105 @@
+import itertools
+import json
+
+import pytest
+
+from app.models.models import Product
+
+_words = itertools.count(1)
+
+
+@pytest.fixture
+def word():
+    """A search term no other test's products contain."""
+    return f"zafran{next(_words)}x"
+
+
+def _search(client, q, **params) -> list[dict]:
+    res = client.get("/api/v1/products/search", params={"q": q, **params})
+    assert res.status_code == 200, res.text
+    return res.json()["items"]
+
+
+def _ids(items) -> list[int]:
+    return [item["product"]["id"] for item in items]
+
+
+def test_name_hit_ranks_above_description_hit(client, word, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    in_description = make_product(rest_id, headers, name="Plain Kulfi", description=f"topped with {word}")
+    in_name = make_product(rest_id, headers, name=f"{word} Kulfi")
+
+    items = _search(client, word)
+
+    assert _ids(items) == [in_name["id"], in_description["id"]]
+    assert items[0]["rank"] > items[1]["rank"]
+    assert items[0]["restaurant_id"] == rest_id and items[0]["city_code"] == "PATNA"
+
+
+def test_category_names_are_searchable(client, word, admin_headers, make_restaurant, make_product):
+    category = client.post("/api/v1/categories/", json={"name": f"{word} specials"}, headers=admin_headers).json()
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, category_ids=[category["id"]])
+
+    assert _ids(_search(client, word)) == [product["id"]]
+
+
+def test_filters(client, word, make_restaurant, make_product):
+    patna_id, patna = make_restaurant()
+    gaya_id, gaya = make_restaurant(city_code="GAYA")
+    veg = make_product(patna_id, patna, name=f"{word} Paneer", veg=True)
+    non_veg = make_product(patna_id, patna, name=f"{word} Chicken", veg=False)
+    sold_out = make_product(patna_id, patna, name=f"{word} Mutton", veg=False, available=False)
+    elsewhere = make_product(gaya_id, gaya, name=f"{word} Dal", veg=True)
+
+    assert set(_ids(_search(client, word))) == {veg["id"], non_veg["id"], elsewhere["id"]}
+    assert set(_ids(_search(client, word, city_code="GAYA"))) == {elsewhere["id"]}
+    assert set(_ids(_search(client, word, veg=True))) == {veg["id"], elsewhere["id"]}
+    assert set(_ids(_search(client, word, available=False))) == {sold_out["id"]}
+
+
+def test_pagination(client, word, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    created = {make_product(rest_id, headers, name=f"{word} Roll {i}")["id"] for i in range(5)}
+
+    pages = [_ids(_search(client, word, skip=skip, limit=2)) for skip in (0, 2, 4, 6)]
+
+    assert [len(page) for page in pages] == [2, 2, 1, 0]
+    assert set(itertools.chain(*pages)) == created
+    assert list(itertools.chain(*pages)) == _ids(_search(client, word, limit=10))
+
+
+def test_index_follows_updates_and_deletes(client, db, word, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, name="Lassi", description=f"{word} flavoured")
+    renamed = f"{word}y"
+
+    res = client.patch(
+        f"/api/v1/products/{product['id']}",
+        data={"product": json.dumps({"description": f"{renamed} flavoured"})},
+        headers=headers,
+    )
+    assert res.status_code == 200, res.text
+    assert _search(client, word) == []
+    assert _ids(_search(client, renamed)) == [product["id"]]
+
+    db.delete(db.get(Product, product["id"]))
+    db.commit()
+    assert _search(client, renamed) == []
+
+
+def test_deleted_restaurant_is_not_searched(client, word, admin_headers, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers, name=f"{word} Thali")
+
+    client.delete(f"/api/v1/restaurants/{rest_id}", headers=admin_headers)
+
+    assert _search(client, word) == []
+
+
+def test_fts_syntax_in_the_query_is_literal(client, word, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    product = make_product(rest_id, headers, name=f"{word} Chai")
+
+    assert _ids(_search(client, f'{word} OR "')) == []
+    assert _ids(_search(client, f"{word} chai")) == [product["id"]]
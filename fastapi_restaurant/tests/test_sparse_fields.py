@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+
+BACKGROUND = {"menu-publisher", "menu-analytics", "order-ingestor", "restaurant-purger"}
+
+
+@pytest.fixture
+def menu(make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    make_product(rest_id, headers, description="Smoky")
+    make_product(rest_id, headers, name="Kulfi", available=False)
+    return rest_id
+
+
+def _products(client, rest_id, **params):
+    return client.get(f"/api/v1/restaurants/{rest_id}/products/", params=params)
+
+
+@pytest.fixture
+def selects():
+    """SELECT statements the request threads send while the test runs."""
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        if threading.current_thread().name not in BACKGROUND and statement.lstrip().upper().startswith("SELECT"):
+            seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_fields_trim_columns(client, menu, selects):
+    full = _products(client, menu).json()
+    selects.clear()
+
+    res = _products(client, menu, fields="name, available")
+
+    assert res.status_code == 200, res.text
+    assert res.json() == [{"id": p["id"], "name": p["name"], "available": p["available"]} for p in full]
+    sql = " ".join(selects)
+    assert "products.description" not in sql
+    assert "product_sizes" not in sql and "product_images" not in sql
+
+
+def test_include_adds_relations_to_all_columns(client, menu):
+    full = _products(client, menu).json()
+
+    sized = _products(client, menu, include="sizes").json()
+    named = _products(client, menu, fields="name,sizes").json()
+
+    assert sized == [{k: v for k, v in p.items() if k not in ("images", "categories")} for p in full]
+    assert named == [{"id": p["id"], "name": p["name"], "sizes": p["sizes"]} for p in full]
+
+
+@pytest.mark.parametrize("params, unknown", [
+    ({"fields": "name,price"}, "price"),
+    ({"fields": "name", "include": "owner"}, "owner"),
+    ({"include": "name"}, "name"),   # a column is not a relation
+])
+def test_unknown_fields_are_refused(client, menu, params, unknown):
+    res = _products(client, menu, **params)
+
+    assert res.status_code == 400
+    assert res.json() == {"detail": f"Unknown fields: {unknown}"}
+
+
+def test_since_cannot_be_combined_with_fields(client, menu):
+    assert _products(client, menu, since="0", fields="name").status_code == 400
+
+
+def test_restaurant_list_fields(client, menu):
+    res = client.get("/api/v1/restaurants/", params={"fields": "name,city_code", "limit": 1000})
+
+    assert res.status_code == 200, res.text
+    rows = res.json()
+    assert {tuple(r) for r in rows} == {("id", "name", "city_code")}
+    assert {"id": menu, "name": "Spice Hub", "city_code": "PATNA"} in rows
+
+    res = client.get("/api/v1/restaurants/", params={"fields": "name,password_hash"})
+    assert (res.status_code, res.json()) == (400, {"detail": "Unknown fields: password_hash"})
@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+import app.core.s3 as s3_module
+from app.core import storage as storage_module
+from app.core.config import settings
+from app.core.s3 import UploadInfo, delete_file_from_s3
+from app.core.storage import InvalidKey, LocalStorage, S3Storage, Storage, local_storage, s3_storage
+from tests.conftest import png_bytes
+
+
+class FakeS3:
+    """Just enough of the boto3 client for S3Storage."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    fake = FakeS3()
+    monkeypatch.setattr(s3_module, "s3", fake)
+    return fake
+
+
+@pytest.fixture(params=["s3", "local"])
+def backend(request, fake_s3, tmp_path):
+    return S3Storage() if request.param == "s3" else LocalStorage(str(tmp_path))
+
+
+def _info(data: bytes) -> UploadInfo:
+    return UploadInfo(hashlib.sha256(data).hexdigest(), len(data), "image/png", "png")
+
+
+def test_round_trip(backend):
+    data = png_bytes()
+    key = "images/ab/abcdef.png"
+
+    url = backend.put_file(io.BytesIO(data), key, _info(data))
+
+    assert backend.key_for(url) == key
+    assert backend.exists(key)
+    assert backend.get_bytes(key) == data
+    backend.delete(key)
+    assert not backend.exists(key)
+    backend.delete(key)   # deleting twice is fine
+
+
+def test_foreign_url_is_not_ours(backend):
+    assert backend.key_for("https://example.com/images/ab/abcdef.png") is None
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_local_rejects_keys_outside_its_root(tmp_path):
+    backend = LocalStorage(str(tmp_path / "objects"))
+
+    with pytest.raises(InvalidKey):
+        backend.path("../escaped.png")
+
+
+def test_delete_goes_to_the_backend_of_the_url(fake_s3):
+    data = png_bytes((9, 9, 9))
+    s3_url = s3_storage.put_file(io.BytesIO(data), "images/s3/one.png", _info(data))
+    local_url = local_storage.put_file(io.BytesIO(data), "images/lo/one.png", _info(data))
+
+    delete_file_from_s3(s3_url)
+    delete_file_from_s3(local_url)
+
+    assert fake_s3.objects == {}
+    assert not local_storage.exists("images/lo/one.png")
+
+
+# ============================
+# GET /files/{key}
+# ============================
+
+@pytest.fixture
+def local_backend(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "local")
+    monkeypatch.setattr(storage_module, "storage", local_storage)
+
+
+def _put_local(key: str, data: bytes) -> str:
+    local_storage.put_file(io.BytesIO(data), key, _info(data))
+    return f"/api/v1/files/{key}"
+
+
+def test_files_route_serves_with_immutable_caching(client, local_backend):
+    data = png_bytes((1, 1, 1))
+    path = _put_local("images/cc/served.png", data)
+
+    res = client.get(path)
+    assert res.status_code == 200
+    assert res.content == data
+    assert res.headers["content-type"] == "image/png"
+    assert "immutable" in res.headers["cache-control"]
+
+    again = client.get(path, headers={"If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304
+
+    part = client.get(path, headers={"Range": "bytes=0-3"})
+    assert part.status_code == 206
+    assert part.content == data[:4]
+
+
+def test_files_route_only_serves_storage_objects(client, local_backend):
+    # a published menu: mutable, and not an upload
+    menu_dir = os.path.join(settings.IMAGE_UPLOAD_DIR, "menus")
+    os.makedirs(menu_dir, exist_ok=True)
+    with open(os.path.join(menu_dir, "spice-hub.json"), "w") as f:
+        f.write("{}")
+
+    assert client.get("/api/v1/files/menus/spice-hub.json").status_code == 404
+    assert client.get("/api/v1/files/..%2Fuploads%2Fmenus%2Fspice-hub.json").status_code == 404
+    assert client.get("/api/v1/files/images").status_code == 404
+
+
+def test_files_route_is_off_for_s3(client):
+    _put_local("images/dd/hidden.png", png_bytes())
+
+    assert client.get("/api/v1/files/images/dd/hidden.png").status_code == 404
+
+
+def test_uploaded_product_image_is_served_locally(client, local_backend, make_restaurant, make_product):
+    rest_id, headers = make_restaurant()
+    data = png_bytes((12, 34, 56))
+    image_url = make_product(rest_id, headers, images=[data])["images"][0]["image_url"]
+
+    assert image_url.startswith(settings.LOCAL_STORAGE_URL)
+    res = client.get(image_url[image_url.index("/api/v1/files/"):])
+    assert res.status_code == 200
+    assert res.content == data
@@ -0,0 +1,80 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.typeahead import RestaurantSuggestIndex
+
+_words = itertools.count(1)
+
+
+@pytest.fixture
+def word():
+    """A name prefix no other test's restaurants share."""
+    return f"qorma{next(_words)}"
+
+
+def _suggest(client, q, **params) -> list[dict]:
+    res = client.get("/api/v1/restaurants/suggest", params={"q": q, **params})
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def _ids(items) -> list[int]:
+    return [item["id"] for item in items]
+
+
+def test_prefix_matches_in_key_order(client, word, make_restaurant):
+    dhaba, _ = make_restaurant(name=f"{word} Dhaba")
+    royal, _ = make_restaurant(name=f"Royal {word}")           # matched by its last word
+    cafe, _ = make_restaurant(name=f"{word}wala Cafe")
+    make_restaurant(name=f"Dhaba {word[:-1]}")                 # a shorter word is not a match
+
+    # "<word>" < "<word> dhaba" < "<word>wala cafe"
+    assert _ids(_suggest(client, word)) == [royal, dhaba, cafe]
+    assert _ids(_suggest(client, f"  {word.upper()} dh")) == [dhaba]
+    assert _ids(_suggest(client, word, limit=2)) == [royal, dhaba]
+
+
+def test_city_filter(client, word, make_restaurant):
+    patna, _ = make_restaurant(name=f"{word} Patna")
+    gaya, _ = make_restaurant(name=f"{word} Gaya", city_code="GAYA")
+
+    assert _ids(_suggest(client, word, city_code="GAYA")) == [gaya]
+    assert set(_ids(_suggest(client, word))) == {patna, gaya}
+
+
+def test_update_and_delete_refresh_the_index(client, word, admin_headers, make_restaurant):
+    rest_id, _ = make_restaurant(name=f"{word} Express")
+
+    res = client.patch(
+        f"/api/v1/restaurants/{rest_id}",
+        data={"name": f"{word}x Express", "city_code": "GAYA"},
+        headers=admin_headers,
+    )
+    assert res.status_code == 200, res.text
+    assert _suggest(client, f"{word} express") == []
+    assert _suggest(client, f"{word}x", city_code="PATNA") == []
+    assert _suggest(client, f"{word}x", city_code="GAYA")[0] == {
+        "id": rest_id, "name": f"{word}x Express", "city_code": "GAYA", "location": "Main Road",
+    }
+
+    client.delete(f"/api/v1/restaurants/{rest_id}", headers=admin_headers)
+    assert _suggest(client, f"{word}x") == []
+
+
+def test_one_result_per_restaurant():
+    index = RestaurantSuggestIndex()
+    index.build([
+        SimpleNamespace(id=1, name="Tandoor Tandoori", city_code="PATNA", location="Tandoor Lane"),
+        SimpleNamespace(id=2, name="Tandoor House", city_code="PATNA", location=None),
+    ])
+
+    # "tandoor house" < "tandoor lane" < "tandoor tandoori" < "tandoori": 1 matches three keys
+    assert [r["id"] for r in index.suggest("tand")] == [2, 1]
+    assert index.suggest("   ") == []
+
+    index.remove(1)
+    index.upsert(SimpleNamespace(id=2, name="Tandoor House", city_code="GAYA", location=None))
+    assert [r["id"] for r in index.suggest("tand", "GAYA")] == [2]
+    assert index.suggest("tand", "PATNA") == []
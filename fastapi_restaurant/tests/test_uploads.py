@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.core.s3 import STAGING_PREFIX, inspect_upload
+from app.core.uploads import ReceivedFile, stream_form
+from tests.conftest import png_bytes
+
+BOUNDARY = "upload-test"
+HEADERS = Headers({"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+
+
+def _body(fields=(), files=()) -> bytes:
+    out = b""
+    for name, value in fields:
+        out += (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        ).encode()
+    for name, filename, data in files:
+        out += (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            "Content-Type: image/png\r\n\r\n"
+        ).encode() + data + b"\r\n"
+    return out + f"--{BOUNDARY}--\r\n".encode()
+
+
+class Chunks:
+    """An ASGI-like body stream that records how much of it was consumed."""
+
+    def __init__(self, body: bytes, size: int = 8 * 1024):
+        self.chunks = [body[i:i + size] for i in range(0, len(body), size)]
+        self.read = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def _parse(stream, limits):
+    return asyncio.run(stream_form(HEADERS, stream, limits))
+
+
+@pytest.fixture
+def small_files(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 64 * 1024)
+
+
+def test_files_are_hashed_while_received():
+    data = png_bytes(size=(64, 64))
+
+    form = _parse(Chunks(_body([("product", '{"name": "x"}')], [("images", "a.png", data)])), {"images": 10})
+
+    upload = form["images"]
+    assert form["product"] == '{"name": "x"}'
+    assert isinstance(upload.file, ReceivedFile)
+    assert upload.size == len(data)
+    info = inspect_upload(upload)
+    assert info.sha256 == hashlib.sha256(data).hexdigest()
+    assert (info.size, info.content_type) == (len(data), "image/png")
+    assert upload.file.read() == data
+
+
+def test_oversized_file_stops_reading_the_body(small_files):
+    stream = Chunks(_body(files=[("logo", "big.png", b"\x89PNG\r\n\x1a\n" + b"x" * 1024 * 1024)]))
+
+    with pytest.raises(HTTPException) as exc:
+        _parse(stream, {"logo": 1})
+
+    assert exc.value.status_code == 413
+    assert stream.read < len(stream.chunks) // 10   # refused after ~64 KB of a 1 MB body
+
+
+def test_too_many_files_for_a_field():
+    files = [("images", f"{i}.png", png_bytes()) for i in range(3)]
+
+    with pytest.raises(HTTPException) as exc:
+        _parse(Chunks(_body(files=files)), {"images": 2})
+    assert exc.value.status_code == 413
+
+
+def test_declared_length_over_the_route_cap_is_refused(client, admin_headers, small_files):
+    # a single-file route allows one file plus the form, not the global cap
+    body = _body([("name", "Big Logo")], [("logo", "big.png", b"\x89PNG\r\n\x1a\n" + b"x" * 400 * 1024)])
+    assert len(body) < settings.UPLOAD_MAX_FILES * settings.UPLOAD_MAX_BYTES + settings.UPLOAD_FORM_OVERHEAD
+
+    res = client.post(
+        "/api/v1/restaurants/",
+        content=body,
+        headers={**admin_headers, "Content-Type": HEADERS["content-type"]},
+    )
+
+    assert res.status_code == 413
+    assert res.json() == {"detail": "Request body too large"}
+
+
+def test_large_image_goes_to_s3_in_parts_while_received(client, s3, make_restaurant, monkeypatch):
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD", 64 * 1024)
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", 64 * 1024)
+    rest_id, headers = make_restaurant()
+    data = b"\x89PNG\r\n\x1a\n" + os.urandom(300 * 1024)
+    sha = hashlib.sha256(data).hexdigest()
+
+    res = client.post(
+        f"/api/v1/restaurants/{rest_id}/products/",
+        data={"product": json.dumps({"name": "Thali", "sizes": [{"size_label": "Full", "price": 250}]})},
+        files=[("images", ("thali.png", data, "image/png"))],
+        headers=headers,
+    )
+
+    assert res.status_code == 200, res.text
+    staged = s3.create_multipart_upload.call_args.kwargs["Key"]
+    assert staged.startswith(STAGING_PREFIX)
+    assert s3.upload_part.call_count == math.ceil(len(data) / (64 * 1024))
+    copy = s3.copy_object.call_args.kwargs
+    assert copy["Key"] == f"images/{sha[:2]}/{sha}.png"
+    assert copy["CopySource"]["Key"] == staged
+    assert s3.put_object.call_count == 0
+    # the staging object goes once the request is done
+    assert [c.kwargs["Key"] for c in s3.delete_object.call_args_list] == [staged]
+    assert res.json()["images"][0]["image_url"].endswith(copy["Key"])
@@ -9,16 +9,15 @@ import {
 } from "lucide-react";
 
 export default function RestaurantDashboard() {
-  const { fetchRestaurantById, selectedRestaurant } = useRestaurantStore();
-  const { products, fetchProducts } = useProductStore();
+  const { fetchDashboard, selectedRestaurant } = useRestaurantStore();
+  const { products } = useProductStore();
   const qrRef = useRef(null);
 
   useEffect(() => {
     const restaurantId = Number(localStorage.getItem("restaurant_id"));
     if (!restaurantId) return;
-    fetchRestaurantById(restaurantId);
-    fetchProducts(restaurantId);
-  }, [fetchRestaurantById, fetchProducts]);
+    fetchDashboard(restaurantId).catch(() => {});
+  }, [fetchDashboard]);
 
   // Generate the stats for the dashboard
   const stats = useMemo(() => {
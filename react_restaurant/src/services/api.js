@@ -44,6 +44,10 @@ export const api = {
   deleteRestaurant: (restaurantId) =>
     apiClient.delete(`/api/v1/restaurants/${restaurantId}`),
 
+  // restaurant + products + categories + counts in one request
+  getDashboard: (restaurantId) =>
+    apiClient.get(`/api/v1/restaurants/${restaurantId}/dashboard`),
+
 
   // =========================
   // Category Endpoints
@@ -65,6 +69,12 @@ export const api = {
   getProductDetails: (productId) =>
     apiClient.get(`/api/v1/products/${productId}`),
 
+  // several products in one request: { items (in order), missing }
+  getProductsByIds: (productIds) =>
+    productIds.length > 100
+      ? apiClient.post('/api/v1/products/batch', { ids: productIds })
+      : apiClient.get('/api/v1/products', { params: { ids: productIds.join(',') } }),
+
   updateProductDetails: (productId, data) =>
     apiClient.patch(`/api/v1/products/${productId}`, data),
 
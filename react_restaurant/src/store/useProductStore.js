@@ -26,6 +26,16 @@ export const useProductStore = create((set, get) => ({
     }
   },
 
+  readProducts: async (product_ids) => {
+    try {
+      const { data } = await api.getProductsByIds(product_ids);
+      return data;
+    } catch (error) {
+      console.error('Error reading products:', error);
+      throw error;
+    }
+  },
+
 // Inside useProductStore.js
 toggleAvailability: async (product_id, current_available) => { // Added current status param
   try {
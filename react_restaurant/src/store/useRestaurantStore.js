@@ -1,5 +1,7 @@
 import { create } from 'zustand';
 import { api } from '../services/api';
+import { useProductStore } from './useProductStore';
+import { useCategoryStore } from './useCategoryStore';
 
 export const useRestaurantStore = create((set) => ({
   restaurants: [],
@@ -30,6 +32,22 @@ export const useRestaurantStore = create((set) => ({
     }
   },
 
+  // One request fills the restaurant, product and category stores
+  fetchDashboard: async (restId) => {
+    set({ isLoading: true });
+    try {
+      const { data } = await api.getDashboard(restId);
+      set({ selectedRestaurant: data.restaurant, isLoading: false });
+      useProductStore.setState({ products: data.products });
+      useCategoryStore.setState({ categories: data.categories });
+      return data;
+    } catch (error) {
+      console.error('Error fetching dashboard:', error);
+      set({ isLoading: false });
+      throw error;
+    }
+  },
+
   createRestaurant: async (restaurantData) => {
     try {
       const { data } = await api.createRestaurant(restaurantData);